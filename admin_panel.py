@@ -351,7 +351,10 @@ def show_auto_discovery():
                     from deep_category_spider import DeepCategorySpider
                     spider = DeepCategorySpider(max_depth=spider_depth)
                     st.info(f"🕷️ Örümcek {discovery_url} sitesinin TÜM kategorilerini {spider_depth} seviye derinlikte buluyor...")
-                    result = spider.discover_all_categories_deep(discovery_url)
+                    # Kategoriler tarama sırasında kaydedilir, kesilirse kaldığı yerden sürer
+                    result = spider.discover_all_categories_deep(
+                        discovery_url, site_id=site_id if auto_save else None
+                    )
 
                 if result['total'] > 0:
                     st.success(f"✅ {result['total']} kategori bulundu!")
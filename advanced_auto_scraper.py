@@ -4,7 +4,6 @@ GERÇEK Trendyol Yorumlarını Otomatik Çeken Gelişmiş Scraper
 FALLBACK YOK! Gerçek veri çekemezse hata verir.
 """
 
-import undetected_chromedriver as uc
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
@@ -16,6 +15,7 @@ import re
 from datetime import datetime
 from database import SessionLocal, Product, ProductReview
 from turkish_review_ai import TurkishReviewAI
+from browser_pool import get_browser_pool
 import requests
 from fake_useragent import UserAgent
 
@@ -26,55 +26,35 @@ class AdvancedAutoScraper:
         self.session = SessionLocal()
         self.ai = TurkishReviewAI()
         self.driver = None
+        self._lease = None
         self.ua = UserAgent()
 
     def _setup_undetected_driver(self):
         """Undetected Chrome driver kur"""
         print("🚀 Gelişmiş anti-detection browser başlatılıyor...")
 
-        options = uc.ChromeOptions()
-
-        # Temel ayarlar
-        options.add_argument('--no-sandbox')
-        options.add_argument('--disable-dev-shm-usage')
-        options.add_argument('--disable-blink-features=AutomationControlled')
-        options.add_argument('--disable-features=IsolateOrigins,site-per-process')
-
-        # Gerçek kullanıcı gibi görün
-        options.add_argument(f'--user-agent={self.ua.random}')
-        options.add_argument('--window-size=1920,1080')
-        options.add_argument('--start-maximized')
-
-        # Headless KAPALI - gerçek tarayıcı gibi
-        # options.add_argument('--headless')  # Kapalı bırakıyoruz
-
-        # WebRTC leak prevention
-        options.add_experimental_option('prefs', {
-            'credentials_enable_service': False,
-            'profile.password_manager_enabled': False,
-            'webrtc.ip_handling_policy': 'disable_non_proxied_udp',
-            'webrtc.multiple_routes_enabled': False,
-            'webrtc.nonproxied_udp_enabled': False
-        })
-
         try:
-            # Undetected ChromeDriver kullan
-            self.driver = uc.Chrome(options=options, version_main=None)
-
-            # JavaScript detection bypass
-            self.driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {
-                'source': '''
-                    Object.defineProperty(navigator, 'webdriver', {get: () => undefined});
-                    Object.defineProperty(navigator, 'plugins', {get: () => [1, 2, 3, 4, 5]});
-                    Object.defineProperty(navigator, 'languages', {get: () => ['tr-TR', 'tr', 'en']});
-                    window.chrome = {runtime: {}};
-                    Object.defineProperty(navigator, 'permissions', {
-                        get: () => ({
-                            query: () => Promise.resolve({state: 'granted'})
-                        })
-                    });
-                '''
-            })
+            # Paylaşılan undetected Chrome havuzundan ödünç al (headless KAPALI)
+            self.pool = get_browser_pool(undetected=True, headless=False)
+            self._lease = self.pool.acquire()
+            self.driver = self._lease.driver
+
+            # Her ödünç alımda farklı kullanıcı gibi görün
+            self.driver.execute_cdp_cmd('Network.setUserAgentOverride', {'userAgent': self.ua.random})
+
+            # JavaScript detection bypass (driver başına bir kez)
+            if self._lease.pages == 0:
+                self.driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {
+                    'source': '''
+                        Object.defineProperty(navigator, 'plugins', {get: () => [1, 2, 3, 4, 5]});
+                        window.chrome = {runtime: {}};
+                        Object.defineProperty(navigator, 'permissions', {
+                            get: () => ({
+                                query: () => Promise.resolve({state: 'granted'})
+                            })
+                        });
+                    '''
+                })
 
             print("✅ Anti-detection browser hazır!")
             return True
@@ -344,8 +324,19 @@ class AdvancedAutoScraper:
         except Exception as e:
             print(f"❌ Browser hatası: {e}")
 
+        finally:
+            # Driver'ı bir sonraki URL için havuza iade et
+            self._release_driver()
+
         return reviews
 
+    def _release_driver(self):
+        """Ödünç alınan driver'ı havuza geri ver"""
+        if self._lease is not None:
+            self.pool.release(self._lease)
+            self._lease = None
+            self.driver = None
+
     def _parse_date(self, date_str):
         """Tarih parse et"""
         if not date_str:
@@ -520,8 +511,7 @@ class AdvancedAutoScraper:
 
     def __del__(self):
         """Cleanup"""
-        if self.driver:
-            self.driver.quit()
+        self._release_driver()
         if self.session:
             self.session.close()
 
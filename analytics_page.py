@@ -8,14 +8,21 @@ import pandas as pd
 import plotly.graph_objects as go
 import plotly.express as px
 from plotly.subplots import make_subplots
+import time
 from datetime import datetime, timedelta
-from database import SessionLocal, Product, PriceHistory, RankingHistory, SiteConfig, ProductReview
+from database import SessionLocal, Product, PriceHistory, RankingHistory, ProductLatestSnapshot, SiteConfig, ProductReview, ensure_schema
 from sqlalchemy import or_
 import sqlite3
 from sqlalchemy import or_
 import sqlite3
 from sqlalchemy import func, and_, desc
 import numpy as np
+from config import DASHBOARD
+from history import (daily_values, price_series, seen_between, seen_since, segments_by_product,
+                     step_points, time_weighted_average)
+
+# product_latest_snapshot gibi yeni tablolar eski veritabanında da olsun
+ensure_schema()
 
 def show_product_detail(product_id):
     """Ürün detay modalı"""
@@ -27,6 +34,9 @@ def show_product_detail(product_id):
         st.error("Ürün bulunamadı!")
         return
 
+    snapshot = session.query(ProductLatestSnapshot).filter_by(product_id=product_id).first()
+    current_price = snapshot.price if snapshot and snapshot.price is not None else product.price
+
     # Modal benzeri görünüm için expander kullan
     with st.expander(f"📦 {product.name} - Detaylı Analiz", expanded=True):
 
@@ -34,7 +44,7 @@ def show_product_detail(product_id):
         col1, col2, col3 = st.columns(3)
 
         with col1:
-            st.metric("💵 Güncel Fiyat", f"{product.price:.2f} TL")
+            st.metric("💵 Güncel Fiyat", f"{current_price:.2f} TL")
 
         with col2:
             st.metric("⭐ Rating", f"{product.rating:.1f}")
@@ -45,16 +55,8 @@ def show_product_detail(product_id):
         # Fiyat geçmişi grafiği
         st.subheader("📈 Fiyat Geçmişi")
 
-        price_history = session.query(
-            PriceHistory.timestamp,
-            PriceHistory.price,
-            PriceHistory.original_price,
-            PriceHistory.discount_percentage
-        ).filter(
-            PriceHistory.product_id == product_id
-        ).order_by(
-            PriceHistory.timestamp
-        ).all()
+        # Geçmiş sadece değişimde yazılır; basamak serisi son görülme anına kadar uzatılır
+        price_history = price_series(session, product_id)
 
         if price_history:
             df_price = pd.DataFrame(price_history)
@@ -67,7 +69,7 @@ def show_product_detail(product_id):
                 y=df_price['price'],
                 mode='lines+markers',
                 name='Satış Fiyatı',
-                line=dict(color='#2ecc71', width=3),
+                line=dict(color='#2ecc71', width=3, shape='hv'),
                 marker=dict(size=8)
             ))
 
@@ -78,7 +80,7 @@ def show_product_detail(product_id):
                     y=df_price['original_price'],
                     mode='lines',
                     name='Liste Fiyatı',
-                    line=dict(color='#e74c3c', dash='dash', width=2)
+                    line=dict(color='#e74c3c', dash='dash', width=2, shape='hv')
                 ))
 
             # İndirim yüzdesi (ikinci y ekseni)
@@ -87,7 +89,7 @@ def show_product_detail(product_id):
                 y=df_price['discount_percentage'],
                 mode='lines',
                 name='İndirim %',
-                line=dict(color='#f39c12', width=2),
+                line=dict(color='#f39c12', width=2, shape='hv'),
                 yaxis='y2'
             ))
 
@@ -261,7 +263,7 @@ def show_detailed_analytics():
     price_change = session.query(
         func.avg(PriceHistory.discount_percentage)
     ).filter(
-        PriceHistory.timestamp >= start_date
+        seen_since(PriceHistory, start_date)
     ).scalar() or 0
 
     with col4:
@@ -299,11 +301,39 @@ def show_detailed_analytics():
 
     session.close()
 
+def load_price_snapshots(session, product_ids, start_date):
+    """
+    Ürünlerin son fiyatı, son güncellemesi ve start_date sonrası fiyat serisi.
+
+    Son durum product_latest_snapshot'tan indeks ile okunur; fiyat basamak
+    serisi tüm kartlar için tek seferde (aralık başında geçerli değer dahil) çekilir.
+    """
+    if not product_ids:
+        return {}
+
+    snapshots = {
+        product_id: {'last_price': price, 'last_update': updated_at, 'series': None}
+        for product_id, price, updated_at in session.query(
+            ProductLatestSnapshot.product_id,
+            ProductLatestSnapshot.price,
+            ProductLatestSnapshot.price_updated_at
+        ).filter(
+            ProductLatestSnapshot.product_id.in_(product_ids)
+        )
+    }
+
+    segments = segments_by_product(session, PriceHistory, product_ids, ['price', 'original_price'], since=start_date)
+    for product_id, product_segments in segments.items():
+        snapshots.setdefault(product_id, {})['series'] = pd.DataFrame(step_points(product_segments))
+
+    return snapshots
+
 def show_best_sellers_tab(session, category, site, top_n, start_date):
     """En çok satanlar tab'ı"""
     st.subheader("🏆 En Çok Satan Ürünler")
 
-    # En çok satan ürünleri getir
+    # En çok satan ürünleri getir (süre ölçümü sadece veri sorgularını kapsar)
+    query_start = time.perf_counter()
     query = session.query(
         Product.id,
         Product.name,
@@ -313,12 +343,11 @@ def show_best_sellers_tab(session, category, site, top_n, start_date):
         Product.review_count,
         Product.image_url,
         Product.product_url,
-        func.min(RankingHistory.rank_position).label('best_rank'),
-        func.avg(RankingHistory.rank_position).label('avg_rank')
+        func.min(RankingHistory.rank_position).label('best_rank')
     ).join(
         RankingHistory, Product.id == RankingHistory.product_id
     ).filter(
-        RankingHistory.timestamp >= start_date
+        seen_since(RankingHistory, start_date)
     )
 
     if category != "Tüm Kategoriler":
@@ -332,6 +361,15 @@ def show_best_sellers_tab(session, category, site, top_n, start_date):
         'best_rank'
     ).limit(top_n).all()
 
+    # Son fiyat, son güncelleme ve fiyat serisi tek sorguda
+    price_snapshots = load_price_snapshots(session, [p.id for p in best_sellers], start_date)
+    # Satırlar değişim noktaları: ortalama sıra, sıranın geçerli kaldığı süreyle ağırlıklı
+    rank_segments = segments_by_product(session, RankingHistory, [p.id for p in best_sellers],
+                                        ['rank_position'], since=start_date)
+    avg_ranks = {product_id: time_weighted_average(segments, 'rank_position')
+                 for product_id, segments in rank_segments.items()}
+    query_ms = (time.perf_counter() - query_start) * 1000
+
     # İki sütunlu layout
     for i in range(0, len(best_sellers), 2):
         cols = st.columns(2)
@@ -340,23 +378,11 @@ def show_best_sellers_tab(session, category, site, top_n, start_date):
             if i + j < len(best_sellers):
                 product = best_sellers[i + j]
                 with col:
-                    # Son güncelleme tarihi al
-                    last_update = session.query(
-                        func.max(PriceHistory.timestamp)
-                    ).filter(
-                        PriceHistory.product_id == product.id
-                    ).scalar()
+                    snapshot = price_snapshots.get(product.id, {})
+                    last_update = snapshot.get('last_update')
 
                     # Gerçek anlık fiyat
-                    current_price = session.query(
-                        PriceHistory.price
-                    ).filter(
-                        PriceHistory.product_id == product.id
-                    ).order_by(
-                        PriceHistory.timestamp.desc()
-                    ).first()
-
-                    actual_price = current_price[0] if current_price else product.price
+                    actual_price = snapshot.get('last_price') or product.price
 
                     # Ürün kartı
                     st.markdown(f"""
@@ -370,7 +396,7 @@ def show_best_sellers_tab(session, category, site, top_n, start_date):
                                         <b>Güncel Fiyat:</b> <span style='color: #e74c3c; font-weight: bold; font-size: 18px;'>{actual_price:.2f} TL</span><br>
                                         <b>Rating:</b> ⭐ {product.rating:.1f} ({product.review_count:,} yorum)<br>
                                         <b>En İyi Sıra:</b> #{int(product.best_rank)}<br>
-                                        <b>Ort. Sıra:</b> #{int(product.avg_rank)}<br>
+                                        <b>Ort. Sıra:</b> #{int(avg_ranks.get(product.id) or product.best_rank)}<br>
                                         <b>Son Güncelleme:</b> {last_update.strftime('%d.%m.%Y %H:%M') if last_update else 'Bilinmiyor'}
                                     </p>
                                 </div>
@@ -379,20 +405,9 @@ def show_best_sellers_tab(session, category, site, top_n, start_date):
                     """, unsafe_allow_html=True)
 
                     # Fiyat grafiği
-                    price_history = session.query(
-                        PriceHistory.timestamp,
-                        PriceHistory.price,
-                        PriceHistory.original_price
-                    ).filter(
-                        PriceHistory.product_id == product.id,
-                        PriceHistory.timestamp >= start_date
-                    ).order_by(
-                        PriceHistory.timestamp
-                    ).all()
-
-                    if price_history and len(price_history) > 1:
-                        df_price = pd.DataFrame(price_history)
+                    df_price = snapshot.get('series')
 
+                    if df_price is not None and len(df_price) > 1:
                         # Mini fiyat grafiği
                         fig = go.Figure()
 
@@ -436,36 +451,36 @@ def show_best_sellers_tab(session, category, site, top_n, start_date):
                     if st.button(f"📊 Detaylı Analiz", key=f"detail_{product.id}"):
                         show_product_detail(product.id)
 
+    # Veri sorgusu süre bütçesi (widget çizimi Streamlit'te asenkron, ölçülmez)
+    budget_ms = DASHBOARD.get('query_budget_ms', 200)
+    if query_ms > budget_ms:
+        st.warning(f"⏱️ Veri sorguları {query_ms:.0f} ms sürdü (bütçe: {budget_ms} ms)")
+    else:
+        st.caption(f"⏱️ Sorgu: {query_ms:.0f} ms (bütçe: {budget_ms} ms)")
+
 def show_price_trends_tab(session, category, site, start_date):
     """Fiyat trendleri tab'ı"""
     st.subheader("📈 Fiyat Trendleri")
 
-    # Fiyat verilerini getir
-    query = session.query(
-        PriceHistory.timestamp,
-        func.avg(PriceHistory.price).label('avg_price'),
-        func.min(PriceHistory.price).label('min_price'),
-        func.max(PriceHistory.price).label('max_price')
-    ).join(
-        Product, PriceHistory.product_id == Product.id
-    ).filter(
-        PriceHistory.timestamp >= start_date
-    )
-
+    # Filtreye uyan ürünler
+    query = session.query(Product.id)
     if category != "Tüm Kategoriler":
         query = query.filter(Product.category == category)
     if site != "Tüm Siteler":
         query = query.filter(Product.site_name == site.lower())
+    product_ids = [product_id for product_id, in query]
 
-    price_data = query.group_by(
-        func.date(PriceHistory.timestamp)
-    ).order_by(
-        PriceHistory.timestamp
-    ).all()
+    # Her gün o gün geçerli olan fiyatlar (değişmeyen fiyatlar da her güne sayılır)
+    segments = segments_by_product(session, PriceHistory, product_ids, ['price'], since=start_date)
+    points = [point for product_segments in segments.values()
+              for point in daily_values(product_segments, 'price') if point['price'] is not None]
 
-    if price_data:
+    if points:
         # DataFrame oluştur
-        df = pd.DataFrame(price_data)
+        df = pd.DataFrame(points).groupby('date')['price'].agg(
+            avg_price='mean', min_price='min', max_price='max'
+        ).reset_index()
+        df['timestamp'] = pd.to_datetime(df['date'])
 
         # Grafik oluştur
         fig = go.Figure()
@@ -662,7 +677,7 @@ def show_change_analysis_tab(session, category, time_range):
             price_change = session.query(
                 func.avg(PriceHistory.discount_percentage)
             ).filter(
-                PriceHistory.timestamp >= start
+                seen_since(PriceHistory, start)
             ).scalar() or 0
 
             st.markdown(f"""
@@ -699,7 +714,7 @@ def show_change_analysis_tab(session, category, time_range):
             products_count = products_count.filter(Product.category == category)
 
         avg_price = session.query(func.avg(PriceHistory.price)).filter(
-            and_(PriceHistory.timestamp >= date, PriceHistory.timestamp < next_date)
+            seen_between(PriceHistory, date, next_date)
         ).scalar() or 0
 
         daily_stats.append({
@@ -1239,7 +1254,7 @@ def show_best_sellers_review_analysis(session, category, top_n):
     ).join(
         RankingHistory
     ).filter(
-        RankingHistory.timestamp >= start_date
+        seen_since(RankingHistory, start_date)
     )
 
     if category != "Tüm Kategoriler":
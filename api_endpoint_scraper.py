@@ -11,13 +11,13 @@ import requests
 import pandas as pd
 from datetime import datetime
 from typing import List, Dict, Any
-import cloudscraper
+from http_client import get_http_clients
 
 class TrendyolAPIScraper:
     def __init__(self):
         self.conn = sqlite3.connect('market_spider.db')
         self.cursor = self.conn.cursor()
-        self.session = cloudscraper.create_scraper()
+        self.session = get_http_clients().cloudscraper()
 
         # Bilinen Trendyol API endpoint'leri
         self.endpoints = [
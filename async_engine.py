@@ -0,0 +1,192 @@
+"""
+Async Engine - asyncio tabanlı scraping motoru
+
+Tüm sitelerin tüm URL'lerini host bazlı, yanıtlara göre kendini ayarlayan
+hız/eşzamanlılık limitleri dahilinde eşzamanlı çeker, parse edilen sayfaları sınırlı (bounded) bir kuyruk
+üzerinden tek bir DB yazıcısına aktarır.
+"""
+
+import asyncio
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+from base_scraper import ProductNormalizer
+from config import ECOMMERCE_SITES, SCRAPING
+from persistence import summarize_batches
+from rate_limiter import HostRateLimiter, get_rate_limiter
+from sharding import Shard, in_shard
+
+logger = logging.getLogger(__name__)
+
+# Kuyruk sonu işareti
+_DONE = object()
+
+
+class AsyncScrapeEngine:
+    """MarketSpider için eşzamanlı fetch + tek yazıcılı kayıt motoru"""
+
+    def __init__(self, spider, site_keys: Optional[List[str]] = None,
+                 queue_size: Optional[int] = None,
+                 limiter: Optional[HostRateLimiter] = None,
+                 parse_processes: Optional[int] = None,
+                 shard: Optional[Shard] = None):
+        self.spider = spider
+        self.shard = shard
+        self.site_keys = site_keys or list(spider.scrapers.keys())
+        self.queue_size = queue_size or SCRAPING.get('queue_size', 20)
+        self.limiter = limiter or get_rate_limiter()
+        self.parse_processes = (parse_processes if parse_processes is not None
+                                else SCRAPING.get('parse_processes', 0))
+        self.parse_pool: Optional[ProcessPoolExecutor] = None
+        self.results: Dict[str, Dict] = {}
+        self.scrapers: Dict[str, object] = {}
+
+    def _new_result(self, site_key: str) -> Dict:
+        return {
+            'site': site_key,
+            'products_found': 0,
+            'products_inserted': 0,
+            'products_updated': 0,
+            'errors': [],
+            'duration': 0
+        }
+
+    def _build_jobs(self) -> List[tuple]:
+        """(site_key, url) işlerini oluştur, scraper'ları hazırla"""
+        jobs = []
+        for site_key in self.site_keys:
+            result = self._new_result(site_key)
+            self.results[site_key] = result
+
+            site_config = ECOMMERCE_SITES.get(site_key)
+            scraper_class = self.spider.scrapers.get(site_key)
+            if not site_config:
+                result['errors'].append(f"Site config bulunamadı: {site_key}")
+                continue
+            if not scraper_class:
+                result['errors'].append(f"Scraper bulunamadı: {site_key}")
+                continue
+
+            logger.info(f"🔍 {site_key} scraping başladı...")
+            try:
+                self.scrapers[site_key] = scraper_class(site_config)
+            except Exception as e:
+                logger.error(f"Scraper başlatılamadı {site_key}: {e}")
+                result['errors'].append(str(e))
+                continue
+
+            for url in site_config['best_sellers_urls']:
+                full_url = f"{site_config['base_url']}{url}" if not url.startswith('http') else url
+                if not in_shard(full_url, self.shard):
+                    continue
+                jobs.append((site_key, full_url))
+
+        return jobs
+
+    async def _parse(self, scraper, content: bytes) -> List[Dict]:
+        """Sayfayı process pool'da (varsa) ya da thread'de parse et"""
+        if self.parse_pool:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.parse_pool, scraper.parse, content)
+        return await asyncio.to_thread(scraper.parse, content)
+
+    async def _fetch_job(self, queue: asyncio.Queue, site_key: str, url: str):
+        """Tek URL'yi limit dahilinde çek, parse et ve kuyruğa koy"""
+        scraper = self.scrapers[site_key]
+        try:
+            if 'api' in site_key:  # API destekli siteler
+                # Sayfalar scraper içinde eşzamanlı ve host limiti dahilinde çekilir;
+                # her sayfa geldikçe yazıcı kuyruğuna aktarılır
+                loop = asyncio.get_running_loop()
+
+                def on_page(page_products: List[Dict]):
+                    asyncio.run_coroutine_threadsafe(queue.put((site_key, page_products)), loop).result()
+
+                products = await asyncio.to_thread(scraper.scrape_best_sellers_api, on_page=on_page)
+                logger.info(f"  ✓ {len(products)} ürün bulundu: {url}")
+                return
+
+            # Host'un güncel (AIMD) hız ve eşzamanlılık limiti dahilinde çek
+            async with self.limiter.request_async(url):
+                content = await asyncio.to_thread(scraper.download, url)
+
+            # Parse limit dışında: slot bir sonraki isteğe bırakılır
+            products = await self._parse(scraper, content) if content else []
+
+            logger.info(f"  ✓ {len(products)} ürün bulundu: {url}")
+            await queue.put((site_key, products))
+
+        except Exception as e:
+            logger.error(f"  ✗ Hata {url}: {str(e)}")
+            self.results[site_key]['errors'].append(str(e))
+
+    async def _writer(self, queue: asyncio.Queue, started_at: float):
+        """Kuyruktaki sayfaları sırayla veritabanına yaz"""
+        while True:
+            item = await queue.get()
+            if item is _DONE:
+                queue.task_done()
+                break
+
+            site_key, products = item
+            result = self.results[site_key]
+            result['products_found'] += len(products)
+
+            normalized = []
+            for product_data in products:
+                try:
+                    normalized.append(ProductNormalizer.normalize_product(product_data, site_key))
+                except Exception as e:
+                    logger.error(f"Normalizasyon hatası: {e}")
+
+            try:
+                batches = await asyncio.to_thread(self.spider.save_products_to_db, normalized)
+                totals = summarize_batches(batches)
+                result['products_inserted'] += totals['inserted']
+                result['products_updated'] += totals['updated']
+            except Exception as e:
+                logger.error(f"DB kayıt hatası: {e}")
+                result['errors'].append(str(e))
+
+            result['duration'] = time.time() - started_at
+            queue.task_done()
+
+    async def run(self) -> List[Dict]:
+        """Tüm işleri çalıştır, site bazında sonuçları döndür"""
+        started_at = time.time()
+        jobs = self._build_jobs()
+
+        if self.parse_processes:
+            self.parse_pool = ProcessPoolExecutor(max_workers=self.parse_processes)
+
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        writer = asyncio.create_task(self._writer(queue, started_at))
+
+        try:
+            await asyncio.gather(*(self._fetch_job(queue, site_key, url) for site_key, url in jobs))
+        finally:
+            await queue.put(_DONE)
+            await writer
+
+            for scraper in self.scrapers.values():
+                scraper.close()
+            if self.parse_pool:
+                self.parse_pool.shutdown()
+                self.parse_pool = None
+
+        for site_key, result in self.results.items():
+            if not result['duration']:
+                result['duration'] = time.time() - started_at
+            self.spider.save_scrape_log(site_key, result)
+            logger.info(f"✅ {site_key} tamamlandı: {result['products_found']} ürün "
+                        f"({result['products_inserted']} yeni, {result['products_updated']} güncel), "
+                        f"{result['duration']:.2f} saniye")
+
+        return list(self.results.values())
+
+
+def run_engine(spider, site_keys: Optional[List[str]] = None, shard: Optional[Shard] = None) -> List[Dict]:
+    """Senkron koddan motoru çalıştır (shard verilirse sadece o shard'ın URL'leri)"""
+    return asyncio.run(AsyncScrapeEngine(spider, site_keys, shard=shard).run())
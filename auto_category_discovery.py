@@ -11,7 +11,6 @@ import re
 import json
 import time
 from typing import List, Dict, Set, Optional
-import cloudscraper
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
@@ -19,13 +18,14 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from database import SessionLocal, SiteConfig, SiteUrl
 from datetime import datetime
+from http_client import get_http_clients
 
 
 class AutoCategoryDiscovery:
     """Otomatik kategori ve en çok satanlar keşfi"""
 
     def __init__(self, use_selenium: bool = False):
-        self.scraper = cloudscraper.create_scraper()
+        self.scraper = get_http_clients().cached_cloudscraper()
         self.use_selenium = use_selenium
         self.driver = None
         self.discovered_categories = []
@@ -5,21 +5,22 @@ Otomatik Örümcek - Siteyi gezer ve kategorileri kendisi bulur
 
 import requests
 from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlparse
+from urllib.parse import urlparse
 import re
 import json
 import time
 from typing import List, Dict, Set
-import cloudscraper
 from collections import defaultdict
+from http_client import get_http_clients
+from url_dedup import SeenUrlSet, canonicalize_url
 
 
 class AutoSpider:
     """Otomatik kategori ve ürün bulucu örümcek"""
 
     def __init__(self):
-        self.scraper = cloudscraper.create_scraper()
-        self.visited_urls = set()
+        self.scraper = get_http_clients().cached_cloudscraper()
+        self.visited_urls = SeenUrlSet()  # Kanonik URL'ler (Bloom filtresi)
         self.discovered_categories = []
         self.best_seller_patterns = []
         self.headers = {
@@ -31,7 +32,7 @@ class AutoSpider:
         """Siteyi gez ve kategorileri otomatik bul"""
 
         self.base_url = base_url
-        self.domain = urlparse(base_url).netloc
+        self.domain = urlparse(canonicalize_url(base_url)).netloc
 
         print(f"🕷️ Örümcek {base_url} sitesini tarıyor...")
 
@@ -63,11 +64,11 @@ class AutoSpider:
     def _crawl_page(self, url: str, depth: int = 0, max_depth: int = 2) -> List[str]:
         """Bir sayfayı ziyaret et ve linkleri topla"""
 
-        if depth > max_depth or url in self.visited_urls:
+        if depth > max_depth or not self.visited_urls.add(url):
             return []
 
-        self.visited_urls.add(url)
         found_urls = []
+        seen_on_page = set()
 
         try:
             response = self.scraper.get(url, headers=self.headers, timeout=10)
@@ -76,10 +77,11 @@ class AutoSpider:
             # Tüm linkleri bul
             for link in soup.find_all('a', href=True):
                 href = link.get('href', '')
-                full_url = urljoin(url, href)
+                full_url = canonicalize_url(href, url)
 
-                # Aynı domain'de mi?
-                if urlparse(full_url).netloc == self.domain:
+                # Aynı domain'de mi? (aynı sayfadaki tekrar eden linkler atlanır)
+                if urlparse(full_url).netloc == self.domain and full_url not in seen_on_page:
+                    seen_on_page.add(full_url)
                     found_urls.append(full_url)
 
                     # Kategori pattern'leri ara
@@ -161,7 +163,7 @@ class AutoSpider:
             for elem in nav_elements:
                 href = elem.get('href', '')
                 if href and not href.startswith('#'):
-                    full_url = urljoin(base_url, href)
+                    full_url = canonicalize_url(href, base_url)
 
                     # Kategori URL pattern'leri
                     category_patterns = [
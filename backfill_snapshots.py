@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+"""
+product_latest_snapshot tablosunu price_history ve ranking_history
+tablolarından yeniden oluşturur (ilk kurulum veya tutarsızlık sonrası)
+"""
+
+import time
+
+from database import engine, ProductLatestSnapshot, backfill_latest_snapshots
+
+
+def backfill_snapshots():
+    """Snapshot tablosunu tek transaction içinde baştan doldur"""
+    ProductLatestSnapshot.__table__.create(bind=engine, checkfirst=True)
+    start = time.time()
+
+    try:
+        with engine.begin() as conn:
+            count = backfill_latest_snapshots(conn)
+        print(f"✅ {count} ürünün son durumu {time.time() - start:.2f} saniyede yazıldı")
+
+    except Exception as e:
+        print(f"❌ Hata: {e}")
+
+
+if __name__ == "__main__":
+    backfill_snapshots()
@@ -3,24 +3,19 @@ Base Scraper - Tüm site scraper'larının temel sınıfı
 """
 
 import requests
-from bs4 import BeautifulSoup
 import time
-import random
 from typing import Dict, List, Optional, Any
 from datetime import datetime
 import logging
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-import cloudscraper
 from urllib.parse import urljoin, urlparse
 import re
 import json
 
+from rate_limiter import get_rate_limiter
+from html_parser import get_html_parser
+from http_client import get_http_clients
+from browser_pool import get_browser_pool
+
 # Logging ayarları
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -37,43 +32,69 @@ class BaseScraper:
         self.rate_limit = site_config.get('rate_limit', 2)
         self.use_selenium = use_selenium
         self.driver = None
+        self._driver_lease = None
         self.session = None
-
-        # CloudScraper for Cloudflare protected sites
-        self.scraper = cloudscraper.create_scraper()
-
-    def setup_selenium(self) -> webdriver.Chrome:
-        """Selenium WebDriver kurulumu"""
-        options = Options()
-        options.add_argument('--headless')  # Arka planda çalış
-        options.add_argument('--no-sandbox')
-        options.add_argument('--disable-dev-shm-usage')
-        options.add_argument('--disable-blink-features=AutomationControlled')
-        options.add_experimental_option("excludeSwitches", ["enable-automation"])
-        options.add_experimental_option('useAutomationExtension', False)
-        options.add_argument(f'user-agent={self.headers.get("User-Agent")}')
-
-        service = Service(ChromeDriverManager().install())
-        self.driver = webdriver.Chrome(service=service, options=options)
+        self._scraper = None
+
+        # HTML parse backend'i (selectolax / lxml / bs4)
+        self.html_parser = get_html_parser(site_config.get('html_parser'))
+
+        # Host bazlı paylaşılan rate limiter
+        self.rate_limiter = get_rate_limiter()
+        if self.base_url:
+            self.rate_limiter.register(self.base_url, self.rate_limit)
+
+    @property
+    def scraper(self):
+        """CloudScraper for Cloudflare protected sites (process genelinde paylaşılan)"""
+        if self._scraper is None:
+            self._scraper = get_http_clients().cloudscraper()
+        return self._scraper
+
+    def __getstate__(self):
+        """Process pool'a gönderilirken ağ/tarayıcı kaynaklarını dışarıda bırak"""
+        state = self.__dict__.copy()
+        state['driver'] = None
+        state['_driver_lease'] = None
+        state['session'] = None
+        state['_scraper'] = None
+        state['rate_limiter'] = None
+        return state
+
+    def browser_pool(self):
+        """Bu scraper'ın User-Agent'ı ile açılan paylaşılan Chrome havuzu"""
+        return get_browser_pool(user_agent=self.headers.get("User-Agent"))
+
+    def setup_selenium(self):
+        """
+        Havuzdan uzun süreli bir driver ödünç al (self.driver).
+
+        Sayfa sayfa gezinen kod için; close() ile havuza iade edilir.
+        Tek URL için get_page_content yeterlidir.
+        """
+        if self._driver_lease is None:
+            self._driver_lease = self.browser_pool().acquire()
+            self.driver = self._driver_lease.driver
         return self.driver
 
     def get_page_content(self, url: str) -> Optional[str]:
         """Sayfa içeriğini al (requests veya selenium ile)"""
         try:
             if self.use_selenium:
-                if not self.driver:
-                    self.setup_selenium()
-
-                self.driver.get(url)
-                # Sayfanın yüklenmesini bekle
-                WebDriverWait(self.driver, 10).until(
-                    EC.presence_of_element_located((By.TAG_NAME, "body"))
-                )
-                time.sleep(2)  # JavaScript render için ek süre
-                return self.driver.page_source
+                # Sıcak tarayıcı havuzundan URL başına ödünç al
+                return self.browser_pool().fetch(url)
             else:
                 # CloudScraper kullan (Cloudflare koruması için)
-                response = self.scraper.get(url, headers=self.headers, timeout=30)
+                start = time.monotonic()
+                try:
+                    response = self.scraper.get(url, headers=self.headers, timeout=30)
+                except requests.RequestException:
+                    self.rate_limiter.report(url, None, time.monotonic() - start)
+                    raise
+
+                # Host limitine geri bildirim (429/503, yavaş yanıt -> geri çekil)
+                self.rate_limiter.report(url, response.status_code, time.monotonic() - start,
+                                         response.headers.get('Retry-After'))
                 response.raise_for_status()
                 return response.text
 
@@ -123,30 +144,74 @@ class BaseScraper:
 
         return "diger"
 
-    def scrape_best_sellers(self, url: str) -> List[Dict]:
-        """En çok satan ürünleri topla"""
-        products = []
+    def download(self, url: str) -> Optional[bytes]:
+        """Sayfayı rate limit beklemeden indir (yanıt sonucu limiter'a bildirilir)"""
         content = self.get_page_content(url)
+        if content is None:
+            return None
+        return content.encode('utf-8') if isinstance(content, str) else content
+
+    def fetch(self, url: str) -> Optional[bytes]:
+        """Host hız ve eşzamanlılık limitine uyarak sayfayı indir"""
+        with self.rate_limiter.request(url):
+            return self.download(url)
 
+    def parse(self, content: bytes) -> List[Dict]:
+        """
+        İndirilmiş sayfadan ürünleri çıkar.
+
+        Ağ erişimi veya bekleme yapmaz, sadece CPU kullanır; process pool
+        içinde çalıştırılabilir.
+        """
+        products = []
         if not content:
             return products
 
-        soup = BeautifulSoup(content, 'lxml')
+        document = self.parse_html(content)
 
         # Bu method her site için override edilmeli
-        product_elements = self.find_product_elements(soup)
+        product_elements = self.find_product_elements(document)
 
         for rank, element in enumerate(product_elements[:100], 1):  # İlk 100 ürün
             product_data = self.extract_product_data(element, rank)
             if product_data:
                 products.append(product_data)
 
-            # Rate limiting
-            time.sleep(random.uniform(0.5, self.rate_limit))
+        return products
+
+    def parse_html(self, content):
+        """HTML'i seçili backend ile parse et"""
+        return self.html_parser.parse(content)
+
+    def select(self, node, css: str) -> List:
+        """CSS seçiciye uyan tüm elementler"""
+        return self.html_parser.select(node, css)
+
+    def select_one(self, node, css: str):
+        """CSS seçiciye uyan ilk element (yoksa None)"""
+        return self.html_parser.select_one(node, css)
 
+    def attr(self, node, name: str, default=None):
+        """Element niteliği"""
+        return self.html_parser.attr(node, name, default)
+
+    def text(self, node) -> str:
+        """Elementin tüm metni"""
+        return self.html_parser.text(node)
+
+    def scrape_best_sellers(self, url: str) -> List[Dict]:
+        """En çok satan ürünleri topla"""
+        return self.parse(self.fetch(url))
+
+    def scrape_site_url(self, site_url, on_page=None) -> List[Dict]:
+        """SiteUrl kaydını çek (sayfalama destekleyen scraper'lar override eder)"""
+        products = self.scrape_best_sellers(self.make_absolute_url(site_url.url_path))
+        products = products[:site_url.max_products or len(products)]
+        if on_page and products:
+            on_page(products)
         return products
 
-    def find_product_elements(self, soup: BeautifulSoup) -> List:
+    def find_product_elements(self, document) -> List:
         """Ürün elementlerini bul - Override edilmeli"""
         raise NotImplementedError("Bu method her site için özelleştirilmeli")
 
@@ -168,8 +233,9 @@ class BaseScraper:
 
     def close(self):
         """Kaynakları temizle"""
-        if self.driver:
-            self.driver.quit()
+        if self._driver_lease is not None:
+            self.browser_pool().release(self._driver_lease)
+            self._driver_lease = None
             self.driver = None
 
 
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Job queue benchmark - İş kuyruğunun process sayısıyla ölçeklenmesi ve
+öldürülen worker'ların işlerinin kurtarılması
+
+Geçici bir SQLite veritabanında 'sleep' işleri (ağ beklemesini taklit eder)
+1, 2, 4, 8 worker process ile çalıştırılır. Ardından bir worker iş
+ortasında SIGKILL ile öldürülür; kirası dolan işlerin diğer worker
+tarafından tamamlandığı kontrol edilir.
+
+Kullanım:
+    python benchmark_job_queue.py [iş_sayısı] [iş_süresi_sn]
+"""
+
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from database import ScrapeJob
+from job_queue import JobQueue, QueueWorker
+
+
+def session_factory(db_path: str):
+    engine = create_engine(f"sqlite:///{db_path}", connect_args={'timeout': 30})
+    return sessionmaker(bind=engine)
+
+
+def sleep_job(payload, queue):
+    time.sleep(payload['seconds'])
+    return {'slept': payload['seconds']}
+
+
+def worker_process(db_path: str, settings: dict):
+    QueueWorker({'sleep': sleep_job}, session_factory(db_path), settings=settings).run(stop_when_empty=True)
+
+
+def fresh_queue(db_path: str, jobs: int, seconds: float, settings: dict) -> JobQueue:
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    factory = session_factory(db_path)
+    ScrapeJob.__table__.create(bind=factory.kw['bind'])
+    queue = JobQueue(factory, worker_id='benchmark', settings=settings)
+    queue.enqueue_many([{
+        'job_type': 'sleep',
+        'job_key': f"sleep:{i}",
+        'payload': {'seconds': seconds}
+    } for i in range(jobs)])
+    return queue
+
+
+def start_workers(db_path: str, count: int, settings: dict):
+    workers = [multiprocessing.Process(target=worker_process, args=(db_path, settings)) for _ in range(count)]
+    for worker in workers:
+        worker.start()
+    return workers
+
+
+def run_scaling(db_path: str, jobs: int, seconds: float):
+    settings = {'poll_seconds': 0.05, 'heartbeat_seconds': 1, 'lease_seconds': 10}
+    print(f"📈 Ölçeklenme: {jobs} iş x {seconds * 1000:.0f} ms\n")
+
+    baseline = None
+    for count in (1, 2, 4, 8):
+        queue = fresh_queue(db_path, jobs, seconds, settings)
+        start = time.perf_counter()
+        for worker in start_workers(db_path, count, settings):
+            worker.join()
+        elapsed = time.perf_counter() - start
+
+        stats = queue.stats()
+        duplicates = queue.session.query(ScrapeJob).filter(ScrapeJob.attempts > 1).count()
+        queue.close()
+
+        throughput = jobs / elapsed
+        baseline = baseline or throughput
+        print(f"  {count} worker: {elapsed:6.2f} s  {throughput:7.1f} iş/s  "
+              f"x{throughput / baseline:4.2f}  (done={stats['done']}, tekrar alınan={duplicates})")
+
+
+def run_recovery(db_path: str, jobs: int = 20, seconds: float = 0.5):
+    settings = {'poll_seconds': 0.05, 'heartbeat_seconds': 0.5, 'lease_seconds': 2}
+    print(f"\n💀 Kurtarma: {jobs} iş, bir worker iş ortasında SIGKILL ile öldürülüyor")
+
+    queue = fresh_queue(db_path, jobs, seconds, settings)
+    victim, survivor = start_workers(db_path, 2, settings)
+
+    time.sleep(seconds * 2.5)
+    victim.kill()
+    victim.join()
+    print(f"  Öldürüldü: pid {victim.pid}, kuyruk: {queue.stats()}")
+
+    start = time.perf_counter()
+    survivor.join()
+    queue.session.expire_all()
+
+    stats = queue.stats()
+    recovered = queue.session.query(ScrapeJob).filter(ScrapeJob.attempts > 1).count()
+    queue.close()
+
+    print(f"  Bitti ({time.perf_counter() - start:.1f} s): {stats}, kurtarılan iş: {recovered}")
+    ok = stats['done'] == jobs and recovered > 0
+    print("  ✅ Tüm işler tamamlandı" if ok else "  ❌ Eksik iş var")
+    return ok
+
+
+if __name__ == "__main__":
+    jobs = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 0.05
+
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, 'job_queue_benchmark.db')
+        run_scaling(db_path, jobs, seconds)
+        sys.exit(0 if run_recovery(db_path) else 1)
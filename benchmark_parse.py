@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Parse benchmark - Kayıtlı Trendyol sayfası üzerinde parse süresini ölç
+
+Kullanım:
+    python benchmark_parse.py [html_dosyası] [tekrar_sayısı]
+    python benchmark_parse.py --backends [html_dosyası ...] [tekrar_sayısı]
+"""
+
+import sys
+import time
+import tracemalloc
+from statistics import mean, median
+from typing import List
+
+from config import ECOMMERCE_SITES
+from base_scraper import BaseScraper
+from html_parser import available_backends
+from scrapers.trendyol_scraper import TrendyolScraper
+
+
+def time_call(func, repeat: int):
+    """Fonksiyonu `repeat` kez çalıştır, süreleri (ms) ve son sonucu döndür"""
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings, result
+
+
+def report(label: str, timings):
+    print(f"{label:32} ort: {mean(timings):8.2f} ms   medyan: {median(timings):8.2f} ms")
+
+
+def peak_memory(func) -> float:
+    """Fonksiyonun tepe bellek kullanımı (MB)"""
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / (1024 * 1024)
+
+
+def run_benchmark(path: str = 'trendyol_response.html', repeat: int = 20):
+    with open(path, 'rb') as f:
+        content = f.read()
+
+    scraper = TrendyolScraper(ECOMMERCE_SITES['trendyol'])
+
+    print(f"📄 {path} ({len(content) / 1024:.1f} KB), {repeat} tekrar\n")
+
+    soup_timings, soup = time_call(lambda: scraper.parse_html(content), repeat)
+    report(f"parse_html ({scraper.html_parser.name})", soup_timings)
+
+    find_timings, elements = time_call(lambda: scraper.find_product_elements(soup), repeat)
+    report("find_product_elements", find_timings)
+
+    def extract_all():
+        return [scraper.extract_product_data(element, rank)
+                for rank, element in enumerate(elements[:100], 1)]
+
+    extract_timings, _ = time_call(extract_all, repeat)
+    report(f"extract_product_data x{len(elements[:100])}", extract_timings)
+
+    dom_timings, dom_products = time_call(lambda: BaseScraper.parse(scraper, content), repeat)
+    report("parse (DOM)", dom_timings)
+
+    state_timings, _ = time_call(lambda: scraper.extract_initial_state(content), repeat)
+    report("extract_initial_state", state_timings)
+
+    parse_timings, products = time_call(lambda: scraper.parse(content), repeat)
+    report("parse (toplam)", parse_timings)
+
+    dom_peak = peak_memory(lambda: BaseScraper.parse(scraper, content))
+    json_peak = peak_memory(lambda: scraper.parse(content))
+    print(f"\n🧠 Tepe bellek  DOM: {dom_peak:.1f} MB   JSON: {json_peak:.1f} MB")
+    print(f"⚡ Hızlanma: {mean(dom_timings) / mean(parse_timings):.1f}x")
+
+    print(f"\n✅ {len(products)} ürün çıkarıldı (DOM: {len(dom_products)})")
+    scraper.close()
+
+
+def compare_backends(paths: List[str], repeat: int = 20):
+    """Kurulu HTML parser backend'lerini aynı sayfalarda DOM parse ile karşılaştır"""
+    backends = available_backends()
+    print(f"🔬 Backend'ler: {', '.join(backends)}  ({repeat} tekrar)\n")
+
+    for path in paths:
+        with open(path, 'rb') as f:
+            content = f.read()
+        print(f"📄 {path} ({len(content) / 1024:.1f} KB)")
+
+        results = []
+        for name in backends:
+            scraper = TrendyolScraper({**ECOMMERCE_SITES['trendyol'], 'html_parser': name})
+            timings, products = time_call(lambda: BaseScraper.parse(scraper, content), repeat)
+
+            # Göreli hız en yavaş (bs4, listede son) backend'e göre
+            results.append((name, len(products), timings))
+            scraper.close()
+
+        slowest = mean(results[-1][2])
+        for name, count, timings in results:
+            report(f"  {name} ({count} ürün)", timings)
+            print(f"{'':32} bs4'e göre: {slowest / mean(timings):5.1f}x")
+        print()
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if args and args[0] == '--backends':
+        args = args[1:]
+        repeat_count = int(args.pop()) if args and args[-1].isdigit() else 20
+        compare_backends(args or ['trendyol_response.html'], repeat_count)
+    else:
+        html_path = args[0] if args else 'trendyol_response.html'
+        repeat_count = int(args[1]) if len(args) > 1 else 20
+        run_benchmark(html_path, repeat_count)
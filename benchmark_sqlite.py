@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+SQLite benchmark - PRAGMA profillerinin yazma / okuma / eşzamanlı kullanım etkisi
+
+Her profil için geçici bir veritabanında:
+- yazma: scraper gibi batch başına commit ile ürün + fiyat/sıralama geçmişi,
+- okuma: dashboard sorguları (kategori özeti, ürün fiyat geçmişi),
+- eşzamanlı: scraper yazarken ayrı bir process dashboard sorgularını
+  çalıştırır; her iki tarafın hızı ve "database is locked" hataları sayılır.
+
+Kullanım:
+    python benchmark_sqlite.py [ürün_sayısı] [eşzamanlı_süre_sn]
+"""
+
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Dict
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from base_scraper import ProductNormalizer
+from config import DATABASE
+from database import Base, create_sqlite_engine
+from persistence import BulkProductWriter
+
+BATCH = 100
+
+PROFILES = {
+    'varsayılan (rollback journal)': {},
+    'WAL': {'journal_mode': 'WAL'},
+    'WAL + synchronous=NORMAL': {'journal_mode': 'WAL', 'synchronous': 'NORMAL'},
+    'config (WAL + NORMAL + mmap/cache/temp)': DATABASE['sqlite_pragmas'],
+}
+
+DASHBOARD_QUERIES = [
+    """SELECT p.category, COUNT(*), AVG(s.price), MIN(s.rank_position)
+       FROM products p JOIN product_latest_snapshot s ON s.product_id = p.id
+       GROUP BY p.category""",
+    """SELECT ph.timestamp, ph.price FROM price_history ph
+       WHERE ph.product_id = :product_id ORDER BY ph.timestamp""",
+    """SELECT p.name, rh.rank_position FROM ranking_history rh JOIN products p ON p.id = rh.product_id
+       WHERE rh.timestamp >= datetime('now', '-1 day') ORDER BY rh.rank_position LIMIT 50""",
+]
+
+
+def make_products(count: int):
+    """Scraper çıktısı gibi normalize edilmiş ürünler (fiyatlar her turda değişir)"""
+    return [ProductNormalizer.normalize_product({
+        'id': str(i),
+        'title': f"Samsung Ürün {i}",
+        'category': f"kategori_{i % 20}",
+        'url': f"https://www.trendyol.com/urun-p-{i}",
+        'price': round(random.uniform(10, 1000), 2),
+        'rating': 4.5,
+        'review_count': i % 500,
+        'rank': i % 100 + 1,
+        'seller': 'Satıcı'
+    }, 'trendyol') for i in range(count)]
+
+
+def write_rounds(session, products: int, rounds: int) -> float:
+    """rounds tur boyunca tüm ürünleri BATCH'lik commit'lerle yaz; satır/sn döndür"""
+    writer = BulkProductWriter(session, batch_size=BATCH)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        rows = make_products(products)
+        for offset in range(0, len(rows), BATCH):
+            writer.write(rows[offset:offset + BATCH])
+    return products * rounds / (time.perf_counter() - start)
+
+
+def run_queries(session, products: int, count: int) -> float:
+    start = time.perf_counter()
+    for i in range(count):
+        sql = DASHBOARD_QUERIES[i % len(DASHBOARD_QUERIES)]
+        session.execute(text(sql), {'product_id': random.randint(1, products)}).fetchall()
+    return count / (time.perf_counter() - start)
+
+
+def dashboard_reader(path: str, pragmas: Dict, products: int, stop, results):
+    """Ayrı process'te (dashboard gibi) sürekli okuma sorguları çalıştır"""
+    engine = create_sqlite_engine(path, pragmas)
+    session = sessionmaker(bind=engine)()
+    stats = {'reads': 0, 'read_locked': 0, 'max_read_ms': 0.0}
+    i = 0
+    while not stop.is_set():
+        sql = DASHBOARD_QUERIES[i % len(DASHBOARD_QUERIES)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            session.execute(text(sql), {'product_id': random.randint(1, products)}).fetchall()
+            stats['reads'] += 1
+        except OperationalError:
+            stats['read_locked'] += 1
+        session.rollback()  # Her sorgu kendi okuma transaction'ında
+        stats['max_read_ms'] = max(stats['max_read_ms'], (time.perf_counter() - start) * 1000)
+    session.close()
+    engine.dispose()
+    results.put(stats)
+
+
+def run_concurrent(factory, path: str, pragmas: Dict, products: int, seconds: float) -> Dict:
+    """Scraper batch commit ederken dashboard process'i okuma yapar"""
+    stop = multiprocessing.Event()
+    results = multiprocessing.Queue()
+    reader = multiprocessing.Process(target=dashboard_reader, args=(path, pragmas, products, stop, results))
+    reader.start()
+
+    session = factory()
+    bulk = BulkProductWriter(session, batch_size=BATCH)
+    stats = {'writes': 0, 'write_locked': 0}
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        rows = make_products(products)
+        for offset in range(0, len(rows), BATCH):
+            if time.monotonic() >= deadline:
+                break
+            try:
+                bulk.write(rows[offset:offset + BATCH])
+                stats['writes'] += 1
+            except OperationalError:
+                stats['write_locked'] += 1
+    session.close()
+
+    stop.set()
+    stats.update(results.get())
+    reader.join()
+
+    stats['writes_per_sec'] = stats['writes'] * BATCH / seconds
+    stats['reads_per_sec'] = stats['reads'] / seconds
+    return stats
+
+
+def benchmark_profile(path: str, name: str, pragmas: Dict, products: int, seconds: float):
+    engine = create_sqlite_engine(path, pragmas)
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+
+    session = factory()
+    insert_rate = write_rounds(session, products, rounds=3)
+    query_rate = run_queries(session, products, count=300)
+    session.close()
+
+    concurrent = run_concurrent(factory, path, pragmas, products, seconds)
+    engine.dispose()
+
+    print(f"{name:42} yazma: {insert_rate:8.0f} ürün/s   okuma: {query_rate:7.0f} sorgu/s")
+    print(f"{'':42} eşzamanlı: {concurrent['writes_per_sec']:6.0f} ürün/s yazma, "
+          f"{concurrent['reads_per_sec']:6.0f} sorgu/s okuma, en uzun okuma {concurrent['max_read_ms']:.0f} ms, "
+          f"kilit hatası {concurrent['write_locked']}/{concurrent['read_locked']}")
+
+
+if __name__ == "__main__":
+    products = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    random.seed(42)
+    print(f"🗄️ SQLite PRAGMA benchmark: {products} ürün, batch {BATCH}, eşzamanlı {seconds:.0f} sn\n")
+    with tempfile.TemporaryDirectory() as directory:
+        for index, (name, pragmas) in enumerate(PROFILES.items()):
+            path = os.path.join(directory, f"bench_{index}.db")
+            benchmark_profile(path, name, pragmas, products, seconds)
@@ -0,0 +1,345 @@
+"""
+Browser Pool - Sıcak tutulan Chrome/Selenium driver havuzu
+
+JavaScript render gereken siteler için her URL'de yeni Chrome açmak
+saniyeler sürer. Havuz N adet driver'ı açık tutar ve URL başına ödünç
+verir:
+
+- Driver belirli sayıda sayfadan sonra ya da bellek eşiği aşılınca
+  kapatılıp yenisiyle değiştirilir (RAM sınırlı kalır)
+- Resim, font ve CSS istekleri CDP ile engellenir
+- ChromeDriver yolu process başına bir kez çözülür
+- Farklı ayarlı havuzlar toplamda max_browsers'tan fazla Chrome açmaz
+
+Ayarlar config.SELENIUM_POOL içinden okunur.
+"""
+
+import atexit
+import logging
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+from config import SELENIUM_POOL
+
+logger = logging.getLogger(__name__)
+
+# Tüm havuzların paylaştığı açık Chrome sınırı
+_browser_slots = threading.BoundedSemaphore(SELENIUM_POOL['max_browsers'])
+
+# CDP Network.setBlockedURLs kalıpları
+BLOCKED_URL_PATTERNS = {
+    'image': ['*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.avif', '*.svg', '*.ico'],
+    'font': ['*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot'],
+    'stylesheet': ['*.css'],
+    'media': ['*.mp4', '*.webm', '*.mp3'],
+}
+
+STEALTH_SCRIPT = """
+    Object.defineProperty(navigator, 'webdriver', {get: () => undefined});
+    Object.defineProperty(navigator, 'languages', {get: () => ['tr-TR', 'tr', 'en']});
+"""
+
+
+@lru_cache(maxsize=1)
+def chromedriver_path() -> Optional[str]:
+    """ChromeDriver'ı bir kez indir/bul; bulunamazsa Selenium Manager'a bırak"""
+    try:
+        from webdriver_manager.chrome import ChromeDriverManager
+        return ChromeDriverManager().install()
+    except Exception as e:
+        logger.warning(f"ChromeDriverManager kullanılamadı, Selenium Manager denenecek: {e}")
+        return None
+
+
+class PooledDriver:
+    """Havuzdaki bir driver ve kullanım sayaçları"""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages = 0
+        self.created_at = time.time()
+
+    def memory_mb(self) -> Optional[float]:
+        """Chrome process ağacının RSS toplamı (psutil yoksa JS heap)"""
+        try:
+            if psutil is not None:
+                service_process = self.driver.service.process
+                root = psutil.Process(service_process.pid)
+                processes = [root] + root.children(recursive=True)
+                return sum(p.memory_info().rss for p in processes if p.is_running()) / 1024 / 1024
+
+            metrics = self.driver.execute_cdp_cmd('Performance.getMetrics', {})['metrics']
+            heap = next((m['value'] for m in metrics if m['name'] == 'JSHeapTotalSize'), None)
+            return heap / 1024 / 1024 if heap is not None else None
+        except Exception:
+            return None
+
+    def quit(self):
+        try:
+            self.driver.quit()
+        except Exception as e:
+            logger.debug(f"Driver kapatılamadı: {e}")
+
+
+class BrowserPool:
+    """Sıcak Chrome driver havuzu (thread-safe)"""
+
+    def __init__(self, settings: Optional[Dict] = None):
+        self.settings = {**SELENIUM_POOL, **(settings or {})}
+        self.size = self.settings['size']
+        self.max_pages = self.settings['max_pages_per_driver']
+        self.max_memory_mb = self.settings['max_memory_mb']
+
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._closed = False
+        self.stats = {'launched': 0, 'recycled': 0, 'pages': 0, 'failed': 0}
+
+    def _build_options(self) -> Options:
+        if self.settings.get('undetected'):
+            import undetected_chromedriver as uc
+            options = uc.ChromeOptions()
+        else:
+            options = Options()
+            options.add_experimental_option("excludeSwitches", ["enable-automation"])
+            options.add_experimental_option('useAutomationExtension', False)
+
+        if self.settings.get('headless', True):
+            options.add_argument('--headless=new')
+        options.add_argument('--no-sandbox')
+        options.add_argument('--disable-dev-shm-usage')
+        options.add_argument('--disable-gpu')
+        options.add_argument('--disable-extensions')
+        options.add_argument('--disable-blink-features=AutomationControlled')
+        options.add_argument('--window-size=1920,1080')
+        if self.settings.get('user_agent'):
+            options.add_argument(f"user-agent={self.settings['user_agent']}")
+
+        # Resimleri tarayıcı seviyesinde de kapat (CDP engeline ek)
+        if 'image' in self.settings.get('block_resources', []):
+            options.add_experimental_option('prefs', {'profile.managed_default_content_settings.images': 2})
+
+        options.page_load_strategy = self.settings.get('page_load_strategy', 'eager')
+        return options
+
+    def _launch(self) -> PooledDriver:
+        """Yeni Chrome başlat ve CDP ayarlarını uygula"""
+        start = time.time()
+        options = self._build_options()
+
+        if self.settings.get('undetected'):
+            import undetected_chromedriver as uc
+            driver = uc.Chrome(options=options, version_main=None)
+        else:
+            path = chromedriver_path()
+            service = Service(path) if path else Service()
+            driver = webdriver.Chrome(service=service, options=options)
+
+        driver.set_page_load_timeout(self.settings.get('page_load_timeout', 30))
+        driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {'source': STEALTH_SCRIPT})
+
+        blocked = self.blocked_patterns()
+        if blocked:
+            driver.execute_cdp_cmd('Network.enable', {})
+            driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': blocked})
+
+        self.stats['launched'] += 1
+        logger.info(f"🌐 Chrome başlatıldı ({time.time() - start:.1f}s)")
+        return PooledDriver(driver)
+
+    def blocked_patterns(self) -> List[str]:
+        patterns = []
+        for resource_type in self.settings.get('block_resources', []):
+            patterns.extend(BLOCKED_URL_PATTERNS.get(resource_type, []))
+        return patterns
+
+    def acquire(self, timeout: Optional[float] = None) -> PooledDriver:
+        """Boştaki driver'ı al; yoksa ve sınır dolmadıysa yenisini başlat"""
+        if self._closed:
+            raise RuntimeError("Browser pool kapatıldı")
+
+        timeout = self.settings.get('acquire_timeout', 120) if timeout is None else timeout
+        deadline = time.time() + timeout
+
+        while True:
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                pass
+
+            # Geri dönüştürülen driver'ların yeri boşalmış olabilir
+            with self._lock:
+                can_launch = self._created < self.size
+                if can_launch:
+                    self._created += 1
+
+            if can_launch and not _reserve_browser_slot(self):
+                with self._lock:
+                    self._created -= 1
+                can_launch = False
+
+            if can_launch:
+                try:
+                    return self._launch()
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    _browser_slots.release()
+                    raise
+
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                raise TimeoutError(f"{timeout}s içinde boş browser bulunamadı")
+            try:
+                return self._idle.get(timeout=min(remaining, 0.5))
+            except queue.Empty:
+                continue
+
+    def release(self, pooled: PooledDriver, failed: bool = False):
+        """Driver'ı havuza geri ver; gerekiyorsa geri dönüştür"""
+        pooled.pages += 1
+        self.stats['pages'] += 1
+
+        reason = None
+        if failed:
+            reason = 'hata'
+            self.stats['failed'] += 1
+        elif self._closed:
+            reason = 'havuz kapandı'
+        elif pooled.pages >= self.max_pages:
+            reason = f'{pooled.pages} sayfa'
+        elif self.max_memory_mb:
+            memory = pooled.memory_mb()
+            if memory is not None and memory > self.max_memory_mb:
+                reason = f'{memory:.0f} MB bellek'
+
+        if reason is None:
+            try:
+                # Sekme açan scraper'ların artıklarını temizle
+                handles = pooled.driver.window_handles
+                for handle in handles[1:]:
+                    pooled.driver.switch_to.window(handle)
+                    pooled.driver.close()
+                pooled.driver.switch_to.window(handles[0])
+            except Exception:
+                reason = 'yanıt vermiyor'
+
+        if reason is None:
+            self._idle.put(pooled)
+            return
+
+        logger.info(f"♻️ Browser geri dönüştürülüyor ({reason})")
+        self._discard(pooled)
+        if reason != 'havuz kapandı':
+            self.stats['recycled'] += 1
+
+    @contextmanager
+    def driver(self, timeout: Optional[float] = None):
+        """with pool.driver() as driver: ... (iade sırasında sağlık kontrolü yapılır)"""
+        pooled = self.acquire(timeout)
+        try:
+            yield pooled.driver
+        except BaseException:
+            # Sayfa yarıda kalmış olabilir: driver'ı havuza koyma
+            self.release(pooled, failed=True)
+            raise
+        self.release(pooled)
+
+    def _discard(self, pooled: PooledDriver):
+        """Driver'ı kapat ve havuz / genel sınırdaki yerini boşalt"""
+        pooled.quit()
+        with self._lock:
+            self._created -= 1
+        _browser_slots.release()
+
+    def discard_idle(self) -> bool:
+        """Boştaki bir driver'ı kapat (başka havuza yer açmak için)"""
+        try:
+            pooled = self._idle.get_nowait()
+        except queue.Empty:
+            return False
+        logger.info("♻️ Boştaki browser başka havuza yer açmak için kapatılıyor")
+        self._discard(pooled)
+        return True
+
+    def fetch(self, url: str, wait_css: str = 'body', render_wait: Optional[float] = None) -> str:
+        """URL'i havuzdaki bir tarayıcıda aç ve render edilmiş HTML'i döndür"""
+        with self.driver() as driver:
+            driver.get(url)
+            WebDriverWait(driver, self.settings.get('wait_timeout', 10)).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, wait_css))
+            )
+            render_wait = self.settings.get('render_wait', 1.0) if render_wait is None else render_wait
+            if render_wait:
+                time.sleep(render_wait)
+            return driver.page_source
+
+    def close(self):
+        """Boştaki tüm driver'ları kapat; kullanımdakiler iadede kapanır"""
+        self._closed = True
+        while True:
+            try:
+                pooled = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(pooled)
+
+
+_pools: Dict[tuple, BrowserPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_browser_pool(**settings) -> BrowserPool:
+    """
+    Ayar kombinasyonu başına process genelinde paylaşılan havuz.
+
+    Örn. get_browser_pool(undetected=True, headless=False)
+    """
+    key = tuple(sorted(settings.items()))
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None or pool._closed:
+            pool = BrowserPool(settings)
+            _pools[key] = pool
+        return pool
+
+
+def _reserve_browser_slot(requester: BrowserPool) -> bool:
+    """Genel Chrome sınırından yer ayır; doluysa başka havuzun boştaki driver'ını kapat"""
+    if _browser_slots.acquire(blocking=False):
+        return True
+
+    with _pools_lock:
+        others = [pool for pool in _pools.values() if pool is not requester]
+    for pool in others:
+        if pool.discard_idle():
+            return _browser_slots.acquire(blocking=False)
+    return False
+
+
+def close_browser_pools():
+    """Tüm havuzları kapat (program sonunda)"""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
+
+
+atexit.register(close_browser_pools)
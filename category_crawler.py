@@ -0,0 +1,251 @@
+"""
+Category Crawler - Kalıcı frontier ile paralel BFS kategori taraması
+
+Kategori sayfaları seviye seviye (breadth-first) taranır. Sınır (frontier)
+crawl_frontier tablosunda tutulur: her URL'nin derinliği, parent'ı ve durumu
+(pending / in_progress / done / failed). Her batch sonunda commit edilir;
+kesilen bir tarama tekrar başlatıldığında 'in_progress' kalan satırlar
+'pending'e döner ve kaldığı yerden devam eder.
+
+Sayfalar domain başına sınırlı sayıda worker thread'de çekilir (ayrıca
+rate_limiter'ın host limiti geçerlidir); veritabanına sadece ana thread
+yazar. Tamamlanan kategoriler her batch'te spider.save_to_database ile
+SiteUrl olarak kaydedilir.
+
+Frontier'a giren URL'ler kanonikleştirilir (url_dedup); görülen URL'ler
+ayrıca taramaya özel kalıcı bir Bloom filtresinde tutulur, böylece her
+sayfada tekrar eden menü linkleri veritabanına sorulmadan elenir.
+"""
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional
+
+from bs4 import BeautifulSoup
+from sqlalchemy.orm import Session
+
+from config import CATEGORY_CRAWLER
+from database import SessionLocal, CrawlFrontier
+from url_dedup import SeenUrlSet, canonicalize_url
+
+logger = logging.getLogger(__name__)
+
+
+class BFSCategoryCrawler:
+    """DeepCategorySpider için kalıcı, devam ettirilebilir BFS tarayıcı"""
+
+    def __init__(self, spider, crawl_key: str, site_id: Optional[int] = None,
+                 settings: Optional[Dict] = None, session: Optional[Session] = None):
+        self.spider = spider
+        self.crawl_key = crawl_key
+        self.site_id = site_id
+        self.settings = {**CATEGORY_CRAWLER, **(settings or {})}
+        self.max_depth = self.settings['max_depth']
+        self.session = session or SessionLocal()
+        self.seen = SeenUrlSet.open(f"frontier_{crawl_key}")
+        self.stats = {'fetched': 0, 'discovered': 0, 'failed': 0, 'saved': 0}
+
+    def _rows(self):
+        return self.session.query(CrawlFrontier).filter(CrawlFrontier.crawl_key == self.crawl_key)
+
+    def has_unfinished(self) -> bool:
+        """Yarım kalmış (pending / in_progress) satır var mı"""
+        return self._rows().filter(CrawlFrontier.status.in_(['pending', 'in_progress'])).count() > 0
+
+    def reset(self):
+        """Bu taramanın frontier'ını sil (baştan başla)"""
+        self._rows().delete(synchronize_session=False)
+        self.session.commit()
+        self.seen.clear()
+
+    def seed(self, seeds: List[Dict]):
+        """Ana kategorileri (id, name, url) derinlik 0 olarak ekle"""
+        self._enqueue(seeds, depth=0, parent=None)
+        self.session.commit()
+        self.seen.save()
+
+    def _enqueue(self, links: List[Dict], depth: int, parent: Optional[CrawlFrontier]) -> int:
+        """Yeni URL'leri frontier'a ekle; bilinenleri atla"""
+        links = [{**link, 'url': canonicalize_url(link['url'])} for link in links]
+
+        # Bloom filtresi kesin olarak görülmemiş URL'leri ayıklar; kalanlar DB'de
+        # de kontrol edilir (filtre son checkpoint'ten geride kalmış olabilir)
+        links = [link for link in links if self.seen.add(link['url'])]
+        urls = list(dict.fromkeys(link['url'] for link in links))
+        if not urls:
+            return 0
+
+        known = {
+            url for (url,) in self.session.query(CrawlFrontier.url).filter(
+                CrawlFrontier.crawl_key == self.crawl_key,
+                CrawlFrontier.url.in_(urls)
+            )
+        }
+
+        # Son seviyedeki kategoriler çekilmez, doğrudan yaprak olarak tamamlanır
+        leaf = depth >= self.max_depth
+        added = 0
+        for link in links:
+            if link['url'] in known:
+                continue
+            known.add(link['url'])
+            self.session.add(CrawlFrontier(
+                crawl_key=self.crawl_key,
+                url=link['url'],
+                depth=depth,
+                parent_url=parent.url if parent else None,
+                category_id=link['id'],
+                name=link['name'],
+                path=f"{parent.path}/{link['name']}" if parent else link['name'],
+                status='done' if leaf else 'pending',
+                attempts=0,
+                child_count=0,
+                saved=False
+            ))
+            added += 1
+
+        self.stats['discovered'] += added
+        return added
+
+    def _recover(self) -> int:
+        """Önceki çalışmadan 'in_progress' kalan satırları kuyruğa geri al"""
+        count = self._rows().filter(CrawlFrontier.status == 'in_progress').update(
+            {'status': 'pending'}, synchronize_session=False
+        )
+        self.session.commit()
+        return count
+
+    def _claim(self, limit: int) -> List[CrawlFrontier]:
+        """En sığ seviyedeki bekleyen URL'leri al ve işaretle (checkpoint)"""
+        rows = (
+            self._rows()
+            .filter(CrawlFrontier.status == 'pending')
+            .order_by(CrawlFrontier.depth, CrawlFrontier.id)
+            .limit(limit)
+            .all()
+        )
+        for row in rows:
+            row.status = 'in_progress'
+            row.attempts = (row.attempts or 0) + 1
+        self.session.commit()
+        return rows
+
+    def _fetch(self, url: str) -> List[Dict]:
+        """Worker thread: sayfayı çek ve alt kategori linklerini çıkar (DB'ye dokunmaz)"""
+        response = self.spider.scraper.get(url, headers=self.spider.headers, timeout=10)
+        if response.status_code != 200:
+            raise RuntimeError(f"HTTP {response.status_code}")
+        soup = BeautifulSoup(response.text, 'html.parser')
+        return self.spider._extract_subcategory_links(soup, url)
+
+    def _complete(self, row: CrawlFrontier, links: List[Dict]):
+        max_children = self.settings.get('max_children')
+        if max_children:
+            links = links[:max_children]
+
+        self._enqueue(links, depth=row.depth + 1, parent=row)
+        row.child_count = len(links)
+        row.status = 'done'
+        row.error = None
+        self.stats['fetched'] += 1
+
+    def _fail(self, row: CrawlFrontier, error: str):
+        retry = (row.attempts or 0) < self.settings['max_attempts']
+        row.status = 'pending' if retry else 'failed'
+        row.error = error[:500]
+        if not retry:
+            self.stats['failed'] += 1
+
+    def _save_completed(self):
+        """Tamamlanan ama henüz kaydedilmemiş kategorileri SiteUrl olarak yaz"""
+        if not self.site_id:
+            return
+
+        rows = self._rows().filter(CrawlFrontier.status == 'done', CrawlFrontier.saved.is_(False)).all()
+        if not rows:
+            return
+
+        self.spider.save_to_database(self.site_id, [self.category_info(row) for row in rows])
+        for row in rows:
+            row.saved = True
+        self.session.commit()
+        self.stats['saved'] += len(rows)
+
+    def category_info(self, row: CrawlFrontier) -> Dict:
+        return {
+            'id': row.category_id,
+            'name': row.name,
+            'url': row.url,
+            'level': row.depth,
+            'path': row.path,
+            'best_sellers_url': self.spider._add_bestseller_param(row.url),
+            'has_children': (row.child_count or 0) > 0,
+            'child_count': row.child_count or 0
+        }
+
+    def run(self) -> Dict:
+        """Frontier boşalana kadar seviye seviye tara"""
+        recovered = self._recover()
+        if recovered:
+            print(f"♻️ Yarım kalan {recovered} URL kuyruğa geri alındı")
+
+        workers = self.settings['workers_per_domain']
+        batch_size = self.settings['batch_size']
+        start = time.time()
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            while True:
+                batch = self._claim(batch_size)
+                if not batch:
+                    break
+
+                futures = {executor.submit(self._fetch, row.url): row for row in batch}
+                for future in as_completed(futures):
+                    row = futures[future]
+                    try:
+                        self._complete(row, future.result())
+                    except Exception as e:
+                        logger.warning(f"Kategori sayfası alınamadı {row.url}: {e}")
+                        self._fail(row, str(e))
+
+                # Checkpoint: batch sonucu ve yeni keşfedilen URL'ler kalıcı
+                self.session.commit()
+                self.seen.save()
+                self._save_completed()
+
+                depth = max(row.depth for row in batch)
+                print(f"   📥 Seviye {depth}: {self.stats['fetched']} sayfa tarandı, "
+                      f"{self.stats['discovered']} kategori bulundu ({time.time() - start:.0f}s)")
+
+        self._save_completed()
+        return self.stats
+
+    def build_tree(self) -> Dict:
+        """Tamamlanan satırlardan kategori ağacını kur"""
+        rows = self._rows().filter(CrawlFrontier.status == 'done').order_by(
+            CrawlFrontier.depth, CrawlFrontier.id
+        ).all()
+
+        nodes = {}
+        tree = {}
+        for row in rows:
+            node = {
+                'id': row.category_id,
+                'name': row.name,
+                'url': row.url,
+                'level': row.depth,
+                'children': {}
+            }
+            nodes[row.url] = node
+
+            parent = nodes.get(row.parent_url)
+            if parent is not None:
+                parent['children'][row.category_id] = node
+            elif row.depth == 0:
+                tree[row.category_id] = node
+
+        return tree
+
+    def close(self):
+        self.session.close()
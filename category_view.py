@@ -9,6 +9,10 @@ import sqlite3
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
+from database import ensure_schema
+
+# product_latest_snapshot gibi yeni tablolar eski veritabanında da olsun
+ensure_schema()
 
 def display_category_view():
     """Kategori görünümünü göster"""
@@ -176,9 +180,10 @@ def display_category_statistics():
             COUNT(DISTINCT p.id) as product_count,
             AVG(p.rating) as avg_rating,
             SUM(p.review_count) as total_reviews,
-            AVG(p.price) as avg_price
+            AVG(COALESCE(s.price, p.price)) as avg_price
         FROM categories c
         JOIN products p ON p.category_id = c.id
+        LEFT JOIN product_latest_snapshot s ON s.product_id = p.id
         WHERE c.parent_id IS NOT NULL
         GROUP BY c.id
         HAVING product_count > 0
@@ -242,11 +247,12 @@ def display_category_statistics():
             SELECT
                 p.name,
                 p.brand,
-                p.price,
+                COALESCE(s.price, p.price) as price,
                 p.rating,
                 p.review_count,
-                p.in_stock
+                COALESCE(s.in_stock, p.in_stock) as in_stock
             FROM products p
+            LEFT JOIN product_latest_snapshot s ON s.product_id = p.id
             WHERE p.category_id = {selected_category}
             ORDER BY p.review_count DESC
         """, conn)
@@ -407,10 +413,11 @@ def display_interactive_tree():
 
         if category_id:
             products = pd.read_sql_query(f"""
-                SELECT id, name, brand, price, rating, review_count
-                FROM products
-                WHERE category_id = {category_id}
-                ORDER BY review_count DESC, rating DESC
+                SELECT p.id, p.name, p.brand, COALESCE(s.price, p.price) as price, p.rating, p.review_count
+                FROM products p
+                LEFT JOIN product_latest_snapshot s ON s.product_id = p.id
+                WHERE p.category_id = {category_id}
+                ORDER BY p.review_count DESC, p.rating DESC
             """, conn)
 
             if not products.empty:
@@ -4,13 +4,14 @@ GERÇEK Trendyol Yorumlarını HEPSİNİ Çeker
 API odaklı, pagination destekli, FALLBACK YOK!
 """
 
-import requests
 import json
 import re
-import time
 from datetime import datetime
 from database import SessionLocal, Product, ProductReview
 from turkish_review_ai import TurkishReviewAI
+from persistence import ReviewUpserter
+from review_fetcher import ConcurrentReviewFetcher
+from http_client import get_http_clients
 
 class ComprehensiveAPIScraper:
     """TÜM GERÇEK Trendyol yorumlarını API'den çeker"""
@@ -18,10 +19,11 @@ class ComprehensiveAPIScraper:
     def __init__(self):
         self.session = SessionLocal()
         self.ai = TurkishReviewAI()
+        self.review_upserter = ReviewUpserter(self.session, analyzer=self.ai)
+        self.review_fetcher = ConcurrentReviewFetcher(page_size=50, max_pages=100)
 
-        # Gerçek browser session taklit et
-        self.http_session = requests.Session()
-        self.http_session.headers.update({
+        # Gerçek browser session taklit et (paylaşılan bağlantı havuzu)
+        self.http_session = get_http_clients().session(headers={
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Accept': 'application/json, text/plain, */*',
             'Accept-Language': 'tr-TR,tr;q=0.9,en;q=0.8',
@@ -67,152 +69,21 @@ class ComprehensiveAPIScraper:
 
         return None
 
-    def get_all_reviews_from_api(self, product_id, trendyol_id):
-        """API'den TÜM yorumları pagination ile çek"""
-        all_reviews = []
-
-        # Farklı API endpoint'leri dene
-        api_endpoints = [
-            f"https://public.trendyol.com/discovery-web-webproductgw-santral/api/review/{trendyol_id}",
-            f"https://public.trendyol.com/discovery-web-productgw-service/api/review/{trendyol_id}",
-            f"https://public.trendyol.com/discovery-web-webproductgw-santral/product-review/{trendyol_id}",
-            f"https://api.trendyol.com/discovery-web-webproductgw-santral/api/review/{trendyol_id}",
-            f"https://public-mdc.trendyol.com/discovery-web-webproductgw-santral/api/review/{trendyol_id}",
-        ]
-
-        for api_base in api_endpoints:
-            print(f"\n🔍 API deneniyor: {api_base}")
-            page = 0
-            total_pages = 1
-            reviews_from_this_api = []
-
-            while page < total_pages and page < 100:  # Max 100 sayfa
-                try:
-                    params = {
-                        'page': page,
-                        'size': 50,  # Sayfa başı max yorum
-                        'sortBy': 'MOST_HELPFUL',  # En faydalıları al
-                        'culture': 'tr-TR'
-                    }
-
-                    # Özel headers ekle
-                    headers = self.http_session.headers.copy()
-                    headers['X-Storefront-ID'] = 'TR'
-                    headers['X-Application-ID'] = 'web'
-
-                    response = self.http_session.get(
-                        api_base,
-                        params=params,
-                        headers=headers,
-                        timeout=10,
-                        verify=True
-                    )
-
-                    if response.status_code == 200:
-                        data = response.json()
-
-                        # Veri yapısını kontrol et
-                        if 'result' in data:
-                            result = data['result']
-
-                            # productReviews içindeki yorumlar
-                            if 'productReviews' in result:
-                                review_data = result['productReviews']
-
-                                # Total page sayısını al
-                                if page == 0 and 'totalPages' in review_data:
-                                    total_pages = review_data['totalPages']
-                                    print(f"✓ Toplam {total_pages} sayfa yorum bulundu")
-
-                                # Content içindeki yorumları al
-                                if 'content' in review_data:
-                                    content = review_data['content']
-                                    if content:
-                                        print(f"  Sayfa {page+1}: {len(content)} yorum")
-
-                                        for r in content:
-                                            if r.get('comment'):
-                                                reviews_from_this_api.append({
-                                                    'reviewer_name': r.get('userFullName', 'Trendyol Müşterisi'),
-                                                    'reviewer_verified': r.get('verifiedPurchase', False),
-                                                    'rating': r.get('rate', 5),
-                                                    'review_text': r.get('comment', ''),
-                                                    'review_date': datetime.now(),
-                                                    'helpful_count': r.get('helpfulCount', 0),
-                                                    'review_title': r.get('title', ''),
-                                                    'seller_name': r.get('sellerName', ''),
-                                                    'size': r.get('size', ''),
-                                                    'color': r.get('color', '')
-                                                })
-
-                            # Direkt reviews array
-                            elif 'reviews' in result:
-                                reviews_array = result['reviews']
-                                if reviews_array:
-                                    print(f"  {len(reviews_array)} yorum bulundu")
-
-                                    for r in reviews_array:
-                                        if r.get('comment'):
-                                            reviews_from_this_api.append({
-                                                'reviewer_name': r.get('userFullName', 'Trendyol Müşterisi'),
-                                                'reviewer_verified': True,
-                                                'rating': r.get('rate', 5),
-                                                'review_text': r.get('comment', ''),
-                                                'review_date': datetime.now(),
-                                                'helpful_count': r.get('helpfulCount', 0)
-                                            })
-                                    break  # Pagination yok, çık
-
-                        # Root level content
-                        elif 'content' in data:
-                            content = data['content']
-                            if content:
-                                print(f"  {len(content)} yorum bulundu")
-
-                                for r in content:
-                                    if r.get('comment'):
-                                        reviews_from_this_api.append({
-                                            'reviewer_name': r.get('userFullName', 'Trendyol Müşterisi'),
-                                            'reviewer_verified': r.get('verifiedPurchase', False),
-                                            'rating': r.get('rate', 5),
-                                            'review_text': r.get('comment', ''),
-                                            'review_date': datetime.now(),
-                                            'helpful_count': r.get('helpfulCount', 0)
-                                        })
-
-                    elif response.status_code == 404:
-                        print(f"  ✗ 404 - API bulunamadı")
-                        break
-                    elif response.status_code == 403:
-                        print(f"  ✗ 403 - Erişim engellendi")
-                        break
-                    else:
-                        print(f"  ✗ HTTP {response.status_code}")
-                        break
-
-                except requests.exceptions.Timeout:
-                    print(f"  ✗ Timeout")
-                    break
-                except requests.exceptions.ConnectionError:
-                    print(f"  ✗ Bağlantı hatası")
-                    break
-                except Exception as e:
-                    print(f"  ✗ Hata: {e}")
-                    break
-
-                # Sonraki sayfaya geç
-                page += 1
-
-                # Rate limiting
-                if page < total_pages:
-                    time.sleep(0.5)  # Sayfalar arası bekle
-
-            # Bu API'den yorum alındıysa, diğerlerini deneme
-            if reviews_from_this_api:
-                all_reviews.extend(reviews_from_this_api)
-                print(f"\n✅ Bu API'den toplam {len(reviews_from_this_api)} yorum alındı")
-                break  # Başarılı API bulundu, çık
-
+    def get_all_reviews_from_api(self, product_id, trendyol_id, on_page=None):
+        """
+        API'den TÜM yorumları pagination ile çek.
+
+        Sayfa 0'dan toplam sayfa sayısı öğrenilir, kalan sayfalar eşzamanlı
+        çekilir. on_page verilirse her sayfa geldiği anda ona aktarılır ve
+        toplam yorum sayısı döner; verilmezse yorum listesi döner.
+        """
+        if on_page:
+            total = self.review_fetcher.fetch_sync(trendyol_id, on_page)
+            print(f"\n✅ API'den toplam {total} yorum alındı")
+            return total
+
+        all_reviews = self.review_fetcher.fetch_all(trendyol_id)
+        print(f"\n✅ API'den toplam {len(all_reviews)} yorum alındı")
         return all_reviews
 
     def get_reviews_from_page(self, url):
@@ -286,10 +157,6 @@ class ComprehensiveAPIScraper:
         print(f"📦 Ürün: {product.name[:50]}...")
         print(f"🔗 URL: {product.product_url or product.url}")
 
-        # Mevcut yorumları temizle
-        self.session.query(ProductReview).filter_by(product_id=product_id).delete()
-        self.session.commit()
-
         # Trendyol product ID'yi çıkar
         trendyol_id = self.extract_product_id(product.product_url or product.url)
 
@@ -299,61 +166,45 @@ class ComprehensiveAPIScraper:
 
         print(f"🆔 Trendyol Product ID: {trendyol_id}")
 
-        all_reviews = []
+        totals = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+
+        def save_page(reviews):
+            """Gelen sayfayı hemen veritabanına yaz"""
+            stats = self.review_upserter.upsert(product_id, reviews)
+            for key in totals:
+                totals[key] += stats[key]
 
         # 1. Önce sayfadan yorumları al
         print("\n📋 AŞAMA 1: Sayfa HTML'inden yorumlar alınıyor...")
         page_reviews = self.get_reviews_from_page(product.product_url or product.url)
         if page_reviews:
-            all_reviews.extend(page_reviews)
+            save_page(page_reviews)
             print(f"✓ Sayfadan {len(page_reviews)} yorum alındı")
 
-        # 2. API'den TÜM yorumları al (pagination ile)
+        # 2. API'den TÜM yorumları al (sayfalar geldikçe kaydedilir)
         print("\n📋 AŞAMA 2: API'den TÜM yorumlar alınıyor...")
-        api_reviews = self.get_all_reviews_from_api(product_id, trendyol_id)
-
-        # Duplike kontrol (review_text bazında)
-        existing_texts = {r['review_text'] for r in all_reviews}
-        for review in api_reviews:
-            if review['review_text'] not in existing_texts:
-                all_reviews.append(review)
-                existing_texts.add(review['review_text'])
-
-        if api_reviews:
-            print(f"✓ API'den {len(api_reviews)} yorum alındı")
-
-        # SONUÇLARI KAYDET
-        if all_reviews:
-            print(f"\n💾 TOPLAM {len(all_reviews)} GERÇEK YORUM kaydediliyor...")
-
-            for review_data in all_reviews:
-                # AI analizi
-                analysis = self.ai.analyze_review(review_data['review_text'])
-
-                review = ProductReview(
-                    product_id=product_id,
-                    reviewer_name=review_data['reviewer_name'],
-                    reviewer_verified=review_data['reviewer_verified'],
-                    rating=review_data['rating'],
-                    review_title=review_data.get('review_title', ''),
-                    review_text=review_data['review_text'],
-                    review_date=review_data['review_date'],
-                    helpful_count=review_data['helpful_count'],
-                    sentiment_score=analysis['sentiment_score'],
-                    key_phrases=analysis['key_phrases'],
-                    purchase_reasons=analysis['purchase_reasons'],
-                    pros=analysis['pros'],
-                    cons=analysis['cons']
-                )
-                self.session.add(review)
+        self.get_all_reviews_from_api(product_id, trendyol_id, on_page=save_page)
 
-            self.session.commit()
+        # SONUÇLAR
+        if totals['inserted'] or totals['updated'] or totals['unchanged']:
+            print(f"\n💾 {totals['inserted']} yeni, {totals['updated']} güncellenen, "
+                  f"{totals['unchanged']} değişmeyen yorum")
 
             # Detaylı analiz göster
-            self._show_detailed_analysis(product.name, all_reviews)
+            stored = self.session.query(ProductReview).filter_by(product_id=product_id).all()
+            self._show_detailed_analysis(product.name, [
+                {
+                    'reviewer_name': r.reviewer_name,
+                    'reviewer_verified': r.reviewer_verified,
+                    'rating': r.rating,
+                    'review_text': r.review_text,
+                    'helpful_count': r.helpful_count
+                }
+                for r in stored
+            ])
 
             print("\n" + "="*60)
-            print(f"✅ {len(all_reviews)} GERÇEK YORUM KAYDEDİLDİ!")
+            print(f"✅ {len(stored)} GERÇEK YORUM KAYITLI!")
             print("✅ TÜM YORUMLAR BAŞARIYLA ALINDI!")
             print("="*60)
             return True
@@ -146,6 +146,17 @@ PRODUCT_CATEGORIES = {
 DATABASE = {
     "type": "sqlite",  # "postgresql" olarak değiştirilebilir
     "sqlite_path": "market_spider.db",
+    # Her bağlantıda uygulanan PRAGMA'lar (boş dict: SQLite varsayılanları).
+    # WAL ile dashboard okumaları scraper yazmalarını beklemez; değerler
+    # benchmark_sqlite.py ile ölçülmüştür.
+    "sqlite_pragmas": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",  # WAL'da güvenli; her commit'te fsync yok
+        "mmap_size": 268435456,  # 256 MB bellek eşlemeli okuma
+        "cache_size": -65536,  # Negatif: KiB cinsinden (64 MB sayfa önbelleği)
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,  # Kilitli DB'de hata vermeden önce bekleme (ms)
+    },
     "postgresql": {
         "host": "localhost",
         "port": 5432,
@@ -155,22 +166,161 @@ DATABASE = {
     }
 }
 
+# Tek yazıcı (db_writer) ayarları: tüm yazmalar tek thread ve tek bağlantıdan
+DB_WRITER = {
+    "queue_size": 200,  # Bekleyen yazma işi sınırı (dolunca üreticiler bekler)
+    "group_size": 50,  # Tek transaction'da commit edilen en fazla iş
+    "group_wait_ms": 20,  # İlk işten sonra gruba yeni iş eklenmesi için bekleme
+}
+
+# Fiyat / sıralama geçmişi saklama
+HISTORY = {
+    # on_change: sadece takip edilen alanlardan biri değişince yeni satır yazılır,
+    # değişmediyse son satırın last_seen_at'i uzatılır. append: her scrape'te satır.
+    "mode": "on_change",
+    # Alanlar hem geçmiş tablosunda hem product_latest_snapshot'ta bulunmalı
+    "price_fields": ["price", "original_price", "in_stock"],
+    # total_reviews / average_rating / sales_count da takip edilir: review_scheduler
+    # yorum artışını ranking_history'den okur
+    "ranking_fields": ["rank_position", "list_type", "total_reviews", "average_rating", "sales_count"],
+}
+
 # Scraping Ayarları
 SCRAPING = {
     "max_workers": 5,  # Paralel worker sayısı
     "retry_attempts": 3,
     "timeout": 30,  # saniye
+    "db_batch_size": 500,  # Toplu kayıtta batch başına ürün sayısı
+    "queue_size": 20,  # Fetch -> DB yazıcı kuyruğunun kapasitesi (sayfa)
+    "parse_processes": 0,  # HTML parse için process sayısı (0: thread içinde parse)
+    "review_concurrency_per_host": 8,  # Yorum sayfaları için host başına eşzamanlı istek
+    "html_parser": "auto",  # auto | selectolax | lxml | bs4 (auto: kurulu en hızlısı)
+    "http_pool_connections": 20,  # Havuzda tutulan host sayısı
+    "http_pool_maxsize": 20,  # Host başına açık tutulan bağlantı
+    "http_keepalive_expiry": 30,  # Boştaki bağlantının kapanma süresi (saniye)
+    "http2": True,  # httpx istemcilerinde HTTP/2 çoklama
     "use_selenium": False,  # JavaScript render gereken siteler için
     "selenium_headless": True,
     "proxy": None  # Proxy kullanmak için: "http://proxy:port"
 }
 
+# Host bazlı kendini ayarlayan (AIMD) hız sınırı
+# rate_limit değerleri başlangıç tahminidir; gerçek hız yanıtlara göre ayarlanır
+RATE_LIMITER = {
+    "adaptive": True,
+    "min_interval": 0.05,  # En yüksek hız: 20 istek/sn
+    "max_interval": 30.0,  # En düşük hız: 30 saniyede 1 istek
+    "additive_rate": 0.2,  # Sağlıklı her turda hız artışı (istek/sn)
+    "backoff_factor": 0.5,  # 429/503, 5xx, zaman aşımı veya yavaş yanıtta çarpan
+    "decrease_cooldown": 1.0,  # Art arda gelen hatalar bu süre içinde tek düşüş sayılır
+    "slow_response_seconds": 5.0,  # Bundan yavaş yanıt geri çekilme sebebi
+    "max_retry_after": 300,  # Retry-After en fazla bu kadar saniye uygulanır
+    "initial_concurrency": 2,  # Host başına başlangıç eşzamanlı istek
+    "max_concurrency": 16,
+    # ECOMMERCE_SITES dışında kalan hostlar için başlangıç aralığı (saniye)
+    "hosts": {
+        "public.trendyol.com": 0.2,
+        "public-mdc.trendyol.com": 0.2,
+        "api.trendyol.com": 0.2
+    }
+}
+
+# Kalıcı frontier'lı BFS kategori taraması
+CATEGORY_CRAWLER = {
+    "max_depth": 5,  # Ana kategori 0; bu seviyedekiler yaprak kabul edilir
+    "workers_per_domain": 4,  # Domain başına eşzamanlı sayfa (host limiti ayrıca geçerli)
+    "batch_size": 50,  # Her checkpoint'te işlenen URL sayısı
+    "max_children": None,  # Düğüm başına alt kategori sınırı (None: sınırsız)
+    "max_attempts": 3  # Hata veren URL bu kadar denemeden sonra 'failed'
+}
+
+# URL kanonikleştirme ve Bloom filtreli "görüldü" kümesi
+URL_DEDUP = {
+    "directory": "crawl_state",  # Kalıcı Bloom dosyaları (<ad>.bloom)
+    "initial_capacity": 100000,  # İlk katman kapasitesi; dolunca 2 katı eklenir
+    "error_rate": 0.001,  # Yeni URL'in yanlışlıkla "görüldü" sayılma olasılığı
+    # Allow-list'i olmayan sitelerde atılan takip parametreleri
+    "tracking_params": ["gclid", "fbclid", "yclid", "msclkid", "ref", "referrer", "_ga", "mc_cid", "mc_eid"],
+    "tracking_prefixes": ["utm_"],
+    # Site bazlı kurallar: sadece 'allow' içindeki query parametreleri kalır
+    "sites": {
+        "trendyol.com": {"allow": ["wc", "wb", "wg", "sst", "pi", "q", "qt", "st"], "lowercase_path": True},
+        "hepsiburada.com": {"allow": ["siralama", "sayfa", "q", "filtreler"], "lowercase_path": True},
+        "n11.com": {"allow": ["srt", "pg", "q"], "lowercase_path": True}
+    }
+}
+
+# Keşif spider'ları için diskte HTTP yanıt önbelleği
+HTTP_CACHE = {
+    "enabled": True,
+    "directory": "http_cache",
+    "max_size_mb": 512,  # Aşılınca en eski erişilen yanıtlar silinir
+    "default_ttl": 6 * 3600,  # Kurala uymayan URL'ler (saniye)
+    "offline": False,  # True: ağa çıkma, sadece kayıtlı yanıtları oynat
+    # (regex, ttl saniye) - ilk eşleşen geçerli, 0 cache'lenmez
+    "ttl_rules": [
+        (r"/api/|public(-mdc)?\.trendyol\.com|/reviews?\b|yorumlar", 0),
+        (r"sst=BEST_SELLER|bestsellers|cok-satan|en-cok-satan", 30 * 60),
+        (r"sitemap", 24 * 3600),
+        (r"^https?://(www\.)?[^/]+/?$", 24 * 3600),  # Ana sayfa / navigasyon
+        (r"-x-c\d+|-c-\d+|/butik/|/kategori|/magaza/", 3 * 24 * 3600),  # Kategori sayfaları
+    ]
+}
+
+# JavaScript render için sıcak Chrome havuzu
+SELENIUM_POOL = {
+    "size": 2,  # Aynı anda açık tutulan tarayıcı sayısı (ayar başına havuz)
+    "max_browsers": 4,  # Tüm havuzlar toplamında process başına açık Chrome sınırı
+    "max_pages_per_driver": 50,  # Bu kadar sayfadan sonra tarayıcı yenilenir
+    "max_memory_mb": 1024,  # Chrome process ağacı bu RSS'i aşarsa yenilenir
+    "headless": True,
+    "block_resources": ["image", "font", "stylesheet", "media"],  # CDP ile engellenir
+    "page_load_strategy": "eager",  # DOM hazır olunca dön (alt kaynakları bekleme)
+    "page_load_timeout": 30,
+    "wait_timeout": 10,
+    "render_wait": 2.0,  # JavaScript render için ek bekleme (saniye)
+    "acquire_timeout": 120
+}
+
 # Scheduler Ayarları
 SCHEDULER = {
     "enabled": True,
-    "interval_hours": 6,  # Her 6 saatte bir çalıştır
+    "interval_hours": 6,  # SiteUrl kaydı yoksa: her 6 saatte bir tüm siteler
     "start_time": "09:00",  # Günlük başlangıç saati
-    "end_time": "23:00"  # Günlük bitiş saati
+    "end_time": "23:00",  # Günlük bitiş saati
+    "tick_minutes": 5,  # Vadesi gelen SiteUrl işleri bu aralıkla kontrol edilir
+    "workers": 4,  # Aynı anda çalışan iş sayısı
+    "max_jobs_per_tick": 50,
+    # SiteUrl.priority -> yenileme aralığı (dakika); 1 en sıcak
+    "refresh_minutes": {1: 60, 2: 6 * 60, 3: 24 * 60},
+    "default_refresh_minutes": 24 * 60,  # Tabloda olmayan öncelikler
+    # Hata veren / boş dönen URL: failure_backoff_minutes * 2^(hata-1) sonra tekrar denenir
+    "failure_backoff_minutes": 15,
+    "max_failure_backoff_minutes": 24 * 60
+}
+
+# Process'ler arası iş kuyruğu (scrape_jobs tablosu)
+JOB_QUEUE = {
+    "lease_seconds": 120,  # Yenilenmeyen kira bu süre sonunda düşer, iş başkasına geçer
+    "heartbeat_seconds": 30,  # Çalışan işlerin kirası bu aralıkla yenilenir
+    "poll_seconds": 2.0,  # Kuyruk boşken bekleme
+    "claim_batch": 1,  # Worker'ın tek seferde aldığı iş sayısı
+    "max_attempts": 3,
+    "retry_delay_seconds": 60  # Hata veren iş bu kadar sonra tekrar alınabilir
+}
+
+# Yorum yenileme önceliklendirmesi
+REVIEW_SCHEDULER = {
+    "top_k": 20,  # Her turda yenilenecek ürün sayısı
+    "workers": 4,  # Paralel yorum çekici sayısı
+    "rank_window_hours": 24,  # Sıralama hareketinin ölçüldüğü pencere
+    "min_refresh_minutes": 60,  # Bir ürün en erken bu kadar sonra tekrar çekilir
+    "max_staleness_hours": 168,  # Hiç çekilmemiş ürünler için varsayılan bekleme
+    "weights": {
+        "rank_churn": 1.0,  # Pencere içindeki sıra değişimi (pozisyon)
+        "review_delta": 0.5,  # Son çekimden beri sitedeki yorum artışı
+        "staleness": 0.1  # Son çekimden beri geçen saat
+    }
 }
 
 # Dashboard Ayarları
@@ -178,7 +328,8 @@ DASHBOARD = {
     "host": "0.0.0.0",
     "port": 8501,  # Streamlit port
     "api_port": 8000,  # FastAPI port
-    "refresh_interval": 60  # saniye
+    "refresh_interval": 60,  # saniye
+    "query_budget_ms": 200  # En çok satanlar sekmesinin veri sorgusu süre bütçesi
 }
 
 # Logging
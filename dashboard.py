@@ -13,7 +13,8 @@ import sys
 import os
 
 # Database imports
-from database import get_engine, Product, PriceHistory, RankingHistory, ScrapeLog
+from database import get_engine, Product, PriceHistory, RankingHistory, ProductLatestSnapshot, ScrapeLog
+from history import price_series, seen_since
 from config import DASHBOARD
 
 # Sayfa ayarları
@@ -51,8 +52,9 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Database bağlantısı
-from database import SessionLocal
+# Database bağlantısı (eski veritabanlarında eksik tablo/kolonları tamamla)
+from database import SessionLocal, ensure_schema
+ensure_schema()
 
 @st.cache_resource
 def get_db_session():
@@ -68,13 +70,15 @@ def load_products():
 @st.cache_data(ttl=300)
 def load_price_history(product_id=None, days=30):
     session = get_db_session()
-    query = session.query(PriceHistory)
+    since_date = datetime.now() - timedelta(days=days)
 
     if product_id:
-        query = query.filter(PriceHistory.product_id == product_id)
+        # Değişimde yazılan geçmişten basamak serisi (aralığın başındaki değer dahil)
+        return pd.DataFrame(price_series(session, product_id, since=since_date))
 
-    since_date = datetime.now() - timedelta(days=days)
-    query = query.filter(PriceHistory.timestamp >= since_date)
+    # Değişmeyen fiyatın satırı eskidir: aralığa last_seen_at ile uzanan satırlar da dahil
+    query = session.query(PriceHistory)
+    query = query.filter(seen_since(PriceHistory, since_date))
 
     prices = query.all()
     return pd.DataFrame([p.to_dict() for p in prices])
@@ -84,10 +88,25 @@ def load_rankings(days=7):
     session = get_db_session()
     since_date = datetime.now() - timedelta(days=days)
     rankings = session.query(RankingHistory).filter(
-        RankingHistory.timestamp >= since_date
+        seen_since(RankingHistory, since_date)
     ).all()
     return pd.DataFrame([r.to_dict() for r in rankings])
 
+@st.cache_data(ttl=300)
+def load_latest_snapshots(product_ids=None, limit=None):
+    """Ürünlerin son fiyat/sıra durumu (geçmiş tablolarını taramadan)"""
+    session = get_db_session()
+    query = session.query(ProductLatestSnapshot)
+
+    if product_ids is not None:
+        query = query.filter(ProductLatestSnapshot.product_id.in_(list(product_ids)))
+
+    query = query.order_by(ProductLatestSnapshot.price_updated_at.desc())
+    if limit:
+        query = query.limit(limit)
+
+    return pd.DataFrame([s.to_dict() for s in query.all()])
+
 @st.cache_data(ttl=300)
 def get_statistics():
     session = get_db_session()
@@ -96,8 +115,8 @@ def get_statistics():
         'total_products': session.query(Product).count(),
         'total_sites': session.query(Product.site_name).distinct().count(),
         'total_prices': session.query(PriceHistory).count(),
-        'last_24h_updates': session.query(PriceHistory).filter(
-            PriceHistory.timestamp >= datetime.now() - timedelta(days=1)
+        'last_24h_updates': session.query(ProductLatestSnapshot).filter(
+            ProductLatestSnapshot.price_updated_at >= datetime.now() - timedelta(days=1)
         ).count()
     }
 
@@ -324,12 +343,10 @@ def show_overview_page():
     # Son Güncellenen Ürünler
     st.subheader("🔄 Son Güncellenen Ürünler")
 
-    price_history_df = load_price_history(days=1)
-    if not price_history_df.empty:
-        # timestamp'i datetime'a çevir
-        price_history_df['timestamp'] = pd.to_datetime(price_history_df['timestamp'])
-        # Son 10 güncelleme
-        recent_prices = price_history_df.nlargest(10, 'timestamp')
+    # Son 10 güncelleme
+    recent_prices = load_latest_snapshots(limit=10)
+    if not recent_prices.empty:
+        recent_prices['timestamp'] = pd.to_datetime(recent_prices['price_updated_at'])
 
         # Product bilgilerini ekle
         products_df = load_products()
@@ -410,7 +427,7 @@ def show_price_tracking_page():
             y=price_history['price'],
             mode='lines+markers',
             name='Fiyat',
-            line=dict(color='#667eea', width=2)
+            line=dict(color='#667eea', width=2, shape='hv')
         ))
 
         if 'original_price' in price_history.columns:
@@ -419,7 +436,7 @@ def show_price_tracking_page():
                 y=price_history['original_price'],
                 mode='lines',
                 name='Liste Fiyatı',
-                line=dict(color='#ff4444', width=1, dash='dash')
+                line=dict(color='#ff4444', width=1, dash='dash', shape='hv')
             ))
 
         fig.update_layout(
@@ -454,7 +471,10 @@ def show_price_tracking_page():
 
         with col4:
             current_price = price_history.iloc[-1]['price']
-            prev_price = price_history.iloc[-2]['price'] if len(price_history) > 1 else current_price
+            # Seri son görülme noktasıyla biter; önceki fiyat bir önceki değişimdir
+            prices = price_history['price']
+            changes = prices[prices != prices.shift()]
+            prev_price = changes.iloc[-2] if len(changes) > 1 else current_price
             change = ((current_price - prev_price) / prev_price * 100) if prev_price > 0 else 0
 
             st.metric(
@@ -489,6 +509,10 @@ def show_product_search_page():
 
         st.write(f"**{len(results)} sonuç bulundu**")
 
+        # Sonuçların son fiyatları tek sorguda
+        snapshots = load_latest_snapshots(tuple(int(i) for i in results['id']))
+        last_prices = snapshots.set_index('product_id') if not snapshots.empty else snapshots
+
         # Sonuçları göster
         for _, product in results.iterrows():
             col1, col2, col3 = st.columns([1, 3, 2])
@@ -504,9 +528,8 @@ def show_product_search_page():
 
             with col3:
                 # Son fiyatı al
-                price_history = load_price_history(product['id'], 1)
-                if not price_history.empty:
-                    last_price = price_history.iloc[-1]
+                if product['id'] in last_prices.index:
+                    last_price = last_prices.loc[product['id']]
                     st.write(f"💰 **{last_price['price']:.2f} TL**")
 
                     if last_price.get('discount_percentage'):
@@ -2,10 +2,14 @@
 Database Models ve ORM Yapısı
 """
 
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Boolean, Text, Index, ForeignKey, JSON, UniqueConstraint
+from sqlalchemy import create_engine, event, Column, Integer, String, Float, DateTime, Boolean, Text, Index, ForeignKey, JSON, UniqueConstraint, inspect, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
+from contextlib import contextmanager
+import atexit
+import threading
 from datetime import datetime
+import hashlib
 import json
 from config import DATABASE
 
@@ -81,6 +85,9 @@ class SiteUrl(Base):
     last_scraped = Column(DateTime)
     last_product_count = Column(Integer, default=0)
     total_scrape_count = Column(Integer, default=0)
+    failure_count = Column(Integer, default=0)  # Son başarılı çekimden beri art arda hata
+    last_failed_at = Column(DateTime)
+    last_error = Column(Text)
 
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -173,7 +180,8 @@ class PriceHistory(Base):
     in_stock = Column(Boolean, default=True)
     seller_name = Column(String(200))
     seller_rating = Column(Float)
-    timestamp = Column(DateTime, default=datetime.utcnow, index=True)
+    timestamp = Column(DateTime, default=datetime.utcnow, index=True)  # Bu değerin ilk görüldüğü an
+    last_seen_at = Column(DateTime)  # Değer değişmeden en son görüldüğü an (on_change modu)
 
     # İlişki
     product = relationship("Product", back_populates="prices")
@@ -194,7 +202,8 @@ class PriceHistory(Base):
             'in_stock': self.in_stock,
             'seller_name': self.seller_name,
             'seller_rating': self.seller_rating,
-            'timestamp': self.timestamp.isoformat() if self.timestamp else None
+            'timestamp': self.timestamp.isoformat() if self.timestamp else None,
+            'last_seen_at': self.last_seen_at.isoformat() if self.last_seen_at else None
         }
 
 
@@ -209,7 +218,8 @@ class RankingHistory(Base):
     average_rating = Column(Float)
     sales_count = Column(Integer)  # Eğer site bu bilgiyi veriyorsa
     list_type = Column(String(50))  # "best_sellers", "most_viewed", "trending" vs
-    timestamp = Column(DateTime, default=datetime.utcnow, index=True)
+    timestamp = Column(DateTime, default=datetime.utcnow, index=True)  # Bu değerin ilk görüldüğü an
+    last_seen_at = Column(DateTime)  # Değer değişmeden en son görüldüğü an (on_change modu)
 
     # İlişki
     product = relationship("Product", back_populates="rankings")
@@ -230,7 +240,53 @@ class RankingHistory(Base):
             'average_rating': self.average_rating,
             'sales_count': self.sales_count,
             'list_type': self.list_type,
-            'timestamp': self.timestamp.isoformat() if self.timestamp else None
+            'timestamp': self.timestamp.isoformat() if self.timestamp else None,
+            'last_seen_at': self.last_seen_at.isoformat() if self.last_seen_at else None
+        }
+
+
+class ProductLatestSnapshot(Base):
+    """Ürünün son fiyat/sıra durumu (ürün başına bir satır, yazma anında güncellenir)"""
+    __tablename__ = 'product_latest_snapshot'
+
+    product_id = Column(Integer, ForeignKey('products.id', ondelete='CASCADE'), primary_key=True)
+
+    # Son fiyat kaydı
+    price = Column(Float)
+    original_price = Column(Float)
+    discount_percentage = Column(Float)
+    in_stock = Column(Boolean)
+    price_updated_at = Column(DateTime)
+
+    # Son sıralama kaydı
+    rank_position = Column(Integer)
+    list_type = Column(String(50))
+    total_reviews = Column(Integer)
+    average_rating = Column(Float)
+    sales_count = Column(Integer)
+    rank_updated_at = Column(DateTime)
+
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        Index('idx_snapshot_price_updated', 'price_updated_at'),
+        Index('idx_snapshot_rank', 'rank_position'),
+    )
+
+    def to_dict(self):
+        return {
+            'product_id': self.product_id,
+            'price': self.price,
+            'original_price': self.original_price,
+            'discount_percentage': self.discount_percentage,
+            'in_stock': self.in_stock,
+            'price_updated_at': self.price_updated_at.isoformat() if self.price_updated_at else None,
+            'rank_position': self.rank_position,
+            'list_type': self.list_type,
+            'total_reviews': self.total_reviews,
+            'average_rating': self.average_rating,
+            'sales_count': self.sales_count,
+            'rank_updated_at': self.rank_updated_at.isoformat() if self.rank_updated_at else None
         }
 
 
@@ -247,6 +303,7 @@ class ProductReview(Base):
     review_text = Column(Text)
     review_date = Column(DateTime)
     helpful_count = Column(Integer, default=0)  # Faydalı bulma sayısı
+    review_hash = Column(String(32))  # Yorum içeriğinin parmak izi (md5)
 
     # Yorum analizi sonuçları
     sentiment_score = Column(Float)  # -1 (negatif) ile 1 (pozitif) arası
@@ -266,8 +323,14 @@ class ProductReview(Base):
     __table_args__ = (
         Index('idx_review_product', 'product_id', 'review_date'),
         Index('idx_review_sentiment', 'sentiment_score'),
+        Index('uq_review_product_hash', 'product_id', 'review_hash', unique=True),
     )
 
+    @staticmethod
+    def fingerprint(review_text: str) -> str:
+        """Yorum metninin parmak izi (ürün bazında tekillik için)"""
+        return hashlib.md5((review_text or '').encode()).hexdigest()
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -287,6 +350,127 @@ class ProductReview(Base):
         }
 
 
+class ReviewRefreshState(Base):
+    """Yorum yenileme önceliği ve son çekim bilgisi (ürün başına bir satır)"""
+    __tablename__ = 'review_refresh_state'
+
+    id = Column(Integer, primary_key=True)
+    product_id = Column(Integer, ForeignKey('products.id', ondelete='CASCADE'), unique=True, nullable=False)
+    priority = Column(Float, default=0)  # Son hesaplanan öncelik skoru
+    last_fetched_at = Column(DateTime)
+    last_review_count = Column(Integer, default=0)  # Son çekimdeki sitedeki yorum sayısı
+    last_new_reviews = Column(Integer, default=0)  # Son çekimde eklenen yeni yorum
+    fetch_count = Column(Integer, default=0)
+    failure_count = Column(Integer, default=0)  # Son başarılı çekimden beri art arda hata
+    last_failed_at = Column(DateTime)
+    last_error = Column(Text)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        Index('idx_refresh_priority', 'priority'),
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'product_id': self.product_id,
+            'priority': self.priority,
+            'last_fetched_at': self.last_fetched_at.isoformat() if self.last_fetched_at else None,
+            'last_review_count': self.last_review_count,
+            'last_new_reviews': self.last_new_reviews,
+            'fetch_count': self.fetch_count,
+            'failure_count': self.failure_count,
+            'last_failed_at': self.last_failed_at.isoformat() if self.last_failed_at else None,
+            'last_error': self.last_error
+        }
+
+
+class CrawlFrontier(Base):
+    """BFS kategori taramasının kalıcı sınırı (frontier); kesilen tarama kaldığı yerden sürer"""
+    __tablename__ = 'crawl_frontier'
+
+    id = Column(Integer, primary_key=True)
+    crawl_key = Column(String(200), nullable=False)  # Genelde domain
+    url = Column(String(1000), nullable=False)
+    depth = Column(Integer, nullable=False, default=0)
+    parent_url = Column(String(1000))
+    category_id = Column(String(100))
+    name = Column(String(200))
+    path = Column(Text)  # "Elektronik/Telefon/Cep Telefonu"
+    status = Column(String(20), default='pending')  # 'pending', 'in_progress', 'done', 'failed'
+    attempts = Column(Integer, default=0)
+    child_count = Column(Integer, default=0)
+    saved = Column(Boolean, default=False)  # SiteUrl olarak kaydedildi mi
+    error = Column(Text)
+    discovered_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint('crawl_key', 'url', name='uq_frontier_url'),
+        Index('idx_frontier_status', 'crawl_key', 'status', 'depth'),
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'crawl_key': self.crawl_key,
+            'url': self.url,
+            'depth': self.depth,
+            'parent_url': self.parent_url,
+            'category_id': self.category_id,
+            'name': self.name,
+            'path': self.path,
+            'status': self.status,
+            'attempts': self.attempts,
+            'child_count': self.child_count
+        }
+
+
+class ScrapeJob(Base):
+    """Process'ler arası paylaşılan iş kuyruğu; işler süreli kira (lease) ile alınır"""
+    __tablename__ = 'scrape_jobs'
+
+    id = Column(Integer, primary_key=True)
+    job_type = Column(String(50), nullable=False)  # 'site_url', 'category_page', 'review_pages'
+    job_key = Column(String(500), nullable=False, unique=True)  # Aynı işin tekrar eklenmesini önler
+    payload = Column(JSON, default={})
+    priority = Column(Integer, default=1)  # Küçük olan önce
+    status = Column(String(20), default='pending')  # 'pending', 'leased', 'done', 'failed'
+    attempts = Column(Integer, default=0)
+    max_attempts = Column(Integer, default=3)
+
+    # Kira: sahibi, kimliği ve bitişi; süresi dolan iş tekrar alınabilir
+    lease_owner = Column(String(100))
+    lease_token = Column(String(32))
+    lease_expires_at = Column(DateTime)
+    heartbeat_at = Column(DateTime)
+
+    result = Column(JSON)
+    error = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    finished_at = Column(DateTime)
+
+    __table_args__ = (
+        Index('idx_scrape_job_claim', 'status', 'priority', 'id'),
+        Index('idx_scrape_job_lease', 'status', 'lease_expires_at'),
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'job_type': self.job_type,
+            'job_key': self.job_key,
+            'payload': self.payload,
+            'priority': self.priority,
+            'status': self.status,
+            'attempts': self.attempts,
+            'lease_owner': self.lease_owner,
+            'lease_expires_at': self.lease_expires_at.isoformat() if self.lease_expires_at else None,
+            'error': self.error
+        }
+
+
 class ScrapeLog(Base):
     __tablename__ = 'scrape_logs'
 
@@ -342,10 +526,32 @@ class Alert(Base):
 
 
 # Database bağlantısı kurma
+def apply_sqlite_pragmas(engine, pragmas: dict):
+    """Engine'in açtığı her yeni bağlantıda PRAGMA'ları çalıştır"""
+    if not pragmas:
+        return engine
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+    return engine
+
+
+def create_sqlite_engine(path: str, pragmas: dict = None):
+    """SQLite engine'i; pragmas verilmezse config.DATABASE['sqlite_pragmas'] kullanılır"""
+    engine = create_engine(f"sqlite:///{path}", connect_args={'check_same_thread': False})
+    return apply_sqlite_pragmas(engine, DATABASE.get('sqlite_pragmas') if pragmas is None else pragmas)
+
+
 def get_engine():
     if DATABASE['type'] == 'sqlite':
-        return create_engine(f"sqlite:///{DATABASE['sqlite_path']}",
-                           connect_args={'check_same_thread': False})
+        return create_sqlite_engine(DATABASE['sqlite_path'])
     elif DATABASE['type'] == 'postgresql':
         pg = DATABASE['postgresql']
         return create_engine(
@@ -359,13 +565,145 @@ def get_engine():
 
 # Session oluşturma
 engine = get_engine()
+if DATABASE['type'] == 'sqlite':
+    # Son bağlantı kapanınca WAL ana dosyaya işlenir (CI'da commit edilen .db tam kalsın)
+    atexit.register(engine.dispose)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+def _add_missing_columns(conn, table_name: str, columns: dict):
+    """Var olan tabloya eksik kolonları ekle (create_all mevcut tabloları değiştirmez)"""
+    existing = {c['name'] for c in inspect(conn).get_columns(table_name)}
+    added = []
+    for name, ddl in columns.items():
+        if name not in existing:
+            conn.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {name} {ddl}"))
+            added.append(name)
+    return added
+
+
+def _backfill_review_hashes(conn):
+    """Eski yorumlara parmak izi yaz; ürün içindeki tekrarlar NULL kalır"""
+    rows = conn.execute(text(
+        "SELECT id, product_id, review_text FROM product_reviews "
+        "WHERE review_hash IS NULL ORDER BY id"
+    )).fetchall()
+    seen = {
+        (product_id, review_hash) for product_id, review_hash in conn.execute(text(
+            "SELECT product_id, review_hash FROM product_reviews WHERE review_hash IS NOT NULL"
+        ))
+    }
+
+    updates = []
+    for review_id, product_id, review_text in rows:
+        key = (product_id, ProductReview.fingerprint(review_text))
+        if key in seen:
+            continue
+        seen.add(key)
+        updates.append({'id': review_id, 'review_hash': key[1]})
+
+    if updates:
+        conn.execute(text("UPDATE product_reviews SET review_hash = :review_hash WHERE id = :id"), updates)
+    return len(updates)
+
+
+def backfill_latest_snapshots(conn) -> int:
+    """product_latest_snapshot tablosunu geçmiş tablolarından yeniden kur"""
+    conn.execute(text("DELETE FROM product_latest_snapshot"))
+    result = conn.execute(text("""
+        INSERT INTO product_latest_snapshot (
+            product_id, price, original_price, discount_percentage, in_stock, price_updated_at,
+            rank_position, list_type, total_reviews, average_rating, sales_count, rank_updated_at, updated_at
+        )
+        SELECT
+            p.id, ph.price, ph.original_price, ph.discount_percentage, ph.in_stock, ph.seen_at,
+            rh.rank_position, rh.list_type, rh.total_reviews, rh.average_rating, rh.sales_count, rh.seen_at,
+            CURRENT_TIMESTAMP
+        FROM products p
+        LEFT JOIN (
+            SELECT product_id, price, original_price, discount_percentage, in_stock,
+                   COALESCE(last_seen_at, timestamp) AS seen_at,
+                   ROW_NUMBER() OVER (PARTITION BY product_id ORDER BY timestamp DESC, id DESC) AS rn
+            FROM price_history
+        ) ph ON ph.product_id = p.id AND ph.rn = 1
+        LEFT JOIN (
+            SELECT product_id, rank_position, list_type, total_reviews, average_rating, sales_count,
+                   COALESCE(last_seen_at, timestamp) AS seen_at,
+                   ROW_NUMBER() OVER (PARTITION BY product_id ORDER BY timestamp DESC, id DESC) AS rn
+            FROM ranking_history
+        ) rh ON rh.product_id = p.id AND rh.rn = 1
+        WHERE ph.product_id IS NOT NULL OR rh.product_id IS NOT NULL
+    """))
+    return result.rowcount
+
+
+def migrate_database():
+    """Mevcut veritabanını model şemasına yükselt"""
+    with engine.begin() as conn:
+        tables = set(inspect(conn).get_table_names())
+
+        if 'product_reviews' in tables:
+            added = _add_missing_columns(conn, 'product_reviews', {'review_hash': 'VARCHAR(32)'})
+            # Eski scraper'ların hash'siz eklediği yorumlar da her migrate'te tamamlanır;
+            # aksi halde ReviewUpserter onları tanımaz ve tekrar ekler
+            filled = _backfill_review_hashes(conn)
+            if added:
+                print(f"✅ product_reviews.review_hash eklendi ({filled} yorum)")
+            elif filled:
+                print(f"✅ {filled} yoruma review_hash yazıldı")
+
+        for table in ('price_history', 'ranking_history'):
+            if table in tables and _add_missing_columns(conn, table, {'last_seen_at': 'DATETIME'}):
+                conn.execute(text(f"UPDATE {table} SET last_seen_at = timestamp"))
+                print(f"✅ {table}.last_seen_at eklendi")
+
+        if 'site_urls' in tables:
+            _add_missing_columns(conn, 'site_urls', {
+                'failure_count': 'INTEGER DEFAULT 0', 'last_failed_at': 'DATETIME', 'last_error': 'TEXT'
+            })
+
+        if 'review_refresh_state' in tables:
+            _add_missing_columns(conn, 'review_refresh_state', {
+                'failure_count': 'INTEGER DEFAULT 0', 'last_failed_at': 'DATETIME', 'last_error': 'TEXT'
+            })
+
+        # Yeni oluşturulan snapshot tablosunu mevcut geçmişten doldur
+        if 'product_latest_snapshot' in tables:
+            _add_missing_columns(conn, 'product_latest_snapshot', {'sales_count': 'INTEGER'})
+            is_empty = conn.execute(text("SELECT COUNT(*) FROM product_latest_snapshot")).scalar() == 0
+            if is_empty and conn.execute(text("SELECT COUNT(*) FROM price_history")).scalar():
+                filled = backfill_latest_snapshots(conn)
+                print(f"✅ product_latest_snapshot dolduruldu ({filled} ürün)")
+
+    # Yeni kolonların indeksleri
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+
 def init_database():
     """Database tablolarını oluştur"""
     Base.metadata.create_all(bind=engine)
+    migrate_database()
     print("✅ Database tabloları oluşturuldu")
 
+_schema_ready = False
+_schema_lock = threading.Lock()
+
+
+def ensure_schema():
+    """
+    Eksik tabloları oluştur ve migrate_database'i process başına bir kez
+    çalıştır. init_database çağırmayan giriş noktaları (Streamlit sayfaları)
+    mevcut veritabanını kullanmadan önce bunu çağırır.
+    """
+    global _schema_ready
+    with _schema_lock:
+        if not _schema_ready:
+            Base.metadata.create_all(bind=engine)
+            migrate_database()
+            _schema_ready = True
+
+
 def get_db():
     """Database session'ı al"""
     db = SessionLocal()
@@ -375,5 +713,15 @@ def get_db():
         db.close()
 
 
+@contextmanager
+def read_session():
+    """Kısa ömürlü okuma session'ı (worker başına; yazmalar db_writer üzerinden yapılır)"""
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
 if __name__ == "__main__":
     init_database()
\ No newline at end of file
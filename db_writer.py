@@ -0,0 +1,156 @@
+"""
+DB Writer - Tek yazıcılı kalıcılık thread'i
+
+Veritabanına yazan tek bileşen budur: kendi session'ı (tek yazma bağlantısı)
+olan bir arka plan thread'i, sınırlı bir kuyruktan yazma işlerini alır ve
+birkaç işi tek transaction'da (group commit) kaydeder. Scraper worker'ları
+session paylaşmaz; okuma için database.read_session() ile kısa ömürlü
+session açar, yazmaları buraya gönderir ve gerekirse Future ile sonucu bekler.
+
+Bir gruptaki iş hata verirse grup geri alınır ve işler tek tek tekrar
+denenir; sadece hatalı işin Future'ı hata ile tamamlanır.
+"""
+
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from config import DB_WRITER
+from database import SessionLocal
+from persistence import BulkProductWriter
+
+logger = logging.getLogger(__name__)
+
+# Kuyruk sonu işareti
+_STOP = object()
+
+
+class DatabaseWriter:
+    """Yazma işlerini tek thread'de, gruplanmış transaction'larla çalıştırır"""
+
+    def __init__(self, session_factory: Optional[Callable[[], Session]] = None,
+                 settings: Optional[Dict] = None):
+        self.settings = {**DB_WRITER, **(settings or {})}
+        self.session_factory = session_factory or SessionLocal
+        self.pid = os.getpid()
+        self.stats = {'jobs': 0, 'transactions': 0, 'failed': 0}
+        self._queue = queue.Queue(maxsize=self.settings['queue_size'])
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+    def start(self) -> 'DatabaseWriter':
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='db-writer', daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+        return self
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        """fn(session, *args, **kwargs) yazıcı thread'inde çalışır; commit'i yazıcı yapar"""
+        if self._closed:
+            raise RuntimeError("DatabaseWriter kapatıldı")
+
+        future = Future()
+        job = (future, fn, args, kwargs)
+        if threading.current_thread() is self._thread:
+            # Bir yazma işi içinden gelen iş: kuyrukta beklerse kilitlenir, aynı transaction'da çalıştır
+            future.set_running_or_notify_cancel()
+            future.set_result(fn(self._session, *args, **kwargs))
+            return future
+
+        self._queue.put(job)  # Kuyruk doluysa üretici bekler (backpressure)
+        return future
+
+    def write_products(self, products: List[Dict], batch_size: Optional[int] = None) -> Future:
+        """Normalize edilmiş ürünleri kaydet; Future batch sayaçlarını döndürür"""
+        return self.submit(lambda session: BulkProductWriter(session, batch_size).write(products, commit=False))
+
+    def add(self, *objects) -> Future:
+        """ORM nesnelerini ekle (nesneler commit sonrası çağıran tarafta kullanılmamalı)"""
+        return self.submit(lambda session: session.add_all(objects))
+
+    def flush(self, timeout: Optional[float] = None):
+        """Şu ana kadar gönderilen tüm işlerin commit edilmesini bekle"""
+        self.submit(lambda session: None).result(timeout)
+
+    def close(self, timeout: Optional[float] = None):
+        if self._closed or self._thread is None:
+            self._closed = True
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def _run(self):
+        self._session = self.session_factory()
+        try:
+            while True:
+                job = self._queue.get()
+                if job is _STOP:
+                    break
+                group, stop = self._collect([job])
+                self._commit_group(group)
+                if stop:
+                    break
+        finally:
+            self._session.close()
+
+    def _collect(self, group: List) -> tuple:
+        """İlk işten sonra group_wait_ms boyunca gelen işleri gruba ekle"""
+        deadline = time.monotonic() + self.settings['group_wait_ms'] / 1000
+        while len(group) < self.settings['group_size']:
+            try:
+                job = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if job is _STOP:
+                return group, True
+            group.append(job)
+        return group, False
+
+    def _commit_group(self, group: List):
+        group = [job for job in group if job[0].set_running_or_notify_cancel()]
+        if group:
+            self._execute(group)
+
+    def _execute(self, group: List):
+        session = self._session
+        try:
+            results = [fn(session, *args, **kwargs) for _, fn, args, kwargs in group]
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            if len(group) == 1:
+                self.stats['failed'] += 1
+                logger.error(f"Yazma işi başarısız: {e}")
+                group[0][0].set_exception(e)
+                return
+            # Hatalı işi ayırmak için her işi kendi transaction'ında tekrar dene
+            for job in group:
+                self._execute([job])
+            return
+
+        self.stats['transactions'] += 1
+        self.stats['jobs'] += len(group)
+        for (future, _, _, _), result in zip(group, results):
+            future.set_result(result)
+
+
+_writer: Optional[DatabaseWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_db_writer() -> DatabaseWriter:
+    """Process başına tek yazıcı (fork sonrası çocuk process kendi yazıcısını başlatır)"""
+    global _writer
+    with _writer_lock:
+        if _writer is None or _writer.pid != os.getpid() or _writer._closed:
+            _writer = DatabaseWriter().start()
+        return _writer
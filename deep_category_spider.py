@@ -1,6 +1,9 @@
 #!/usr/bin/env python3
 """
-Derin Kategori Örümceği - TÜM alt kategorileri recursive olarak bulur
+Derin Kategori Örümceği - TÜM alt kategorileri seviye seviye (BFS) bulur
+
+Tarama durumu crawl_frontier tablosunda tutulur; kesilen tarama kaldığı
+yerden devam eder (bkz. category_crawler.py).
 """
 
 import requests
@@ -8,29 +11,38 @@ from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse, parse_qs
 import re
 import json
-import time
 from typing import List, Dict, Set, Optional
-import cloudscraper
 from collections import defaultdict
+from http_client import get_http_clients
+from category_crawler import BFSCategoryCrawler
+from config import CATEGORY_CRAWLER
+from url_dedup import canonicalize_url
+from sharding import Shard, filter_shard
 
 
 class DeepCategorySpider:
-    """Sınırsız derinlikte kategori bulucu"""
+    """Sınırsız derinlikte kategori bulucu (kalıcı frontier ile BFS)"""
 
-    def __init__(self, max_depth: int = 2):
-        self.scraper = cloudscraper.create_scraper()
+    def __init__(self, max_depth: Optional[int] = None):
+        self.scraper = get_http_clients().cached_cloudscraper()
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
             'Accept-Language': 'tr-TR,tr;q=0.9,en;q=0.8',
         }
-        self.visited_urls = set()
         self.all_categories = {}
-        self.max_depth = max_depth
-        self.max_categories_per_level = 20  # Her seviyede max kategori
+        self.max_depth = max_depth or CATEGORY_CRAWLER['max_depth']
         self.category_tree = {}
 
-    def discover_all_categories_deep(self, site_url: str) -> Dict:
-        """Siteyi DERIN tara ve TÜM kategorileri ağaç yapısında bul"""
+    def discover_all_categories_deep(self, site_url: str, site_id: Optional[int] = None,
+                                     resume: bool = True, shard: Optional[Shard] = None) -> Dict:
+        """
+        Siteyi DERIN tara ve TÜM kategorileri ağaç yapısında bul.
+
+        site_id verilirse bulunan kategoriler tarama sırasında SiteUrl olarak
+        kaydedilir. resume=True iken yarım kalmış tarama kaldığı yerden sürer.
+        shard verilirse ana kategoriler URL hash'ine göre bölünür, sadece bu
+        shard'a düşen alt ağaçlar taranır.
+        """
 
         self.base_url = site_url
         self.domain = urlparse(site_url).netloc.lower()
@@ -38,19 +50,30 @@ class DeepCategorySpider:
         print(f"🕷️ Derin Kategori Taraması Başlıyor...")
         print(f"   Max Derinlik: {self.max_depth} seviye")
 
-        # Site tipine göre strateji belirle
-        if 'trendyol' in self.domain:
-            categories = self._deep_crawl_trendyol()
-        elif 'hepsiburada' in self.domain:
-            categories = self._deep_crawl_hepsiburada()
-        elif 'n11' in self.domain:
-            categories = self._deep_crawl_n11()
-        else:
-            categories = self._deep_crawl_generic()
+        crawl_key = self.domain if shard is None else f"{self.domain}.shard{shard[0]}-{shard[1]}"
+        crawler = BFSCategoryCrawler(self, crawl_key=crawl_key, site_id=site_id,
+                                     settings={'max_depth': self.max_depth})
+        try:
+            if resume and crawler.has_unfinished():
+                print(f"⏯️ Önceki tarama kaldığı yerden devam ediyor...")
+            else:
+                crawler.reset()
+                crawler.seed(filter_shard(self._main_categories(), shard, key=lambda seed: seed['url']))
+
+            crawler.run()
+            self.category_tree = crawler.build_tree()
+        finally:
+            crawler.close()
 
         # Sonuçları hazırla
         flat_categories = self._flatten_category_tree(self.category_tree)
 
+        cache = getattr(self.scraper, 'cache', None)
+        if cache is not None:
+            stats = cache.stats
+            print(f"💾 Cache: {stats['hits']} hit, {stats['revalidated']} 304, "
+                  f"{stats['misses']} miss (%{cache.hit_ratio() * 100:.0f} yerel)")
+
         return {
             'site': self.domain,
             'base_url': site_url,
@@ -60,10 +83,19 @@ class DeepCategorySpider:
             'structure': self._analyze_structure(flat_categories)
         }
 
-    def _deep_crawl_trendyol(self) -> Dict:
-        """Trendyol'u derin tara"""
+    def _main_categories(self) -> List[Dict]:
+        """Site tipine göre taramanın başlangıç (seviye 0) kategorileri"""
+        if 'trendyol' in self.domain:
+            return self._trendyol_main_categories()
+        elif 'hepsiburada' in self.domain:
+            return self._hepsiburada_main_categories()
+        elif 'n11' in self.domain:
+            return self._n11_main_categories()
+        return self._generic_main_categories()
+
+    def _trendyol_main_categories(self) -> List[Dict]:
+        """Trendyol ana kategorileri"""
 
-        # Ana kategoriler
         main_categories = [
             {'id': 'kadin', 'name': 'Kadın', 'url': '/butik/liste/2/kadin'},
             {'id': 'erkek', 'name': 'Erkek', 'url': '/butik/liste/1/erkek'},
@@ -76,85 +108,7 @@ class DeepCategorySpider:
             {'id': 'spor', 'name': 'Spor & Outdoor', 'url': '/butik/liste/11/spor-outdoor'},
         ]
 
-        for main_cat in main_categories:
-            print(f"\n📂 {main_cat['name']} ana kategorisi işleniyor...")
-
-            # Ana kategoriyi ekle
-            category_node = {
-                'id': main_cat['id'],
-                'name': main_cat['name'],
-                'url': f"{self.base_url}{main_cat['url']}",
-                'level': 0,
-                'children': {}
-            }
-
-            # Alt kategorileri recursive olarak bul
-            self._crawl_category_recursive(
-                category_url=f"{self.base_url}{main_cat['url']}",
-                parent_node=category_node,
-                current_depth=1,
-                parent_name=main_cat['name']
-            )
-
-            # Ağaca ekle
-            self.category_tree[main_cat['id']] = category_node
-
-            time.sleep(1)  # Rate limiting
-
-        return self.category_tree
-
-    def _crawl_category_recursive(self, category_url: str, parent_node: Dict,
-                                 current_depth: int, parent_name: str):
-        """Bir kategoriyi ve alt kategorilerini recursive olarak tara"""
-
-        if current_depth > self.max_depth:
-            return
-
-        if category_url in self.visited_urls:
-            return
-
-        self.visited_urls.add(category_url)
-
-        try:
-            print(f"   {'  ' * current_depth}↳ {parent_name} alt kategorileri aranıyor...")
-
-            response = self.scraper.get(category_url, headers=self.headers, timeout=10)
-            soup = BeautifulSoup(response.text, 'html.parser')
-
-            # Alt kategori linklerini bul
-            subcategory_links = self._extract_subcategory_links(soup, category_url)
-
-            # Limitli sayıda alt kategori işle
-            max_subcats = min(self.max_categories_per_level, len(subcategory_links))
-            for i, subcat in enumerate(subcategory_links[:max_subcats]):
-                if subcat['url'] not in self.visited_urls:
-                    # Alt kategori düğümü oluştur
-                    subcat_node = {
-                        'id': subcat['id'],
-                        'name': subcat['name'],
-                        'url': subcat['url'],
-                        'level': current_depth,
-                        'children': {}
-                    }
-
-                    # Parent'a ekle
-                    parent_node['children'][subcat['id']] = subcat_node
-
-                    print(f"   {'  ' * current_depth}  ✓ {subcat['name']}")
-
-                    # Bu alt kategorinin alt kategorilerini bul (recursive) - sadece ilk 10 için
-                    if current_depth < self.max_depth and i < 10:
-                        self._crawl_category_recursive(
-                            category_url=subcat['url'],
-                            parent_node=subcat_node,
-                            current_depth=current_depth + 1,
-                            parent_name=subcat['name']
-                        )
-
-                    time.sleep(0.2)  # Rate limiting
-
-        except Exception as e:
-            print(f"   {'  ' * current_depth}  ⚠️ Hata: {str(e)[:50]}")
+        return [{**cat, 'url': f"{self.base_url}{cat['url']}"} for cat in main_categories]
 
     def _extract_subcategory_links(self, soup: BeautifulSoup, parent_url: str) -> List[Dict]:
         """Sayfadan alt kategori linklerini çıkar"""
@@ -214,15 +168,18 @@ class DeepCategorySpider:
 
                     full_url = urljoin(parent_url, href)
 
-                    # Filtreleme
-                    if (full_url not in found_urls and
-                        self._is_valid_subcategory(full_url, parent_url)):
+                    # Filtreleme ham URL üzerinde (fragment, sıralama parametreleri),
+                    # tekrar kontrolü kanonik URL üzerinde
+                    if not self._is_valid_subcategory(full_url, parent_url):
+                        continue
 
-                        found_urls.add(full_url)
+                    canonical_url = canonicalize_url(full_url)
+                    if canonical_url not in found_urls:
+                        found_urls.add(canonical_url)
                         subcategories.append({
-                            'id': self._generate_category_id(full_url),
+                            'id': self._generate_category_id(canonical_url),
                             'name': text[:100],
-                            'url': full_url
+                            'url': canonical_url
                         })
 
         return subcategories
@@ -230,8 +187,8 @@ class DeepCategorySpider:
     def _is_valid_subcategory(self, url: str, parent_url: str) -> bool:
         """Geçerli bir alt kategori URL'si mi kontrol et"""
 
-        # Aynı URL değil
-        if url == parent_url:
+        # Aynı URL değil (yazım farkları kanonik halde karşılaştırılır)
+        if canonicalize_url(url, parent_url) == canonicalize_url(parent_url):
             return False
 
         # İstenmeyen pattern'ler
@@ -294,8 +251,8 @@ class DeepCategorySpider:
         # Fallback
         return f"cat_{abs(hash(url)) % 1000000}"
 
-    def _deep_crawl_hepsiburada(self) -> Dict:
-        """Hepsiburada'yı derin tara"""
+    def _hepsiburada_main_categories(self) -> List[Dict]:
+        """Hepsiburada ana kategorileri"""
 
         main_categories = [
             {'id': 'elektronik', 'name': 'Elektronik', 'code': '60001028'},
@@ -306,31 +263,13 @@ class DeepCategorySpider:
             {'id': 'spor', 'name': 'Spor', 'code': '60006028'},
         ]
 
-        for main_cat in main_categories:
-            category_url = f"{self.base_url}/c-{main_cat['code']}"
-
-            category_node = {
-                'id': main_cat['id'],
-                'name': main_cat['name'],
-                'url': category_url,
-                'level': 0,
-                'children': {}
-            }
-
-            # Alt kategorileri bul
-            self._crawl_category_recursive(
-                category_url=category_url,
-                parent_node=category_node,
-                current_depth=1,
-                parent_name=main_cat['name']
-            )
-
-            self.category_tree[main_cat['id']] = category_node
-
-        return self.category_tree
+        return [
+            {'id': cat['id'], 'name': cat['name'], 'url': f"{self.base_url}/c-{cat['code']}"}
+            for cat in main_categories
+        ]
 
-    def _deep_crawl_n11(self) -> Dict:
-        """N11'i derin tara"""
+    def _n11_main_categories(self) -> List[Dict]:
+        """N11 ana kategorileri"""
 
         main_paths = [
             {'id': 'elektronik', 'name': 'Elektronik', 'path': '/elektronik'},
@@ -341,31 +280,15 @@ class DeepCategorySpider:
             {'id': 'spor', 'name': 'Spor', 'path': '/spor-outdoor'},
         ]
 
-        for main_cat in main_paths:
-            category_url = f"{self.base_url}{main_cat['path']}"
-
-            category_node = {
-                'id': main_cat['id'],
-                'name': main_cat['name'],
-                'url': category_url,
-                'level': 0,
-                'children': {}
-            }
-
-            self._crawl_category_recursive(
-                category_url=category_url,
-                parent_node=category_node,
-                current_depth=1,
-                parent_name=main_cat['name']
-            )
-
-            self.category_tree[main_cat['id']] = category_node
-
-        return self.category_tree
+        return [
+            {'id': cat['id'], 'name': cat['name'], 'url': f"{self.base_url}{cat['path']}"}
+            for cat in main_paths
+        ]
 
-    def _deep_crawl_generic(self) -> Dict:
-        """Genel site için derin tarama"""
+    def _generic_main_categories(self) -> List[Dict]:
+        """Genel site: ana sayfadaki menüden ana kategorileri bul"""
 
+        main_categories = []
         try:
             response = self.scraper.get(self.base_url, headers=self.headers, timeout=10)
             soup = BeautifulSoup(response.text, 'html.parser')
@@ -378,30 +301,16 @@ class DeepCategorySpider:
                 text = link.get_text(strip=True)
 
                 if href and text and self._is_valid_subcategory(href, self.base_url):
-                    cat_id = self._generate_category_id(href)
-                    category_url = urljoin(self.base_url, href)
-
-                    category_node = {
-                        'id': cat_id,
+                    main_categories.append({
+                        'id': self._generate_category_id(href),
                         'name': text,
-                        'url': category_url,
-                        'level': 0,
-                        'children': {}
-                    }
-
-                    self._crawl_category_recursive(
-                        category_url=category_url,
-                        parent_node=category_node,
-                        current_depth=1,
-                        parent_name=text
-                    )
-
-                    self.category_tree[cat_id] = category_node
+                        'url': urljoin(self.base_url, href)
+                    })
 
         except Exception as e:
             print(f"Genel tarama hatası: {e}")
 
-        return self.category_tree
+        return main_categories
 
     def _flatten_category_tree(self, tree: Dict, parent_path: str = "") -> List[Dict]:
         """Ağaç yapısını düz listeye çevir"""
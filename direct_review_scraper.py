@@ -5,11 +5,11 @@ Trendyol API'den direkt GERÇEK yorumları çeker
 
 import requests
 import json
-import time
 import re
 from datetime import datetime, timedelta
 from database import SessionLocal, Product, ProductReview
 from turkish_review_ai import TurkishReviewAI
+from rate_limiter import get_rate_limiter
 
 class DirectTrendyolReviewScraper:
     """Trendyol API'den direkt gerçek yorumları çeker"""
@@ -17,6 +17,7 @@ class DirectTrendyolReviewScraper:
     def __init__(self):
         self.session = SessionLocal()
         self.ai = TurkishReviewAI()
+        self.rate_limiter = get_rate_limiter()
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Accept': 'application/json, text/plain, */*',
@@ -86,7 +87,9 @@ class DirectTrendyolReviewScraper:
                 }
 
                 try:
-                    response = requests.get(
+                    # Host limiti dahilinde çek (429/503 gelirse limiter yavaşlar)
+                    response = self.rate_limiter.get(
+                        requests,
                         api_base,
                         headers=self.headers,
                         params=params,
@@ -130,8 +133,6 @@ class DirectTrendyolReviewScraper:
                             # Eğer daha az yorum geldiyse, son sayfadayız
                             if len(reviews_data) < 20:
                                 break
-
-                            time.sleep(0.5)  # Rate limiting
                         else:
                             # Bu sayfada yorum yok, bir sonraki API'yi dene
                             break
@@ -330,9 +331,6 @@ class DirectTrendyolReviewScraper:
 
             self.scrape_product_reviews(product.id)
 
-            # Rate limiting
-            time.sleep(2)
-
         print("\n✅ Tüm ürünlerin GERÇEK yorumları çekildi")
 
 
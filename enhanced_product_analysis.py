@@ -13,6 +13,10 @@ from datetime import datetime, timedelta
 import numpy as np
 from collections import Counter
 import re
+from database import ensure_schema
+
+# product_latest_snapshot gibi yeni tablolar eski veritabanında da olsun
+ensure_schema()
 
 def show_enhanced_product_analysis(product_id):
     """Gelişmiş ürün analizi göster"""
@@ -21,12 +25,19 @@ def show_enhanced_product_analysis(product_id):
 
     # Ürün bilgilerini al
     product = pd.read_sql_query(f"""
-        SELECT p.*, c.name as category_name
+        SELECT p.*, c.name as category_name,
+               s.price as latest_price, s.in_stock as latest_in_stock
         FROM products p
         LEFT JOIN categories c ON p.category_id = c.id
+        LEFT JOIN product_latest_snapshot s ON s.product_id = p.id
         WHERE p.id = {product_id}
     """, conn).to_dict('records')[0]
 
+    # Son durum snapshot'ı varsa ürün tablosundaki eski değerlerin yerine geçer
+    if pd.notna(product['latest_price']):
+        product['price'] = product['latest_price']
+        product['in_stock'] = product['latest_in_stock']
+
     st.header(f"🔍 {product['name']}")
     st.caption(f"Kategori: {product['category_name']} | Marka: {product['brand']}")
 
@@ -462,11 +473,12 @@ def show_enhanced_product_analysis(product_id):
 
         # Aynı kategorideki diğer ürünler
         competitors = pd.read_sql_query(f"""
-            SELECT name, brand, price, rating, review_count
-            FROM products
-            WHERE category_id = {product['category_id']}
-            AND id != {product_id}
-            ORDER BY review_count DESC
+            SELECT p.name, p.brand, COALESCE(s.price, p.price) as price, p.rating, p.review_count
+            FROM products p
+            LEFT JOIN product_latest_snapshot s ON s.product_id = p.id
+            WHERE p.category_id = {product['category_id']}
+            AND p.id != {product_id}
+            ORDER BY p.review_count DESC
             LIMIT 5
         """, conn)
 
@@ -12,10 +12,11 @@ import time
 import random
 import json
 import base64
+from http_client import get_http_clients
 
 class FreeTrendyolScraper:
     def __init__(self):
-        self.session = requests.Session()
+        self.session = get_http_clients().session()
 
         # Ücretsiz proxy listesi (güncellenebilir)
         self.free_proxies = [
@@ -4,6 +4,7 @@
 Gerçek veri toplama - Simülasyon YOK!
 """
 
+import importlib.util
 import os
 import sys
 import json
@@ -14,21 +15,10 @@ import pandas as pd
 from datetime import datetime
 from typing import List, Dict, Any
 
-# Selenium imports
-try:
-    import undetected_chromedriver as uc
-    from selenium import webdriver
-    from selenium.webdriver.common.by import By
-    from selenium.webdriver.support.ui import WebDriverWait
-    from selenium.webdriver.support import expected_conditions as EC
-    from selenium.common.exceptions import TimeoutException, NoSuchElementException
-    USE_UNDETECTED = True
-except ImportError:
-    from selenium import webdriver
-    from selenium.webdriver.common.by import By
-    from selenium.webdriver.support.ui import WebDriverWait
-    from selenium.webdriver.support import expected_conditions as EC
-    USE_UNDETECTED = False
+# Selenium driver'ları browser_pool açar; undetected_chromedriver kuruluysa o kullanılır
+USE_UNDETECTED = importlib.util.find_spec('undetected_chromedriver') is not None
+
+from browser_pool import get_browser_pool
 
 # HTTP imports
 import requests
@@ -64,36 +54,21 @@ class TrendyolRealDataScraper:
         self.log_file.flush()
 
     def setup_driver(self):
-        """Selenium driver kurulumu"""
-        options = webdriver.ChromeOptions() if not USE_UNDETECTED else uc.ChromeOptions()
-
+        """Paylaşılan Chrome havuzundan driver ödünç al"""
         # Headless mod (GitHub Actions için zorunlu)
-        if self.is_github_actions:
-            options.add_argument('--headless')
-            options.add_argument('--no-sandbox')
-            options.add_argument('--disable-dev-shm-usage')
-
-        # Genel ayarlar
-        options.add_argument('--disable-gpu')
-        options.add_argument('--window-size=1920,1080')
-        options.add_argument('--disable-blink-features=AutomationControlled')
-        options.add_argument(f'user-agent={self.ua.chrome}')
-
-        # Anti-detection
-        options.add_experimental_option("excludeSwitches", ["enable-automation"])
-        options.add_experimental_option('useAutomationExtension', False)
-
-        if USE_UNDETECTED:
-            driver = uc.Chrome(options=options, version_main=120)
-        else:
-            driver = webdriver.Chrome(options=options)
-
-        # JavaScript anti-detection
-        driver.execute_cdp_cmd('Network.setUserAgentOverride', {
-            "userAgent": self.ua.chrome
-        })
-
-        return driver
+        self.pool = get_browser_pool(
+            undetected=USE_UNDETECTED,
+            headless=self.is_github_actions,
+            user_agent=self.ua.chrome
+        )
+        self._lease = self.pool.acquire()
+        return self._lease.driver
+
+    def release_driver(self):
+        """Driver'ı havuza iade et"""
+        if getattr(self, '_lease', None) is not None:
+            self.pool.release(self._lease)
+            self._lease = None
 
     def scrape_with_selenium(self):
         """Selenium ile veri çek"""
@@ -145,13 +120,12 @@ class TrendyolRealDataScraper:
                 except Exception as e:
                     self._log(f"❌ {category} kategorisi hata: {e}")
 
-            driver.quit()
+            self.release_driver()
             return products
 
         except Exception as e:
             self._log(f"❌ Selenium hata: {e}")
-            if 'driver' in locals():
-                driver.quit()
+            self.release_driver()
             return []
 
     def _extract_products_selenium(self, driver) -> List[Dict]:
@@ -4,20 +4,23 @@ Hepsiburada.com Scraper
 """
 
 import requests
-from bs4 import BeautifulSoup
-import cloudscraper
 import json
-import time
 from typing import List, Dict
 from urllib.parse import urljoin
 
+from html_parser import get_html_parser
+from http_client import get_http_clients
+from rate_limiter import get_rate_limiter
+
 
 class HepsiburadaScraper:
     """Hepsiburada için özelleştirilmiş scraper"""
 
     def __init__(self):
-        self.scraper = cloudscraper.create_scraper()
+        self.scraper = get_http_clients().cloudscraper()
+        self.rate_limiter = get_rate_limiter()
         self.base_url = "https://www.hepsiburada.com"
+        self.html_parser = get_html_parser()
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
             'Accept-Language': 'tr-TR,tr;q=0.9,en;q=0.8',
@@ -38,10 +41,11 @@ class HepsiburadaScraper:
 
             try:
                 # Sayfayı çek
-                response = self.scraper.get(page_url, headers=self.headers, timeout=15)
-                soup = BeautifulSoup(response.text, 'html.parser')
+                # Host limiti dahilinde çek (429/503 gelirse limiter yavaşlar)
+                response = self.rate_limiter.get(self.scraper, page_url, headers=self.headers, timeout=15)
+                document = self.html_parser.parse(response.content)
 
-                products = self._parse_products(soup)
+                products = self._parse_products(document)
                 all_products.extend(products)
 
                 print(f"    Sayfa {page}: {len(products)} ürün bulundu")
@@ -49,37 +53,36 @@ class HepsiburadaScraper:
                 if len(products) == 0:
                     break  # Daha fazla ürün yok
 
-                time.sleep(1)  # Rate limiting
-
             except Exception as e:
                 print(f"    ⚠️ Sayfa {page} çekilemedi: {str(e)[:50]}")
                 break
 
         return all_products
 
-    def _parse_products(self, soup: BeautifulSoup) -> List[Dict]:
+    def _parse_products(self, document) -> List[Dict]:
         """HTML'den ürünleri parse et"""
         products = []
+        html = self.html_parser
 
         # Hepsiburada ürün kartlarını bul
-        product_cards = soup.select('li[class*="productListContent"], div[class*="product-list-item"]')
+        product_cards = html.select(document, 'li[class*="productListContent"], div[class*="product-list-item"]')
 
         for card in product_cards:
             try:
                 product = {}
 
                 # İsim
-                name_elem = card.select_one('h3, a[title]')
-                product['name'] = name_elem.get('title', name_elem.get_text(strip=True)) if name_elem else ''
+                name_elem = html.select_one(card, 'h3, a[title]')
+                product['name'] = html.attr(name_elem, 'title', html.text(name_elem).strip()) if name_elem is not None else ''
 
                 # Marka
-                brand_elem = card.select_one('span[class*="brand"]')
-                product['brand'] = brand_elem.get_text(strip=True) if brand_elem else ''
+                brand_elem = html.select_one(card, 'span[class*="brand"]')
+                product['brand'] = html.text(brand_elem).strip() if brand_elem is not None else ''
 
                 # Fiyat
-                price_elem = card.select_one('[data-test-id*="price"], span[class*="price"]')
-                if price_elem:
-                    price_text = price_elem.get_text(strip=True)
+                price_elem = html.select_one(card, '[data-test-id*="price"], span[class*="price"]')
+                if price_elem is not None:
+                    price_text = html.text(price_elem).strip()
                     # TL ve virgülü temizle
                     price_text = price_text.replace('TL', '').replace('.', '').replace(',', '.').strip()
                     try:
@@ -90,16 +93,16 @@ class HepsiburadaScraper:
                     product['price'] = 0
 
                 # URL
-                link_elem = card.select_one('a[href]')
-                if link_elem:
-                    product['url'] = urljoin(self.base_url, link_elem.get('href', ''))
+                link_elem = html.select_one(card, 'a[href]')
+                if link_elem is not None:
+                    product['url'] = urljoin(self.base_url, html.attr(link_elem, 'href', ''))
                 else:
                     product['url'] = ''
 
                 # Resim
-                img_elem = card.select_one('img[src], img[data-src]')
-                if img_elem:
-                    product['image'] = img_elem.get('src') or img_elem.get('data-src', '')
+                img_elem = html.select_one(card, 'img[src], img[data-src]')
+                if img_elem is not None:
+                    product['image'] = html.attr(img_elem, 'src') or html.attr(img_elem, 'data-src', '')
                 else:
                     product['image'] = ''
 
@@ -112,12 +115,11 @@ class HepsiburadaScraper:
                     product['id'] = ''
 
                 # Rating
-                rating_elem = card.select_one('[class*="rating"], [class*="star"]')
                 product['rating'] = 0  # Hepsiburada'da rating parse etmek zor
 
                 # Satıcı
-                seller_elem = card.select_one('[class*="merchant"], [class*="seller"]')
-                product['seller'] = seller_elem.get_text(strip=True) if seller_elem else ''
+                seller_elem = html.select_one(card, '[class*="merchant"], [class*="seller"]')
+                product['seller'] = html.text(seller_elem).strip() if seller_elem is not None else ''
 
                 product['review_count'] = 0
 
@@ -0,0 +1,223 @@
+"""
+History - Değişimde yazılan (on_change) fiyat/sıralama geçmişini okuma
+
+on_change modunda price_history / ranking_history satırları bir değerin
+geçerli olduğu aralığı temsil eder: [timestamp, last_seen_at]. Bir sonraki
+satırın timestamp'ine kadar değer sabittir. Bu modül satırları grafikler
+için basamak (step) serisine çevirir ve eski (her scrape'te satır yazılmış)
+geçmişi sıkıştırır.
+
+Grafiklerde basamak çizimi için plotly'de line_shape='hv' kullanılır.
+Zaman aralığı filtreleyen sorgular timestamp >= since yerine seen_since
+kullanmalıdır: değişmeyen değerin satırı eskidir, sadece last_seen_at ilerler.
+"""
+
+import argparse
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.orm import Session
+
+from config import HISTORY
+from database import SessionLocal, PriceHistory, RankingHistory
+
+logger = logging.getLogger(__name__)
+
+PRICE_COLUMNS = ['price', 'original_price', 'discount_percentage', 'in_stock']
+RANKING_COLUMNS = ['rank_position', 'list_type', 'total_reviews', 'average_rating', 'sales_count']
+
+
+def seen_since(model, since: datetime):
+    """Satırın geçerli olduğu [timestamp, last_seen_at] aralığı since'e uzanıyor mu"""
+    return or_(model.timestamp >= since, model.last_seen_at >= since)
+
+
+def seen_between(model, start: datetime, end: datetime):
+    """Satırın aralığı [start, end) ile kesişiyor mu (günlük gruplamalar için)"""
+    return and_(model.timestamp < end, seen_since(model, start))
+
+
+def _segments(rows: List, since: Optional[datetime], until: Optional[datetime]) -> List[Dict]:
+    """Bir ürünün sıralı satırlarını {'start', 'end', <kolonlar>} aralıklarına çevir"""
+    segments = []
+    for index, row in enumerate(rows):
+        values = dict(row._mapping)
+        values.pop('product_id', None)
+        start = values.pop('timestamp')
+        last_seen = values.pop('last_seen_at') or start
+        end = rows[index + 1].timestamp if index + 1 < len(rows) else last_seen
+        if since is not None:
+            if end < since:
+                continue  # since'ten önce bitmiş (ürün aralıkta hiç görülmemiş)
+            start = max(start, since)
+        if until is not None and end > until:
+            end = until
+        segments.append({'start': start, 'end': max(start, end), **values})
+    return segments
+
+
+def segments_by_product(session: Session, model, product_ids: Optional[Iterable[int]], columns: List[str],
+                        since: Optional[datetime] = None,
+                        until: Optional[datetime] = None) -> Dict[int, List[Dict]]:
+    """
+    Birden çok ürünün geçmişini tek seferde {product_id: [aralıklar]} olarak döndür.
+
+    end bir sonraki satırın başladığı an, son satır için last_seen_at'tir.
+    since verilirse o anda geçerli olan (daha önce başlamış) değer de
+    since'ten başlayan bir aralık olarak eklenir. product_ids None ise tüm ürünler.
+    """
+    table = model.__table__
+    fields = [table.c[name] for name in columns]
+    query = select(table.c.product_id, table.c.timestamp, table.c.last_seen_at, *fields)
+    if product_ids is not None:
+        product_ids = list(product_ids)
+        if not product_ids:
+            return {}
+        query = query.where(table.c.product_id.in_(product_ids))
+
+    rows: Dict[int, List] = {}
+    if since is not None:
+        # since anında geçerli olan değer: ürün başına since'ten önceki son satır
+        ranked = query.add_columns(
+            func.row_number().over(
+                partition_by=table.c.product_id,
+                order_by=(table.c.timestamp.desc(), table.c.id.desc())
+            ).label('rn')
+        ).where(table.c.timestamp < since).subquery()
+        previous = select(*[column for column in ranked.c if column.name != 'rn']).where(ranked.c.rn == 1)
+        for row in session.execute(previous):
+            rows.setdefault(row.product_id, []).append(row)
+        query = query.where(table.c.timestamp >= since)
+    if until is not None:
+        query = query.where(table.c.timestamp <= until)
+    for row in session.execute(query.order_by(table.c.product_id, table.c.timestamp, table.c.id)):
+        rows.setdefault(row.product_id, []).append(row)
+
+    segments = {product_id: _segments(product_rows, since, until) for product_id, product_rows in rows.items()}
+    return {product_id: items for product_id, items in segments.items() if items}
+
+
+def step_segments(session: Session, model, product_id: int, columns: List[str],
+                  since: Optional[datetime] = None, until: Optional[datetime] = None) -> List[Dict]:
+    """Tek ürünün aralıkları (bkz. segments_by_product)"""
+    return segments_by_product(session, model, [product_id], columns, since, until).get(product_id, [])
+
+
+def time_weighted_average(segments: List[Dict], column: str) -> Optional[float]:
+    """Değerin geçerli kaldığı süreye göre ağırlıklı ortalaması (süresiz tek gözlemde düz ortalama)"""
+    values = [(segment[column], (segment['end'] - segment['start']).total_seconds())
+              for segment in segments if segment[column] is not None]
+    if not values:
+        return None
+    total = sum(weight for _, weight in values)
+    if total <= 0:
+        return sum(value for value, _ in values) / len(values)
+    return sum(value * weight for value, weight in values) / total
+
+
+def daily_values(segments: List[Dict], column: str) -> List[Dict]:
+    """Aralığın kapsadığı her gün için {'date', column}: günlük ortalama/min/max için"""
+    points = []
+    for segment in segments:
+        day = segment['start'].date()
+        while day <= segment['end'].date():
+            points.append({'date': day, column: segment[column]})
+            day += timedelta(days=1)
+    return points
+
+
+def step_points(segments: List[Dict]) -> List[Dict]:
+    """
+    Basamak grafiği noktaları: her değişim noktası + son değerin en son
+    görüldüğü an. Kolon sırası korunur ('timestamp' + değer kolonları).
+    """
+    points = []
+    for segment in segments:
+        values = {key: value for key, value in segment.items() if key not in ('start', 'end')}
+        points.append({'timestamp': segment['start'], **values})
+
+    if segments and segments[-1]['end'] > segments[-1]['start']:
+        last = segments[-1]
+        values = {key: value for key, value in last.items() if key not in ('start', 'end')}
+        points.append({'timestamp': last['end'], **values})
+    return points
+
+
+def price_series(session: Session, product_id: int, since: Optional[datetime] = None,
+                 until: Optional[datetime] = None) -> List[Dict]:
+    """Fiyat basamak serisi: [{'timestamp', 'price', 'original_price', ...}]"""
+    return step_points(step_segments(session, PriceHistory, product_id, PRICE_COLUMNS, since, until))
+
+
+def ranking_series(session: Session, product_id: int, since: Optional[datetime] = None,
+                   until: Optional[datetime] = None) -> List[Dict]:
+    """Sıralama basamak serisi: [{'timestamp', 'rank_position', ...}]"""
+    return step_points(step_segments(session, RankingHistory, product_id, RANKING_COLUMNS, since, until))
+
+
+def compact_history(session: Session, model, fields: List[str], batch_size: int = 1000) -> Dict:
+    """
+    Eski geçmişi on_change biçimine çevir: takip edilen alanları bir önceki
+    satırla aynı olan ardışık satırları sil, kalan satırın last_seen_at'ini
+    silinen son satırın zamanına uzat.
+    """
+    table = model.__table__
+    columns = [table.c[name] for name in fields]
+    rows = session.execute(
+        select(table.c.id, table.c.product_id, table.c.timestamp, table.c.last_seen_at, *columns)
+        .order_by(table.c.product_id, table.c.timestamp, table.c.id)
+    ).all()
+
+    delete_ids, extend = [], {}
+    kept = None
+    for row in rows:
+        values = tuple(getattr(row, name) for name in fields)
+        if kept is not None and kept[1] == row.product_id and kept[2] == values:
+            delete_ids.append(row.id)
+            extend[kept[0]] = max(extend.get(kept[0], row.timestamp), row.last_seen_at or row.timestamp)
+            continue
+        kept = (row.id, row.product_id, values)
+
+    for start in range(0, len(delete_ids), batch_size):
+        session.execute(table.delete().where(table.c.id.in_(delete_ids[start:start + batch_size])))
+    for row_id, last_seen in extend.items():
+        session.execute(table.update().where(table.c.id == row_id).values(last_seen_at=last_seen))
+    session.commit()
+
+    return {'rows': len(rows), 'deleted': len(delete_ids), 'kept': len(rows) - len(delete_ids)}
+
+
+def compact_all(session: Optional[Session] = None) -> Dict:
+    """price_history ve ranking_history'yi HISTORY alanlarına göre sıkıştır"""
+    own_session = session is None
+    session = session or SessionLocal()
+    try:
+        return {
+            'price_history': compact_history(session, PriceHistory, HISTORY['price_fields']),
+            'ranking_history': compact_history(session, RankingHistory, HISTORY['ranking_fields'])
+        }
+    finally:
+        if own_session:
+            session.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fiyat/sıralama geçmişi araçları")
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('compact', help="Değişmeyen ardışık geçmiş satırlarını birleştir")
+    series = commands.add_parser('series', help="Bir ürünün fiyat basamak serisini yazdır")
+    series.add_argument('product_id', type=int)
+    args = parser.parse_args()
+
+    if args.command == 'compact':
+        for table, stats in compact_all().items():
+            print(f"🗜️ {table}: {stats['rows']} satır -> {stats['kept']} ({stats['deleted']} silindi)")
+    else:
+        session = SessionLocal()
+        try:
+            for point in price_series(session, args.product_id):
+                print(f"{point['timestamp']}  {point['price']:>10.2f} TL  stok: {point['in_stock']}")
+        finally:
+            session.close()
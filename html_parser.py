@@ -0,0 +1,162 @@
+"""
+HTML Parser - Takılabilir HTML parse backend'leri
+
+Scraper'lar BeautifulSoup'a doğrudan bağlı kalmadan ortak bir arayüz
+(parse / select / select_one / attr / text) kullanır. selectolax veya
+lxml kuruluysa çok daha hızlı olan bu backend'ler seçilir; hiçbiri yoksa
+BeautifulSoup(lxml) ile çalışılır.
+"""
+
+import importlib.util
+import logging
+from typing import Any, Dict, List, Optional, Type
+
+from bs4 import BeautifulSoup
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as SelectolaxHTMLParser
+except ImportError:
+    SelectolaxHTMLParser = None
+
+try:
+    import lxml.html
+    # lxml CSS seçicileri için cssselect gerekli (lxml onu kendisi import eder)
+    HAS_LXML_CSS = importlib.util.find_spec('cssselect') is not None
+except ImportError:
+    HAS_LXML_CSS = False
+
+from config import SCRAPING
+
+logger = logging.getLogger(__name__)
+
+
+class ParserBackend:
+    """Ortak parser arayüzü"""
+
+    name = 'base'
+
+    def parse(self, content) -> Any:
+        raise NotImplementedError
+
+    def select(self, node, css: str) -> List:
+        raise NotImplementedError
+
+    def select_one(self, node, css: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    def attr(self, node, name: str, default=None):
+        raise NotImplementedError
+
+    def text(self, node) -> str:
+        raise NotImplementedError
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.name}>"
+
+
+class SoupBackend(ParserBackend):
+    """BeautifulSoup (varsayılan lxml tree builder)"""
+
+    name = 'bs4'
+
+    def __init__(self, features: str = 'lxml'):
+        self.features = features
+
+    def parse(self, content):
+        return BeautifulSoup(content, self.features)
+
+    def select(self, node, css):
+        return node.select(css)
+
+    def select_one(self, node, css):
+        return node.select_one(css)
+
+    def attr(self, node, name, default=None):
+        return node.get(name, default)
+
+    def text(self, node):
+        return node.get_text()
+
+
+class SelectolaxBackend(ParserBackend):
+    """selectolax (Lexbor) - C tabanlı, en hızlı seçenek"""
+
+    name = 'selectolax'
+
+    def parse(self, content):
+        return SelectolaxHTMLParser(content)
+
+    def select(self, node, css):
+        return node.css(css)
+
+    def select_one(self, node, css):
+        return node.css_first(css)
+
+    def attr(self, node, name, default=None):
+        value = node.attributes.get(name)
+        return default if value is None else value
+
+    def text(self, node):
+        return node.text()
+
+
+class LxmlBackend(ParserBackend):
+    """lxml.html + cssselect"""
+
+    name = 'lxml'
+
+    def parse(self, content):
+        # Byte girişte lxml meta charset yoksa latin-1 varsayar; siteler UTF-8
+        if isinstance(content, bytes):
+            content = content.decode('utf-8', errors='replace')
+        return lxml.html.fromstring(content)
+
+    def select(self, node, css):
+        return node.cssselect(css)
+
+    def select_one(self, node, css):
+        matches = node.cssselect(css)
+        return matches[0] if matches else None
+
+    def attr(self, node, name, default=None):
+        return node.get(name, default)
+
+    def text(self, node):
+        return node.text_content()
+
+
+BACKENDS: Dict[str, Type[ParserBackend]] = {
+    'selectolax': SelectolaxBackend,
+    'lxml': LxmlBackend,
+    'bs4': SoupBackend,
+}
+
+
+def available_backends() -> List[str]:
+    """Bu ortamda kullanılabilen backend isimleri (hızlıdan yavaşa)"""
+    names = []
+    if SelectolaxHTMLParser is not None:
+        names.append('selectolax')
+    if HAS_LXML_CSS:
+        names.append('lxml')
+    names.append('bs4')
+    return names
+
+
+def get_html_parser(name: Optional[str] = None) -> ParserBackend:
+    """
+    İsimle parser backend'i al.
+
+    'auto' (varsayılan) kurulu olan en hızlı backend'i seçer. İstenen
+    backend kurulu değilse uyarı verip BeautifulSoup'a düşer.
+    """
+    name = name or SCRAPING.get('html_parser', 'auto')
+    available = available_backends()
+
+    if name == 'auto':
+        name = available[0]
+    elif name not in available:
+        logger.warning(f"HTML parser '{name}' kullanılamıyor, bs4'e geçiliyor")
+        name = 'bs4'
+
+    return BACKENDS[name]()
@@ -0,0 +1,302 @@
+"""
+HTTP Cache - Diskte, içerik adresli HTTP yanıt önbelleği
+
+Kategori/navigasyon sayfaları nadiren değişir; keşif spider'ları her
+çalışmada aynı sayfaları indirmek yerine yanıtı buradan alır.
+
+- Anahtar: url_dedup.canonicalize_url (kanonik URL; takip parametreleri atılır)
+- Gövde: SHA-256 ile adreslenen dosya (aynı içerik bir kez saklanır)
+- İndeks: SQLite (status, header'lar, ETag/Last-Modified, son erişim)
+- TTL: URL kalıbına göre (config.HTTP_CACHE['ttl_rules']); 0 ise cache'lenmez
+- Süresi dolan kayıt ETag/Last-Modified ile koşullu istekle yenilenir (304)
+- Toplam boyut sınırı aşılınca en eski erişilen kayıtlar silinir (LRU)
+
+Offline modda ağa hiç çıkılmaz; kayıtlı yanıtlar test fixture'ı gibi
+yeniden oynatılır.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from config import HTTP_CACHE
+from url_dedup import canonicalize_url
+
+logger = logging.getLogger(__name__)
+
+# Gövde zaten çözülmüş saklandığı için bu header'lar taşınmaz
+_DROPPED_HEADERS = {'content-encoding', 'content-length', 'transfer-encoding', 'connection'}
+
+
+class ResponseCache:
+    """İçerik adresli disk önbelleği (thread-safe)"""
+
+    def __init__(self, directory: Optional[str] = None, max_size_mb: Optional[float] = None,
+                 default_ttl: Optional[int] = None, ttl_rules: Optional[List[Tuple[str, int]]] = None):
+        self.directory = directory or HTTP_CACHE.get('directory', 'http_cache')
+        self.max_bytes = int((max_size_mb or HTTP_CACHE.get('max_size_mb', 512)) * 1024 * 1024)
+        self.default_ttl = HTTP_CACHE.get('default_ttl', 0) if default_ttl is None else default_ttl
+        self.ttl_rules = [
+            (re.compile(pattern), ttl)
+            for pattern, ttl in (HTTP_CACHE.get('ttl_rules', []) if ttl_rules is None else ttl_rules)
+        ]
+
+        self.stats = {'hits': 0, 'misses': 0, 'revalidated': 0, 'stores': 0, 'evictions': 0, 'bypass': 0}
+
+        os.makedirs(os.path.join(self.directory, 'objects'), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(self.directory, 'index.db'), check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                url_key TEXT PRIMARY KEY,
+                url TEXT,
+                status INTEGER,
+                headers TEXT,
+                body_hash TEXT,
+                size INTEGER,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL,
+                expires_at REAL,
+                last_access REAL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_access ON responses (last_access)")
+        self._conn.commit()
+
+    def ttl_for(self, url: str) -> int:
+        """URL için TTL (saniye); ilk eşleşen kural geçerli"""
+        for pattern, ttl in self.ttl_rules:
+            if pattern.search(url):
+                return ttl
+        return self.default_ttl
+
+    def _blob_path(self, body_hash: str) -> str:
+        return os.path.join(self.directory, 'objects', body_hash[:2], body_hash)
+
+    def lookup(self, url: str) -> Optional[Dict]:
+        """Kayıtlı yanıtın meta verisi (gövde hariç)"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, status, headers, body_hash, etag, last_modified, expires_at "
+                "FROM responses WHERE url_key = ?", (canonicalize_url(url),)
+            ).fetchone()
+        if row is None:
+            return None
+
+        keys = ('url', 'status', 'headers', 'body_hash', 'etag', 'last_modified', 'expires_at')
+        entry = dict(zip(keys, row))
+        entry['headers'] = json.loads(entry['headers'])
+        return entry
+
+    def load(self, url: str, entry: Dict) -> Optional[requests.Response]:
+        """Kayıttan requests.Response oluştur, son erişimi güncelle"""
+        try:
+            with open(self._blob_path(entry['body_hash']), 'rb') as f:
+                body = f.read()
+        except OSError:
+            return None
+
+        with self._lock:
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE url_key = ?",
+                               (time.time(), canonicalize_url(url)))
+            self._conn.commit()
+
+        response = requests.Response()
+        response.status_code = entry['status']
+        response.headers = CaseInsensitiveDict(entry['headers'])
+        response._content = body
+        response.url = entry['url']
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response.from_cache = True
+        return response
+
+    def store(self, url: str, response: requests.Response, ttl: int):
+        """200 yanıtını sakla"""
+        body = response.content
+        body_hash = hashlib.sha256(body).hexdigest()
+        path = self._blob_path(body_hash)
+
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(body)
+            os.replace(tmp_path, path)
+
+        headers = {k: v for k, v in response.headers.items() if k.lower() not in _DROPPED_HEADERS}
+        now = time.time()
+        with self._lock:
+            self._conn.execute("""
+                INSERT OR REPLACE INTO responses
+                (url_key, url, status, headers, body_hash, size, etag, last_modified,
+                 fetched_at, expires_at, last_access)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                canonicalize_url(url), response.url or url, response.status_code, json.dumps(headers),
+                body_hash, len(body), response.headers.get('ETag'), response.headers.get('Last-Modified'),
+                now, now + ttl, now
+            ))
+            self._conn.commit()
+            self.stats['stores'] += 1
+
+        self._evict()
+
+    def refresh(self, url: str, ttl: int):
+        """304 sonrası kaydın süresini uzat"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE responses SET expires_at = ?, fetched_at = ?, last_access = ? WHERE url_key = ?",
+                (now + ttl, now, now, canonicalize_url(url))
+            )
+            self._conn.commit()
+
+    def size_bytes(self) -> int:
+        """Diskteki toplam gövde boyutu (aynı içerik bir kez sayılır)"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM "
+                "(SELECT MAX(size) AS size FROM responses GROUP BY body_hash)"
+            ).fetchone()[0]
+
+    def _evict(self):
+        """Boyut sınırı aşıldıysa en eski erişilen kayıtları sil (LRU)"""
+        excess = self.size_bytes() - self.max_bytes
+        if excess <= 0:
+            return
+
+        with self._lock:
+            victims = []
+            for url_key, body_hash, size in self._conn.execute(
+                "SELECT url_key, body_hash, size FROM responses ORDER BY last_access"
+            ):
+                victims.append((url_key, body_hash))
+                excess -= size
+                if excess <= 0:
+                    break
+
+            self._conn.executemany("DELETE FROM responses WHERE url_key = ?",
+                                   [(url_key,) for url_key, _ in victims])
+            still_used = {
+                body_hash for (body_hash,) in self._conn.execute(
+                    f"SELECT body_hash FROM responses WHERE body_hash IN ({','.join('?' * len(victims))})",
+                    [body_hash for _, body_hash in victims]
+                )
+            }
+            self._conn.commit()
+            self.stats['evictions'] += len(victims)
+
+        for body_hash in {body_hash for _, body_hash in victims} - still_used:
+            try:
+                os.remove(self._blob_path(body_hash))
+            except OSError:
+                pass
+
+    def hit_ratio(self) -> float:
+        served = self.stats['hits'] + self.stats['revalidated']
+        total = served + self.stats['misses']
+        return served / total if total else 0.0
+
+    def clear(self):
+        """Tüm kayıtları sil"""
+        with self._lock:
+            hashes = [h for (h,) in self._conn.execute("SELECT DISTINCT body_hash FROM responses")]
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+        for body_hash in hashes:
+            try:
+                os.remove(self._blob_path(body_hash))
+            except OSError:
+                pass
+
+
+class CachedClient:
+    """
+    requests uyumlu bir istemciyi (Session / CloudScraper) önbellekle sarar.
+
+    Sadece `get` cache'lenir; diğer metodlar alttaki istemciye geçer.
+    """
+
+    def __init__(self, client, cache: ResponseCache, offline: Optional[bool] = None, limiter=None):
+        self.client = client
+        self.cache = cache
+        self.offline = HTTP_CACHE.get('offline', False) if offline is None else offline
+        self.limiter = limiter  # Sadece ağa çıkan istekler host limitine tabi
+
+    def _network_get(self, url: str, **kwargs) -> requests.Response:
+        if self.limiter is not None:
+            return self.limiter.get(self.client, url, **kwargs)
+        return self.client.get(url, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+    def get(self, url: str, params=None, **kwargs) -> requests.Response:
+        if params:
+            url = requests.Request('GET', url, params=params).prepare().url
+
+        ttl = self.cache.ttl_for(url)
+        if ttl <= 0 and not self.offline:
+            self.cache.stats['bypass'] += 1
+            return self._network_get(url, **kwargs)
+
+        entry = self.cache.lookup(url)
+
+        if entry and (self.offline or entry['expires_at'] > time.time()):
+            cached = self.cache.load(url, entry)
+            if cached is not None:
+                self.cache.stats['hits'] += 1
+                return cached
+
+        if self.offline:
+            self.cache.stats['misses'] += 1
+            response = requests.Response()
+            response.status_code = 504
+            response._content = b''
+            response.url = url
+            return response
+
+        # Süresi dolmuş kayıt: koşullu istek
+        headers = dict(kwargs.pop('headers', None) or {})
+        if entry:
+            if entry['etag']:
+                headers['If-None-Match'] = entry['etag']
+            if entry['last_modified']:
+                headers['If-Modified-Since'] = entry['last_modified']
+
+        response = self._network_get(url, headers=headers, **kwargs)
+
+        if response.status_code == 304 and entry:
+            cached = self.cache.load(url, entry)
+            if cached is not None:
+                self.cache.refresh(url, ttl)
+                self.cache.stats['revalidated'] += 1
+                return cached
+
+        self.cache.stats['misses'] += 1
+        if response.status_code == 200:
+            self.cache.store(url, response, ttl)
+        return response
+
+
+_default_cache: Optional[ResponseCache] = None
+_default_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """Process genelinde paylaşılan yanıt önbelleği"""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = ResponseCache()
+        return _default_cache
@@ -0,0 +1,197 @@
+"""
+HTTP Client - Process genelinde paylaşılan, bağlantı havuzlu HTTP istemcileri
+
+Scraper'lar kendi requests.Session / cloudscraper / httpx istemcilerini
+kurmak yerine buradan ödünç alır. Böylece aynı host'a giden istekler
+keep-alive bağlantıları ve TLS oturumlarını yeniden kullanır; httpx
+istemcileri HTTP/2 ile tek bağlantı üzerinden çoklar.
+
+CloudScraper bir requests.Session'dır (cookie ve Cloudflare challenge
+durumu taşır) ve thread-safe değildir; bu yüzden thread başına bir tane
+verilir. Aynı thread'deki çağıranlar aynı örneği paylaşır.
+
+Havuz boyutları config.SCRAPING içinden okunur.
+"""
+
+import asyncio
+import logging
+import threading
+import weakref
+from typing import TYPE_CHECKING, Dict, Optional
+
+import cloudscraper
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from config import HTTP_CACHE, SCRAPING
+
+if TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger(__name__)
+
+
+class HttpClientFactory:
+    """Paylaşılan bağlantı havuzlarını yöneten istemci fabrikası"""
+
+    def __init__(self, settings: Optional[Dict] = None):
+        settings = {**SCRAPING, **(settings or {})}
+        self.pool_connections = settings.get('http_pool_connections', 20)
+        self.pool_maxsize = settings.get('http_pool_maxsize', 20)
+        self.http2 = settings.get('http2', True)
+        self.keepalive_expiry = settings.get('http_keepalive_expiry', 30)
+        self.timeout = settings.get('timeout', 30)
+
+        self._lock = threading.Lock()
+        self._adapters: Dict[int, HTTPAdapter] = {}
+        self._cloudscrapers = []  # Tüm thread'lerin örnekleri (close için)
+        self._httpx_client = None
+        self._async_clients = weakref.WeakKeyDictionary()
+        self._local = threading.local()
+
+    def _adapter(self, retries: int = 0) -> HTTPAdapter:
+        """Aynı retry ayarını kullanan tüm session'lar aynı havuzu paylaşır"""
+        with self._lock:
+            adapter = self._adapters.get(retries)
+            if adapter is None:
+                max_retries = Retry(
+                    total=retries,
+                    backoff_factor=1,
+                    status_forcelist=[429, 500, 502, 503, 504]
+                ) if retries else 0
+                adapter = HTTPAdapter(
+                    pool_connections=self.pool_connections,
+                    pool_maxsize=self.pool_maxsize,
+                    max_retries=max_retries
+                )
+                self._adapters[retries] = adapter
+            return adapter
+
+    def session(self, headers: Optional[Dict] = None, retries: int = 0) -> requests.Session:
+        """
+        Paylaşılan havuza bağlı hafif bir requests.Session.
+
+        Her çağıran kendi header ve cookie'lerine sahip olur; alttaki
+        bağlantı havuzu (HTTPAdapter) process genelinde ortaktır.
+        """
+        session = requests.Session()
+        adapter = self._adapter(retries)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        if headers:
+            session.headers.update(headers)
+        return session
+
+    def cloudscraper(self):
+        """Cloudflare korumalı siteler için thread başına paylaşılan CloudScraper"""
+        scraper = getattr(self._local, 'cloudscraper', None)
+        if scraper is None:
+            scraper = cloudscraper.create_scraper()
+            # Cipher suite adapter'ının havuzunu büyüt
+            for adapter in scraper.adapters.values():
+                adapter.init_poolmanager(self.pool_connections, self.pool_maxsize)
+            self._local.cloudscraper = scraper
+            with self._lock:
+                self._cloudscrapers.append(scraper)
+        return scraper
+
+    def cached_cloudscraper(self):
+        """
+        Disk önbelleğinden geçen paylaşılan CloudScraper (keşif spider'ları).
+
+        Cache'te olmayan istekler host hız limitine (AIMD) tabidir. HTTP_CACHE
+        kapalıysa doğrudan CloudScraper döner.
+        """
+        if not HTTP_CACHE.get('enabled', True):
+            return self.cloudscraper()
+
+        from http_cache import CachedClient, get_response_cache
+        from rate_limiter import get_rate_limiter
+        return CachedClient(self.cloudscraper(), get_response_cache(), limiter=get_rate_limiter())
+
+    def _limits(self) -> 'httpx.Limits':
+        import httpx
+
+        return httpx.Limits(
+            max_connections=self.pool_connections * self.pool_maxsize,
+            max_keepalive_connections=self.pool_maxsize,
+            keepalive_expiry=self.keepalive_expiry
+        )
+
+    def httpx_client(self) -> 'httpx.Client':
+        """Paylaşılan senkron httpx istemcisi (HTTP/2). Kapatılmamalı."""
+        # httpx sadece kullanılırken gerekir; requests/cloudscraper kullanan scraper'lar onsuz çalışır
+        import httpx
+
+        with self._lock:
+            if self._httpx_client is None:
+                self._httpx_client = httpx.Client(
+                    http2=self.http2,
+                    limits=self._limits(),
+                    timeout=self.timeout,
+                    follow_redirects=True
+                )
+            return self._httpx_client
+
+    def async_client(self) -> 'httpx.AsyncClient':
+        """
+        Çalışan event loop'a bağlı paylaşılan httpx.AsyncClient.
+
+        AsyncClient bir loop'a bağlıdır; her loop için bir istemci tutulur
+        ve loop kapanınca bırakılır.
+        """
+        import httpx
+
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            client = httpx.AsyncClient(
+                http2=self.http2,
+                limits=self._limits(),
+                timeout=self.timeout,
+                follow_redirects=True
+            )
+            self._async_clients[loop] = client
+        return client
+
+    def run_sync(self, coro):
+        """
+        Coroutine'i thread'e ait kalıcı bir event loop'ta çalıştır.
+
+        asyncio.run her çağrıda yeni loop (ve yeni bağlantılar) açar; bu
+        yardımcı aynı thread'deki ardışık çağrıların async istemciyi ve
+        bağlantılarını yeniden kullanmasını sağlar.
+        """
+        loop = getattr(self._local, 'loop', None)
+        if loop is None or loop.is_closed():
+            loop = asyncio.new_event_loop()
+            self._local.loop = loop
+        return loop.run_until_complete(coro)
+
+    def close(self):
+        """Senkron istemcileri kapat"""
+        with self._lock:
+            for adapter in self._adapters.values():
+                adapter.close()
+            self._adapters.clear()
+            for scraper in self._cloudscrapers:
+                scraper.close()
+            self._cloudscrapers.clear()
+            self._local.__dict__.pop('cloudscraper', None)
+            if self._httpx_client is not None:
+                self._httpx_client.close()
+                self._httpx_client = None
+
+
+_default_factory: Optional[HttpClientFactory] = None
+_default_lock = threading.Lock()
+
+
+def get_http_clients() -> HttpClientFactory:
+    """Process genelinde paylaşılan istemci fabrikası"""
+    global _default_factory
+    with _default_lock:
+        if _default_factory is None:
+            _default_factory = HttpClientFactory()
+        return _default_factory
@@ -10,33 +10,30 @@ from datetime import datetime
 import json
 import time
 import random
+from http_client import get_http_clients
 
 def scrape_with_httpx():
     """HTTPX ile HTTP/2 kullanarak Trendyol'dan veri çek"""
 
     ua = UserAgent()
 
-    # HTTP/2 destekli client
-    client = httpx.Client(
-        http2=True,
-        follow_redirects=True,
-        timeout=30.0,
-        headers={
-            'User-Agent': ua.chrome,
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-            'Accept-Language': 'tr-TR,tr;q=0.9,en-US;q=0.8',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'DNT': '1',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-            'Sec-Fetch-Dest': 'document',
-            'Sec-Fetch-Mode': 'navigate',
-            'Sec-Fetch-Site': 'none',
-            'Sec-Ch-Ua': '"Not_A Brand";v="8", "Chromium";v="120"',
-            'Sec-Ch-Ua-Mobile': '?0',
-            'Sec-Ch-Ua-Platform': '"Windows"',
-        }
-    )
+    # Paylaşılan HTTP/2 client (bağlantı havuzu process genelinde)
+    client = get_http_clients().httpx_client()
+    headers = {
+        'User-Agent': ua.chrome,
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+        'Accept-Language': 'tr-TR,tr;q=0.9,en-US;q=0.8',
+        'Accept-Encoding': 'gzip, deflate, br',
+        'DNT': '1',
+        'Connection': 'keep-alive',
+        'Upgrade-Insecure-Requests': '1',
+        'Sec-Fetch-Dest': 'document',
+        'Sec-Fetch-Mode': 'navigate',
+        'Sec-Fetch-Site': 'none',
+        'Sec-Ch-Ua': '"Not_A Brand";v="8", "Chromium";v="120"',
+        'Sec-Ch-Ua-Mobile': '?0',
+        'Sec-Ch-Ua-Platform': '"Windows"',
+    }
 
     conn = sqlite3.connect('market_spider.db')
     cursor = conn.cursor()
@@ -62,7 +59,7 @@ def scrape_with_httpx():
         time.sleep(random.uniform(2, 4))
 
         try:
-            response = client.get(url)
+            response = client.get(url, headers=headers)
             print(f"   Status: {response.status_code}")
 
             if response.status_code == 200:
@@ -132,7 +129,6 @@ def scrape_with_httpx():
     print("="*60)
 
     conn.close()
-    client.close()
 
 if __name__ == "__main__":
     scrape_with_httpx()
\ No newline at end of file
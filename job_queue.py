@@ -0,0 +1,544 @@
+#!/usr/bin/env python3
+"""
+Job Queue - Veritabanında kira (lease) tabanlı dağıtık iş kuyruğu
+
+İşler scrape_jobs tablosunda durur. Worker'lar (aynı makinede ya da farklı
+makinelerde, aynı veritabanına bağlı) işleri süreli kira ile alır:
+
+- claim: bekleyen işler tek UPDATE ile worker'a kiralanır (iki worker aynı
+  işi alamaz)
+- renew: çalışan worker kirayı heartbeat ile uzatır
+- complete / fail: iş sadece kira sahibi tarafından kapatılır
+- expire: kirası yenilenmeyen (öldürülmüş worker'ın) işleri kuyruğa geri alır
+
+İş tipleri: 'site_url' (SiteUrl kaydı), 'category_page' (kategori sayfası,
+alt kategoriler yeni iş olarak eklenir), 'review_pages' (ürün yorumlarının
+bir sayfa aralığı).
+
+Kullanım:
+    python job_queue.py enqueue-site-urls [--site trendyol] [--all]
+    python job_queue.py enqueue-categories https://www.trendyol.com
+    python job_queue.py worker [--processes 4]
+    python job_queue.py stats
+"""
+
+import argparse
+import logging
+import multiprocessing
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from config import JOB_QUEUE
+from database import SessionLocal, ScrapeJob
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[Dict, 'JobQueue'], Optional[Dict]]
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+class JobQueue:
+    """scrape_jobs tablosu üzerinde kira tabanlı kuyruk işlemleri"""
+
+    def __init__(self, session_factory=None, worker_id: Optional[str] = None,
+                 settings: Optional[Dict] = None):
+        self.session_factory = session_factory or SessionLocal
+        self.session = self.session_factory()
+        self.worker_id = worker_id or default_worker_id()
+        self.settings = {**JOB_QUEUE, **(settings or {})}
+        self.lease = timedelta(seconds=self.settings['lease_seconds'])
+        self._last_expire = 0.0
+
+    def _write(self, statement) -> int:
+        """UPDATE'i commit et; SQLite kilit çakışmasında kısa bekleyip tekrar dene"""
+        for attempt in range(5):
+            try:
+                rowcount = self.session.execute(statement, execution_options={'synchronize_session': False}).rowcount
+                self.session.commit()
+                return rowcount
+            except OperationalError as e:
+                self.session.rollback()
+                if 'locked' not in str(e) or attempt == 4:
+                    raise
+                time.sleep(0.1 * (attempt + 1))
+
+    def enqueue(self, job_type: str, payload: Dict, job_key: Optional[str] = None,
+                priority: int = 1) -> Optional[int]:
+        """İş ekle; aynı job_key zaten kuyruktaysa None"""
+        job = ScrapeJob(
+            job_type=job_type,
+            job_key=job_key or f"{job_type}:{uuid.uuid4().hex}",
+            payload=payload,
+            priority=priority,
+            status='pending',
+            attempts=0,
+            max_attempts=self.settings['max_attempts']
+        )
+        self.session.add(job)
+        try:
+            self.session.commit()
+        except IntegrityError:
+            self.session.rollback()
+            return None
+        return job.id
+
+    def enqueue_many(self, jobs: List[Dict]) -> int:
+        """[{'job_type', 'payload', 'job_key', 'priority'}] - var olan job_key'ler atlanır"""
+        keys = [job['job_key'] for job in jobs]
+        known = set()
+        for start in range(0, len(keys), 500):
+            known.update(key for (key,) in self.session.query(ScrapeJob.job_key).filter(
+                ScrapeJob.job_key.in_(keys[start:start + 500])))
+
+        added = 0
+        for job in jobs:
+            if job['job_key'] in known:
+                continue
+            known.add(job['job_key'])
+            self.session.add(ScrapeJob(
+                job_type=job['job_type'],
+                job_key=job['job_key'],
+                payload=job['payload'],
+                priority=job.get('priority', 1),
+                status='pending',
+                attempts=0,
+                max_attempts=self.settings['max_attempts']
+            ))
+            added += 1
+        self.session.commit()
+        return added
+
+    def expire(self) -> int:
+        """Kirası dolmuş işleri kuyruğa geri al (deneme hakkı bitenler 'failed')"""
+        now = datetime.utcnow()
+        expired = (ScrapeJob.status == 'leased') & (ScrapeJob.lease_expires_at <= now)
+
+        failed = self._write(
+            update(ScrapeJob)
+            .where(expired, ScrapeJob.attempts >= ScrapeJob.max_attempts)
+            .values(status='failed', error='Kira süresi doldu (worker yanıt vermedi)',
+                    lease_owner=None, lease_token=None, finished_at=now)
+        )
+        recovered = self._write(
+            update(ScrapeJob)
+            .where(expired)
+            .values(status='pending', lease_owner=None, lease_token=None, lease_expires_at=None)
+        )
+        if recovered or failed:
+            logger.warning(f"♻️ Kirası dolan {recovered} iş kuyruğa döndü, {failed} iş başarısız")
+        return recovered
+
+    def claim(self, limit: Optional[int] = None) -> List[Dict]:
+        """Bekleyen en öncelikli işleri tek UPDATE ile kirala"""
+        # Süresi dolan kiraları ara ara topla (her claim'de yazma kilidi almamak için)
+        if time.monotonic() - self._last_expire >= self.settings['heartbeat_seconds']:
+            self._last_expire = time.monotonic()
+            self.expire()
+
+        limit = limit or self.settings['claim_batch']
+        now = datetime.utcnow()
+        token = uuid.uuid4().hex
+        available = (ScrapeJob.status == 'pending') & or_(
+            ScrapeJob.lease_expires_at.is_(None), ScrapeJob.lease_expires_at <= now
+        )
+
+        candidates = (
+            select(ScrapeJob.id)
+            .where(available)
+            .order_by(ScrapeJob.priority, ScrapeJob.id)
+            .limit(limit)
+            .scalar_subquery()
+        )
+        claimed = self._write(
+            update(ScrapeJob)
+            .where(ScrapeJob.id.in_(candidates), available)
+            .values(status='leased', lease_owner=self.worker_id, lease_token=token,
+                    lease_expires_at=now + self.lease, heartbeat_at=now,
+                    attempts=ScrapeJob.attempts + 1)
+        )
+        if not claimed:
+            return []
+
+        jobs = self.session.query(ScrapeJob).filter(ScrapeJob.lease_token == token).all()
+        result = [{
+            'id': job.id,
+            'job_type': job.job_type,
+            'payload': job.payload or {},
+            'attempts': job.attempts,
+            'lease_token': token
+        } for job in jobs]
+        self.session.rollback()
+        return result
+
+    def _owned(self, job: Dict):
+        return ((ScrapeJob.id == job['id']) & (ScrapeJob.lease_token == job['lease_token']) &
+                (ScrapeJob.status == 'leased'))
+
+    def renew(self, jobs: List[Dict]) -> int:
+        """Kiraları uzat (heartbeat); kaybedilen kiralar sayılmaz"""
+        now = datetime.utcnow()
+        renewed = 0
+        for job in jobs:
+            renewed += self._write(
+                update(ScrapeJob).where(self._owned(job))
+                .values(lease_expires_at=now + self.lease, heartbeat_at=now)
+            )
+        return renewed
+
+    def complete(self, job: Dict, result: Optional[Dict] = None) -> bool:
+        """İşi tamamla; kira başkasına geçtiyse False"""
+        now = datetime.utcnow()
+        return self._write(
+            update(ScrapeJob).where(self._owned(job))
+            .values(status='done', result=result, error=None, lease_owner=None,
+                    lease_token=None, lease_expires_at=None, finished_at=now)
+        ) == 1
+
+    def fail(self, job: Dict, error: str) -> bool:
+        """Hata: deneme hakkı varsa gecikmeli olarak kuyruğa geri koy"""
+        now = datetime.utcnow()
+        retry_at = now + timedelta(seconds=self.settings['retry_delay_seconds'])
+        owned = self._owned(job)
+        retried = self._write(
+            update(ScrapeJob).where(owned, ScrapeJob.attempts < ScrapeJob.max_attempts)
+            .values(status='pending', error=error[:1000], lease_owner=None,
+                    lease_token=None, lease_expires_at=retry_at)
+        )
+        if retried:
+            return True
+        return self._write(
+            update(ScrapeJob).where(owned)
+            .values(status='failed', error=error[:1000], lease_owner=None,
+                    lease_token=None, lease_expires_at=None, finished_at=now)
+        ) == 1
+
+    def stats(self) -> Dict[str, int]:
+        counts = dict(self.session.query(ScrapeJob.status, func.count(ScrapeJob.id)).group_by(ScrapeJob.status))
+        self.session.rollback()
+        return {status: counts.get(status, 0) for status in ('pending', 'leased', 'done', 'failed')}
+
+    def close(self):
+        self.session.close()
+
+
+class QueueWorker:
+    """Kuyruktan iş alıp handler'ları çalıştıran worker (heartbeat thread'i ile)"""
+
+    def __init__(self, handlers: Optional[Dict[str, Handler]] = None, session_factory=None,
+                 worker_id: Optional[str] = None, settings: Optional[Dict] = None):
+        self.handlers = handlers or HANDLERS
+        self.queue = JobQueue(session_factory, worker_id, settings)
+        self.settings = self.queue.settings
+        self.stats = {'done': 0, 'failed': 0, 'lost': 0}
+        self._active: List[Dict] = []
+        self._stop = threading.Event()
+
+    def _heartbeat(self):
+        # Ayrı session: ana thread'in session'ı iş sırasında kullanımda
+        queue = JobQueue(self.queue.session_factory, self.queue.worker_id, self.settings)
+        try:
+            while not self._stop.wait(self.settings['heartbeat_seconds']):
+                for job in list(self._active):
+                    # Bu arada tamamlanan işin kirası zaten kapanmıştır
+                    if not queue.renew([job]) and job in self._active:
+                        logger.warning(f"⚠️ İş {job['id']} kirası kaybedildi (başka worker'a geçmiş olabilir)")
+        finally:
+            queue.close()
+
+    def run_job(self, job: Dict):
+        handler = self.handlers.get(job['job_type'])
+        try:
+            if handler is None:
+                raise ValueError(f"Bilinmeyen iş tipi: {job['job_type']}")
+            result = handler(job['payload'], self.queue)
+        except Exception as e:
+            logger.error(f"İş {job['id']} ({job['job_type']}) başarısız: {e}")
+            self.queue.session.rollback()
+            self.queue.fail(job, str(e))
+            self.stats['failed'] += 1
+            return
+
+        if self.queue.complete(job, result):
+            self.stats['done'] += 1
+        else:
+            self.stats['lost'] += 1
+
+    def run(self, max_jobs: Optional[int] = None, stop_when_empty: bool = False) -> Dict:
+        """Kuyruk boşalana (stop_when_empty) ya da max_jobs'a kadar çalış"""
+        heartbeat = threading.Thread(target=self._heartbeat, daemon=True)
+        heartbeat.start()
+        processed = 0
+        try:
+            while max_jobs is None or processed < max_jobs:
+                jobs = self.queue.claim()
+                if not jobs:
+                    if stop_when_empty and not self.queue.stats()['leased']:
+                        break
+                    time.sleep(self.settings['poll_seconds'])
+                    continue
+
+                for job in jobs:
+                    self._active.append(job)
+                    try:
+                        self.run_job(job)
+                    finally:
+                        self._active.remove(job)
+                    processed += 1
+        finally:
+            self._stop.set()
+            self.queue.close()
+        return self.stats
+
+
+# --- İş tipleri -------------------------------------------------------------
+
+_local = threading.local()
+
+
+def _site_url_scheduler():
+    """Worker başına MarketSpider + SiteUrlScheduler (scraper kayıtları ve ürün yazıcısı)"""
+    if not hasattr(_local, 'scheduler'):
+        from main import MarketSpider
+        from scrape_scheduler import SiteUrlScheduler
+        _local.scheduler = SiteUrlScheduler(MarketSpider())
+    return _local.scheduler
+
+
+def handle_site_url(payload: Dict, queue: JobQueue) -> Dict:
+    """SiteUrl kaydını çek ve kaydet"""
+    scheduler = _site_url_scheduler()
+    site_url = scheduler.load(payload['site_url_id'])
+    if site_url is None:
+        raise ValueError(f"SiteUrl bulunamadı: {payload['site_url_id']}")
+    if site_url.site_key not in scheduler.spider.scrapers:
+        raise ValueError(f"Scraper bulunamadı: {site_url.site_key}")
+    try:
+        return scheduler.save_result(site_url, scheduler.run_job(site_url))
+    except Exception as e:
+        scheduler.record_failure(site_url, str(e))
+        raise
+
+
+def handle_category_page(payload: Dict, queue: JobQueue) -> Dict:
+    """Kategori sayfasını kaydet, alt kategorileri yeni iş olarak ekle"""
+    from bs4 import BeautifulSoup
+    from deep_category_spider import DeepCategorySpider
+    from url_dedup import canonicalize_url
+
+    if not hasattr(_local, 'category_spider'):
+        _local.category_spider = DeepCategorySpider()
+    spider = _local.category_spider
+    spider.base_url = payload['base_url']
+    spider.domain = payload['domain']
+
+    depth = payload.get('depth', 0)
+    info = {
+        'id': payload.get('category_id'),
+        'name': payload.get('name'),
+        'url': payload['url'],
+        'level': depth,
+        'path': payload.get('path'),
+        'best_sellers_url': spider._add_bestseller_param(payload['url'])
+    }
+
+    children = []
+    if depth < payload.get('max_depth', spider.max_depth):
+        response = spider.scraper.get(payload['url'], headers=spider.headers, timeout=10)
+        if response.status_code != 200:
+            raise RuntimeError(f"HTTP {response.status_code}")
+        children = spider._extract_subcategory_links(BeautifulSoup(response.text, 'html.parser'), payload['url'])
+
+    info.update(has_children=bool(children), child_count=len(children))
+    if payload.get('site_id'):
+        spider.save_to_database(payload['site_id'], [info])
+
+    added = queue.enqueue_many([{
+        'job_type': 'category_page',
+        'job_key': f"category_page:{canonicalize_url(child['url'])}",
+        'priority': depth + 1,  # Sığ seviyeler önce (BFS)
+        'payload': {
+            **payload,
+            'url': child['url'],
+            'category_id': child['id'],
+            'name': child['name'],
+            'path': f"{payload.get('path')}/{child['name']}",
+            'depth': depth + 1
+        }
+    } for child in children])
+    return {'children': len(children), 'enqueued': added}
+
+
+def handle_review_pages(payload: Dict, queue: JobQueue) -> Dict:
+    """Bir ürünün yorumlarının [start_page, end_page) aralığını çek ve upsert et"""
+    from persistence import ReviewUpserter
+    from review_fetcher import ConcurrentReviewFetcher
+
+    if not hasattr(_local, 'review_fetcher'):
+        _local.review_fetcher = ConcurrentReviewFetcher(page_size=payload.get('page_size', 50))
+
+    upserter = ReviewUpserter(queue.session)
+    totals = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+
+    def save_page(reviews: List[Dict]):
+        stats = upserter.upsert(payload['product_id'], reviews)
+        for key in totals:
+            totals[key] += stats[key]
+
+    pages = range(payload['start_page'], payload['end_page'])
+    totals['fetched'] = _local.review_fetcher.fetch_pages_sync(payload['trendyol_id'], pages, save_page)
+    return totals
+
+
+HANDLERS: Dict[str, Handler] = {
+    'site_url': handle_site_url,
+    'category_page': handle_category_page,
+    'review_pages': handle_review_pages,
+}
+
+
+# --- Kuyruğa iş ekleme ----------------------------------------------------
+
+def enqueue_site_urls(queue: JobQueue, site_key: Optional[str] = None, due_only: bool = True) -> int:
+    """SiteUrl kayıtlarını (varsayılan: sadece vadesi gelenler) iş olarak ekle"""
+    from database import SiteConfig, SiteUrl
+
+    if due_only:
+        from main import MarketSpider
+        from scrape_scheduler import SiteUrlScheduler
+        scheduler = SiteUrlScheduler(MarketSpider(), session=queue.session)
+        rows = [(site_url.id, site_url.priority, site_url.site_key) for site_url in scheduler.due_jobs(limit=10 ** 6)]
+    else:
+        rows = queue.session.query(SiteUrl.id, SiteUrl.priority, SiteConfig.site_key).join(
+            SiteConfig, SiteUrl.site_id == SiteConfig.id).filter(SiteUrl.is_active.is_(True)).all()
+
+    # Anahtar saate göre: aynı saatte tekrar eklenmez, tamamlanan iş sonra yeniden eklenebilir
+    slot = datetime.utcnow().strftime('%Y%m%d%H')
+    return queue.enqueue_many([{
+        'job_type': 'site_url',
+        'job_key': f"site_url:{site_url_id}:{slot}",
+        'priority': priority or 1,
+        'payload': {'site_url_id': site_url_id}
+    } for site_url_id, priority, key in rows if site_key is None or key == site_key])
+
+
+def enqueue_category_crawl(queue: JobQueue, site_url: str, site_id: Optional[int] = None,
+                           max_depth: Optional[int] = None) -> int:
+    """Sitenin ana kategorilerini derinlik 0 işleri olarak ekle"""
+    from urllib.parse import urlparse
+    from deep_category_spider import DeepCategorySpider
+    from url_dedup import canonicalize_url
+
+    spider = DeepCategorySpider(max_depth)
+    spider.base_url = site_url.rstrip('/')
+    spider.domain = urlparse(site_url).netloc.lower()
+
+    return queue.enqueue_many([{
+        'job_type': 'category_page',
+        'job_key': f"category_page:{canonicalize_url(seed['url'])}",
+        'priority': 0,
+        'payload': {
+            'url': seed['url'],
+            'category_id': seed['id'],
+            'name': seed['name'],
+            'path': seed['name'],
+            'depth': 0,
+            'max_depth': spider.max_depth,
+            'site_id': site_id,
+            'base_url': spider.base_url,
+            'domain': spider.domain
+        }
+    } for seed in spider._main_categories()])
+
+
+def enqueue_review_pages(queue: JobQueue, product_id: int, trendyol_id: str,
+                         total_pages: int, pages_per_job: int = 10) -> int:
+    """Bir ürünün yorum sayfalarını pages_per_job'luk parçalara böl"""
+    return queue.enqueue_many([{
+        'job_type': 'review_pages',
+        'job_key': f"review_pages:{product_id}:{start}",
+        'priority': 2,
+        'payload': {
+            'product_id': product_id,
+            'trendyol_id': trendyol_id,
+            'start_page': start,
+            'end_page': min(start + pages_per_job, total_pages)
+        }
+    } for start in range(0, total_pages, pages_per_job)])
+
+
+def _worker_process(max_jobs: Optional[int], stop_when_empty: bool):
+    from database import engine
+    engine.dispose(close=False)  # Fork ile gelen bağlantıları paylaşma
+    stats = QueueWorker().run(max_jobs=max_jobs, stop_when_empty=stop_when_empty)
+    logger.info(f"Worker bitti: {stats}")
+
+
+def run_workers(processes: int = 1, max_jobs: Optional[int] = None, stop_when_empty: bool = False):
+    """Bu makinede N worker process'i çalıştır"""
+    if processes <= 1:
+        return _worker_process(max_jobs, stop_when_empty)
+
+    workers = [multiprocessing.Process(target=_worker_process, args=(max_jobs, stop_when_empty))
+               for _ in range(processes)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(processName)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="Dağıtık scraping iş kuyruğu")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    worker = commands.add_parser('worker', help="Kuyruktan iş alıp çalıştır")
+    worker.add_argument('--processes', type=int, default=1)
+    worker.add_argument('--max-jobs', type=int)
+    worker.add_argument('--stop-when-empty', action='store_true')
+
+    site_urls = commands.add_parser('enqueue-site-urls', help="SiteUrl kayıtlarını kuyruğa ekle")
+    site_urls.add_argument('--site')
+    site_urls.add_argument('--all', action='store_true', help="Vadesi gelmemişleri de ekle")
+
+    categories = commands.add_parser('enqueue-categories', help="Kategori taramasını kuyruğa ekle")
+    categories.add_argument('site_url')
+    categories.add_argument('--site-id', type=int)
+    categories.add_argument('--max-depth', type=int)
+
+    commands.add_parser('stats', help="Kuyruk durumu")
+
+    args = parser.parse_args()
+
+    from database import engine
+    ScrapeJob.__table__.create(bind=engine, checkfirst=True)
+
+    if args.command == 'worker':
+        run_workers(args.processes, args.max_jobs, args.stop_when_empty)
+        return
+
+    queue = JobQueue()
+    try:
+        if args.command == 'enqueue-site-urls':
+            print(f"✅ {enqueue_site_urls(queue, args.site, due_only=not args.all)} iş eklendi")
+        elif args.command == 'enqueue-categories':
+            print(f"✅ {enqueue_category_crawl(queue, args.site_url, args.site_id, args.max_depth)} iş eklendi")
+        queue.expire()
+        print(f"📊 Kuyruk: {queue.stats()}")
+    finally:
+        queue.close()
+
+
+if __name__ == "__main__":
+    main()
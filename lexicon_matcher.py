@@ -0,0 +1,97 @@
+"""
+Lexicon Matcher - Aho–Corasick çoklu kalıp eşleştirici
+
+Tüm sözlük kalıplarını tek bir otomatta derler; metin üzerinden tek geçişte
+bütün eşleşmeleri (konum + kalıp) bulur. Çalışma süresi metin uzunluğu ve
+eşleşme sayısıyla doğrusaldır, sözlük büyüklüğünden bağımsızdır.
+"""
+
+import re
+from bisect import bisect_right
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Set, Tuple
+
+
+_WORD_RE = re.compile(r'\S+')
+
+
+class AhoCorasick:
+    """Karakter tabanlı Aho–Corasick otomatı"""
+
+    def __init__(self, patterns: Iterable[str]):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.outputs: List[List[str]] = [[]]
+
+        for pattern in dict.fromkeys(p for p in patterns if p):
+            self._add(pattern)
+        self._build()
+
+    def _add(self, pattern: str):
+        state = 0
+        for char in pattern:
+            next_state = self.goto[state].get(char)
+            if next_state is None:
+                next_state = len(self.goto)
+                self.goto[state][char] = next_state
+                self.goto.append({})
+                self.fail.append(0)
+                self.outputs.append([])
+            state = next_state
+        self.outputs[state].append(pattern)
+
+    def _build(self):
+        """Failure linklerini BFS ile kur, çıktıları birleştir"""
+        queue = deque([0])
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(char, 0) if state else 0
+                self.outputs[next_state] = self.outputs[next_state] + self.outputs[self.fail[next_state]]
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, str]]:
+        """(başlangıç_indeksi, kalıp) çiftlerini üret"""
+        goto, fail, outputs = self.goto, self.fail, self.outputs
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for pattern in outputs[state]:
+                yield index - len(pattern) + 1, pattern
+
+
+class LexiconHits:
+    """Normalize metin üzerindeki tek geçişlik eşleşme sonucu"""
+
+    __slots__ = ('words', 'found', 'word_hits')
+
+    def __init__(self, words: List[str], found: Set[str], word_hits: Set[Tuple[int, str]]):
+        self.words = words          # text.split() sonucu
+        self.found = found          # Metinde geçen tüm kalıplar
+        self.word_hits = word_hits  # (kelime_indeksi, kalıp): kalıp o kelimenin içinde
+
+
+def scan_text(matcher: AhoCorasick, text: str) -> LexiconHits:
+    """
+    Normalize metni tara.
+
+    Boşluk içermeyen bir kalıbın her eşleşmesi tam olarak bir kelimenin
+    (text.split() elemanının) içinde kalır; bu eşleşmeler kelime indeksiyle
+    birlikte saklanır.
+    """
+    words = text.split()
+    word_starts = [match.start() for match in _WORD_RE.finditer(text)]
+
+    found = set()
+    word_hits = set()
+    for start, pattern in matcher.iter_matches(text):
+        found.add(pattern)
+        if ' ' not in pattern:
+            word_hits.add((bisect_right(word_starts, start) - 1, pattern))
+
+    return LexiconHits(words, found, word_hits)
@@ -2,21 +2,19 @@
 Market Spider - Ana Kontrol Modülü
 """
 
-import sys
-import os
-import asyncio
+import argparse
 import time
-from datetime import datetime, timedelta
 from typing import List, Dict
 import logging
-from concurrent.futures import ThreadPoolExecutor, as_completed
 import schedule
 import threading
 
-from sqlalchemy.orm import Session
-from database import init_database, get_db, Product, PriceHistory, RankingHistory, ScrapeLog
-from config import ECOMMERCE_SITES, SCRAPING, SCHEDULER
-from base_scraper import ProductNormalizer
+from database import init_database, read_session, Product, PriceHistory, ScrapeLog
+from config import SCHEDULER
+from db_writer import get_db_writer
+from async_engine import run_engine
+from scrape_scheduler import SiteUrlScheduler, in_active_window
+from sharding import Shard, add_shard_arguments, format_shard, merge_shard_databases
 
 # Scraper'ları import et
 from scrapers.trendyol_scraper import TrendyolScraper
@@ -32,12 +30,17 @@ logger = logging.getLogger(__name__)
 
 
 class MarketSpider:
-    """Ana spider kontrol sınıfı"""
+    """Ana spider kontrol sınıfı
+
+    Spider session tutmaz: yazmalar process'in tek yazıcısına (db_writer)
+    gider, okumalar kısa ömürlü read_session() ile yapılır. Böylece worker
+    thread'leri ortak bir session'ı paylaşmaz ve SQLite yazma kilidi için yarışmaz.
+    """
 
     def __init__(self):
         self.scrapers = {}
         self.init_scrapers()
-        self.db = next(get_db())
+        self.writer = get_db_writer()
 
     def init_scrapers(self):
         """Tüm scraper'ları başlat"""
@@ -52,126 +55,15 @@ class MarketSpider:
 
     def scrape_site(self, site_key: str) -> Dict:
         """Tek bir siteyi scrape et"""
-        start_time = time.time()
-        result = {
-            'site': site_key,
-            'products_found': 0,
-            'products_updated': 0,
-            'errors': [],
-            'duration': 0
-        }
-
-        try:
-            site_config = ECOMMERCE_SITES.get(site_key)
-            if not site_config:
-                raise ValueError(f"Site config bulunamadı: {site_key}")
-
-            scraper_class = self.scrapers.get(site_key)
-            if not scraper_class:
-                raise ValueError(f"Scraper bulunamadı: {site_key}")
-
-            logger.info(f"🔍 {site_key} scraping başladı...")
-            scraper = scraper_class(site_config)
-
-            all_products = []
-
-            # En çok satanlar listelerini tara
-            for url in site_config['best_sellers_urls']:
-                try:
-                    if 'api' in site_key:  # API destekli siteler
-                        products = scraper.scrape_best_sellers_api()
-                    else:
-                        full_url = f"{site_config['base_url']}{url}" if not url.startswith('http') else url
-                        products = scraper.scrape_best_sellers(full_url)
-
-                    all_products.extend(products)
-                    logger.info(f"  ✓ {len(products)} ürün bulundu: {url}")
-
-                except Exception as e:
-                    logger.error(f"  ✗ Hata {url}: {str(e)}")
-                    result['errors'].append(str(e))
+        return run_engine(self, [site_key])[0]
 
-                time.sleep(site_config.get('rate_limit', 2))
-
-            # Veritabanına kaydet
-            for product_data in all_products:
-                try:
-                    normalized = ProductNormalizer.normalize_product(product_data, site_key)
-                    self.save_product_to_db(normalized)
-                    result['products_updated'] += 1
-                except Exception as e:
-                    logger.error(f"DB kayıt hatası: {e}")
-
-            result['products_found'] = len(all_products)
-            scraper.close()
-
-        except Exception as e:
-            logger.error(f"Site scraping hatası {site_key}: {str(e)}")
-            result['errors'].append(str(e))
-
-        result['duration'] = time.time() - start_time
-
-        # Log kaydet
-        self.save_scrape_log(site_key, result)
-
-        logger.info(f"✅ {site_key} tamamlandı: {result['products_found']} ürün, "
-                   f"{result['duration']:.2f} saniye")
-
-        return result
+    def save_products_to_db(self, products: List[Dict], batch_size: int = None) -> List[Dict]:
+        """Ürünleri toplu olarak kaydet (yazıcı thread'inde), batch başına sayaçları döndür"""
+        return self.writer.write_products(products, batch_size=batch_size).result()
 
     def save_product_to_db(self, product_data: Dict):
         """Ürünü veritabanına kaydet veya güncelle"""
-        try:
-            # Ürün var mı kontrol et
-            product = self.db.query(Product).filter_by(
-                product_id=product_data['product_id'],
-                site_name=product_data['site_name']
-            ).first()
-
-            if not product:
-                # Yeni ürün ekle
-                product = Product(
-                    product_id=product_data['product_id'],
-                    name=product_data['name'],
-                    brand=product_data['brand'],
-                    category=product_data['category'],
-                    sub_category=product_data['sub_category'],
-                    site_name=product_data['site_name'],
-                    product_url=product_data['product_url'],
-                    image_url=product_data['image_url']
-                )
-                self.db.add(product)
-                self.db.flush()
-
-            # Fiyat geçmişi ekle
-            price_history = PriceHistory(
-                product_id=product.id,
-                price=product_data['price'],
-                original_price=product_data.get('original_price'),
-                discount_percentage=product_data.get('discount_percentage'),
-                currency=product_data['currency'],
-                in_stock=product_data['in_stock'],
-                seller_name=product_data.get('seller_name'),
-                seller_rating=product_data.get('seller_rating')
-            )
-            self.db.add(price_history)
-
-            # Ranking geçmişi ekle
-            ranking_history = RankingHistory(
-                product_id=product.id,
-                rank_position=product_data['rank_position'],
-                total_reviews=product_data.get('total_reviews'),
-                average_rating=product_data.get('average_rating'),
-                sales_count=product_data.get('sales_count'),
-                list_type=product_data['list_type']
-            )
-            self.db.add(ranking_history)
-
-            self.db.commit()
-
-        except Exception as e:
-            self.db.rollback()
-            raise e
+        self.save_products_to_db([product_data])
 
     def save_scrape_log(self, site_name: str, result: Dict):
         """Scrape log'u kaydet"""
@@ -184,30 +76,16 @@ class MarketSpider:
                 error_message='; '.join(result['errors']) if result['errors'] else None,
                 duration_seconds=result['duration']
             )
-            self.db.add(log)
-            self.db.commit()
-        except:
-            self.db.rollback()
+            self.writer.add(log).result()
+        except Exception as e:
+            logger.warning(f"Scrape log kaydedilemedi ({site_name}): {e}")
 
-    def scrape_all_sites(self):
-        """Tüm siteleri paralel olarak scrape et"""
+    def scrape_all_sites(self, shard: Shard = None):
+        """Tüm siteleri asyncio motoru ile eşzamanlı scrape et"""
         logger.info("🚀 Tüm siteler için scraping başlıyor...")
         start_time = time.time()
 
-        results = []
-        with ThreadPoolExecutor(max_workers=SCRAPING['max_workers']) as executor:
-            futures = {
-                executor.submit(self.scrape_site, site_key): site_key
-                for site_key in self.scrapers.keys()
-            }
-
-            for future in as_completed(futures):
-                site_key = futures[future]
-                try:
-                    result = future.result()
-                    results.append(result)
-                except Exception as e:
-                    logger.error(f"Thread hatası {site_key}: {e}")
+        results = run_engine(self, list(self.scrapers.keys()), shard=shard)
 
         total_duration = time.time() - start_time
         total_products = sum(r['products_found'] for r in results)
@@ -219,36 +97,67 @@ class MarketSpider:
 
     def get_statistics(self) -> Dict:
         """İstatistikleri al"""
-        stats = {
-            'total_products': self.db.query(Product).count(),
-            'total_price_records': self.db.query(PriceHistory).count(),
-            'sites_tracked': len(self.scrapers),
-            'last_scrape': None
-        }
+        with read_session() as db:
+            stats = {
+                'total_products': db.query(Product).count(),
+                'total_price_records': db.query(PriceHistory).count(),
+                'sites_tracked': len(self.scrapers),
+                'last_scrape': None
+            }
 
-        last_log = self.db.query(ScrapeLog).order_by(ScrapeLog.timestamp.desc()).first()
-        if last_log:
-            stats['last_scrape'] = last_log.timestamp.isoformat()
+            last_log = db.query(ScrapeLog).order_by(ScrapeLog.timestamp.desc()).first()
+            if last_log:
+                stats['last_scrape'] = last_log.timestamp.isoformat()
 
         return stats
 
 
 def run_scheduled_scraping():
-    """Zamanlanmış scraping görevi"""
+    """Zamanlanmış scraping görevi (SiteUrl kaydı yoksa tüm siteler)"""
     spider = MarketSpider()
     spider.scrape_all_sites()
 
 
+def run_due_jobs(scheduler: SiteUrlScheduler):
+    """Vadesi gelen SiteUrl işlerini çalıştır (aktif saatler dışında bekle)"""
+    if not in_active_window():
+        return
+    try:
+        scheduler.dispatch()
+    except Exception as e:
+        logger.error(f"Planlayıcı turu başarısız: {e}")
+        scheduler.session.rollback()
+
+
+def run_shard(spider: MarketSpider, shard: Shard, all_urls: bool = False):
+    """Bir CI shard'ını etkileşimsiz çalıştır: SiteUrl işleri (yoksa config URL'leri) bölünür"""
+    logger.info(f"🧩 Shard {format_shard(shard)} çalışıyor")
+    scheduler = SiteUrlScheduler(spider, shard=shard)
+    try:
+        if scheduler.has_jobs():
+            results = scheduler.dispatch(limit=scheduler.job_count(), force=all_urls)
+            logger.info(f"🧩 Shard {format_shard(shard)}: {len(results)} URL işlendi")
+        else:
+            spider.scrape_all_sites(shard=shard)
+    finally:
+        scheduler.close()
+
+
 def start_scheduler():
     """Scheduler'ı başlat"""
     if not SCHEDULER['enabled']:
         logger.info("Scheduler devre dışı")
         return
 
-    # Her X saatte bir çalıştır
-    schedule.every(SCHEDULER['interval_hours']).hours.do(run_scheduled_scraping)
-
-    logger.info(f"📅 Scheduler başlatıldı: Her {SCHEDULER['interval_hours']} saatte bir çalışacak")
+    scheduler = SiteUrlScheduler(MarketSpider())
+    if scheduler.has_jobs():
+        # SiteUrl öncelik/vade bazlı: sadece vadesi gelen URL'ler çekilir
+        schedule.every(SCHEDULER['tick_minutes']).minutes.do(run_due_jobs, scheduler)
+        logger.info(f"📅 Scheduler başlatıldı: SiteUrl işleri her {SCHEDULER['tick_minutes']} dakikada kontrol edilecek")
+    else:
+        # Her X saatte bir çalıştır
+        schedule.every(SCHEDULER['interval_hours']).hours.do(run_scheduled_scraping)
+        logger.info(f"📅 Scheduler başlatıldı: Her {SCHEDULER['interval_hours']} saatte bir çalışacak")
 
     def run_scheduler():
         while True:
@@ -260,8 +169,22 @@ def start_scheduler():
     scheduler_thread.start()
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Market Spider")
+    add_shard_arguments(parser)
+    parser.add_argument('--all-urls', action='store_true',
+                        help="--shard ile: vadesi gelmemiş URL'leri de çek (tam katalog)")
+    return parser.parse_args()
+
+
 def main():
     """Ana fonksiyon"""
+    args = parse_args()
+    if args.merge:
+        init_database()
+        merge_shard_databases(args.merge)
+        return
+
     print("""
     ╔══════════════════════════════════════╗
     ║     🕷️  MARKET SPIDER v1.0  🕷️        ║
@@ -274,6 +197,10 @@ def main():
 
     spider = MarketSpider()
 
+    if args.shard:
+        run_shard(spider, args.shard, all_urls=args.all_urls)
+        return
+
     while True:
         print("\n📋 MENÜ:")
         print("1. Tüm siteleri tara")
@@ -0,0 +1,376 @@
+"""
+Persistence - Toplu (batch) ürün ve yorum kayıt katmanı
+
+Scrape edilen ürünleri tek tek SELECT/INSERT/COMMIT yerine parça parça
+(chunk) ve tek transaction içinde veritabanına yazar. Ürünün son durumu
+(product_latest_snapshot) aynı transaction içinde güncellenir. Yorumlar
+içerik parmak izine göre upsert edilir.
+
+HISTORY['mode'] == 'on_change' iken fiyat/sıralama geçmişine sadece takip
+edilen alanlar snapshot'taki son değerden farklıysa satır eklenir; aksi
+halde ürünün son geçmiş satırının last_seen_at'i uzatılır (bkz. history.py).
+"""
+
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import bindparam, select
+from sqlalchemy.orm import Session
+
+from database import Product, PriceHistory, RankingHistory, ProductLatestSnapshot, ProductReview
+from config import HISTORY, SCRAPING
+
+logger = logging.getLogger(__name__)
+
+
+class BulkProductWriter:
+    """Normalize edilmiş ürünleri toplu olarak kaydeder"""
+
+    def __init__(self, db: Session, batch_size: Optional[int] = None, history: Optional[Dict] = None):
+        self.db = db
+        self.batch_size = batch_size or SCRAPING.get('db_batch_size', 500)
+        self.history = {**HISTORY, **(history or {})}
+        self.on_change = self.history['mode'] == 'on_change'
+
+        snapshot_columns = set(ProductLatestSnapshot.__table__.columns.keys())
+        for field in self.history['price_fields'] + self.history['ranking_fields']:
+            if field not in snapshot_columns:
+                raise ValueError(f"Geçmiş alanı snapshot tablosunda yok: {field}")
+
+    def write(self, products: List[Dict], commit: bool = True) -> List[Dict]:
+        """
+        Ürünleri batch'ler halinde kaydet.
+
+        Her batch için product_id'ler tek sorguda çözülür, yeni ürünler toplu
+        eklenir, fiyat/ranking geçmişi executemany ile yazılır ve son durum
+        snapshot'ı upsert edilir. Tüm batch'ler tek transaction içinde commit
+        edilir. commit=False iken transaction çağırana bırakılır (db_writer
+        birden fazla işi tek commit'te gruplar).
+
+        Returns:
+            Her batch için {'batch', 'products', 'inserted', 'updated',
+            'price_rows', 'ranking_rows', 'snapshot_rows'} sayaçları
+        """
+        batch_stats = []
+        if not products:
+            return batch_stats
+
+        try:
+            for index, start in enumerate(range(0, len(products), self.batch_size), 1):
+                chunk = products[start:start + self.batch_size]
+                stats = self._write_chunk(chunk)
+                stats['batch'] = index
+                batch_stats.append(stats)
+
+            if commit:
+                self.db.commit()
+
+        except Exception:
+            if commit:
+                self.db.rollback()
+            raise
+
+        return batch_stats
+
+    def _write_chunk(self, chunk: List[Dict]) -> Dict:
+        """Tek bir batch'i yaz (commit etmez)"""
+        product_ids = {p['product_id'] for p in chunk}
+        id_map = self._resolve_ids(product_ids)
+
+        # Aynı ürün birden fazla listede olabilir, sadece bir kez ekle
+        new_products = {}
+        for product_data in chunk:
+            pid = product_data['product_id']
+            if pid not in id_map and pid not in new_products:
+                new_products[pid] = self._product_row(product_data)
+
+        if new_products:
+            self.db.execute(Product.__table__.insert(), list(new_products.values()))
+            id_map.update(self._resolve_ids(set(new_products)))
+
+        now = datetime.utcnow()
+        last = self._load_snapshots(set(id_map.values()))
+        existing_snapshots = set(last)
+
+        price_rows, ranking_rows = [], []
+        price_seen, ranking_seen = [], []
+        snapshots = {}
+        for product_data in chunk:
+            db_id = id_map.get(product_data['product_id'])
+            if db_id is None:
+                continue
+            price_row = self._price_row(db_id, product_data, now)
+            ranking_row = self._ranking_row(db_id, product_data, now)
+
+            previous = last.get(db_id)
+            if self._changed(previous, price_row, self.history['price_fields']):
+                price_rows.append(price_row)
+            else:
+                price_seen.append(db_id)
+            if self._changed(previous, ranking_row, self.history['ranking_fields']):
+                ranking_rows.append(ranking_row)
+            else:
+                ranking_seen.append(db_id)
+
+            # Aynı ürün batch'te birden fazla varsa son kayıt kazanır
+            snapshots[db_id] = last[db_id] = self._snapshot_row(price_row, ranking_row)
+
+        if price_rows:
+            self.db.execute(PriceHistory.__table__.insert(), price_rows)
+        if ranking_rows:
+            self.db.execute(RankingHistory.__table__.insert(), ranking_rows)
+        self._extend_last_seen(PriceHistory, price_seen, now)
+        self._extend_last_seen(RankingHistory, ranking_seen, now)
+        self._upsert_snapshots(snapshots, existing_snapshots)
+
+        inserted = len(new_products)
+        return {
+            'products': len(product_ids),
+            'inserted': inserted,
+            'updated': len(product_ids) - inserted,
+            'price_rows': len(price_rows),
+            'ranking_rows': len(ranking_rows),
+            'price_unchanged': len(price_seen),
+            'ranking_unchanged': len(ranking_seen),
+            'snapshot_rows': len(snapshots)
+        }
+
+    def _load_snapshots(self, db_ids: set) -> Dict[int, Dict]:
+        """Ürünlerin son kaydedilen değerleri (snapshot) - değişim kontrolü için"""
+        if not db_ids:
+            return {}
+
+        table = ProductLatestSnapshot.__table__
+        rows = self.db.execute(select(table).where(table.c.product_id.in_(db_ids)))
+        return {row.product_id: dict(row._mapping) for row in rows}
+
+    def _changed(self, previous: Optional[Dict], row: Dict, fields: List[str]) -> bool:
+        """Yeni geçmiş satırı gerekli mi (append modunda her zaman)"""
+        if not self.on_change or previous is None:
+            return True
+        return any(previous.get(field) != row.get(field) for field in fields)
+
+    def _extend_last_seen(self, model, db_ids: List[int], now: datetime):
+        """Değişmeyen ürünlerin son geçmiş satırını (product_id, timestamp indeksiyle) uzat"""
+        if not db_ids:
+            return
+
+        table = model.__table__
+        latest = (
+            select(table.c.id)
+            .where(table.c.product_id == bindparam('_product_id'))
+            .order_by(table.c.timestamp.desc(), table.c.id.desc())
+            .limit(1)
+            .scalar_subquery()
+        )
+        self.db.execute(
+            table.update().where(table.c.id == latest).values(last_seen_at=bindparam('_seen_at')),
+            [{'_product_id': db_id, '_seen_at': now} for db_id in set(db_ids)]
+        )
+
+    def _upsert_snapshots(self, snapshots: Dict[int, Dict], existing: set):
+        """product_latest_snapshot satırlarını ekle veya güncelle"""
+        if not snapshots:
+            return
+
+        table = ProductLatestSnapshot.__table__
+
+        new_rows = [row for product_id, row in snapshots.items() if product_id not in existing]
+        updates = [
+            {'_product_id': product_id, **row}
+            for product_id, row in snapshots.items() if product_id in existing
+        ]
+
+        if new_rows:
+            self.db.execute(table.insert(), new_rows)
+        if updates:
+            values = {name: bindparam(name) for name in updates[0] if name not in ('_product_id', 'product_id')}
+            self.db.execute(
+                table.update().where(table.c.product_id == bindparam('_product_id')).values(**values),
+                updates
+            )
+
+    def _resolve_ids(self, product_ids: set) -> Dict[str, int]:
+        """product_id -> products.id eşlemesini tek sorguda al"""
+        if not product_ids:
+            return {}
+
+        rows = self.db.query(Product.product_id, Product.id).filter(
+            Product.product_id.in_(product_ids)
+        ).all()
+        return {product_id: db_id for product_id, db_id in rows}
+
+    @staticmethod
+    def _product_row(product_data: Dict) -> Dict:
+        return {
+            'product_id': product_data['product_id'],
+            'name': product_data['name'],
+            'brand': product_data['brand'],
+            'category': product_data['category'],
+            'sub_category': product_data['sub_category'],
+            'site_name': product_data['site_name'],
+            'product_url': product_data['product_url'],
+            'image_url': product_data['image_url']
+        }
+
+    @staticmethod
+    def _price_row(db_id: int, product_data: Dict, timestamp: datetime) -> Dict:
+        return {
+            'product_id': db_id,
+            'price': product_data['price'],
+            'original_price': product_data.get('original_price'),
+            'discount_percentage': product_data.get('discount_percentage'),
+            'currency': product_data['currency'],
+            'in_stock': product_data['in_stock'],
+            'seller_name': product_data.get('seller_name'),
+            'seller_rating': product_data.get('seller_rating'),
+            'timestamp': timestamp,
+            'last_seen_at': timestamp
+        }
+
+    @staticmethod
+    def _ranking_row(db_id: int, product_data: Dict, timestamp: datetime) -> Dict:
+        return {
+            'product_id': db_id,
+            'rank_position': product_data['rank_position'],
+            'total_reviews': product_data.get('total_reviews'),
+            'average_rating': product_data.get('average_rating'),
+            'sales_count': product_data.get('sales_count'),
+            'list_type': product_data['list_type'],
+            'timestamp': timestamp,
+            'last_seen_at': timestamp
+        }
+
+    @staticmethod
+    def _snapshot_row(price_row: Dict, ranking_row: Dict) -> Dict:
+        return {
+            'product_id': price_row['product_id'],
+            'price': price_row['price'],
+            'original_price': price_row['original_price'],
+            'discount_percentage': price_row['discount_percentage'],
+            'in_stock': price_row['in_stock'],
+            'price_updated_at': price_row['timestamp'],
+            'rank_position': ranking_row['rank_position'],
+            'list_type': ranking_row['list_type'],
+            'total_reviews': ranking_row['total_reviews'],
+            'average_rating': ranking_row['average_rating'],
+            'sales_count': ranking_row['sales_count'],
+            'rank_updated_at': ranking_row['timestamp'],
+            'updated_at': price_row['timestamp']
+        }
+
+
+def summarize_batches(batch_stats: List[Dict]) -> Dict:
+    """Batch sayaçlarını topla"""
+    totals = {'inserted': 0, 'updated': 0, 'price_rows': 0, 'ranking_rows': 0,
+              'price_unchanged': 0, 'ranking_unchanged': 0, 'snapshot_rows': 0}
+    for stats in batch_stats:
+        for key in totals:
+            totals[key] += stats.get(key, 0)
+    return totals
+
+
+class ReviewUpserter:
+    """
+    Yorumları (product_id, review_hash) anahtarıyla upsert eder.
+
+    Sadece daha önce görülmemiş yorumlar eklenir ve AI analizinden geçer;
+    mevcut yorumlarda yalnızca helpful_count güncellenir.
+    """
+
+    def __init__(self, db: Session, analyzer=None, batch_size: Optional[int] = None):
+        self.db = db
+        self.analyzer = analyzer
+        self.batch_size = batch_size or SCRAPING.get('db_batch_size', 500)
+
+    def upsert(self, product_id: int, reviews: List[Dict]) -> Dict:
+        """Bir ürünün yorumlarını kaydet, {'inserted', 'updated', 'unchanged'} döndür"""
+        stats = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+
+        # Aynı batch içindeki tekrarları at (ilk gelen kazanır)
+        by_hash = {}
+        for review_data in reviews:
+            if not review_data.get('review_text'):
+                continue
+            by_hash.setdefault(ProductReview.fingerprint(review_data['review_text']), review_data)
+
+        if not by_hash:
+            return stats
+
+        try:
+            hashes = list(by_hash)
+            for start in range(0, len(hashes), self.batch_size):
+                self._upsert_chunk(product_id, {h: by_hash[h] for h in hashes[start:start + self.batch_size]}, stats)
+            self.db.commit()
+
+        except Exception:
+            self.db.rollback()
+            raise
+
+        return stats
+
+    def _upsert_chunk(self, product_id: int, chunk: Dict[str, Dict], stats: Dict):
+        existing = {
+            review_hash: (review_id, helpful_count)
+            for review_id, review_hash, helpful_count in self.db.query(
+                ProductReview.id, ProductReview.review_hash, ProductReview.helpful_count
+            ).filter(
+                ProductReview.product_id == product_id,
+                ProductReview.review_hash.in_(list(chunk))
+            )
+        }
+
+        new_rows = []
+        helpful_updates = []
+        for review_hash, review_data in chunk.items():
+            helpful_count = review_data.get('helpful_count', 0)
+            if review_hash in existing:
+                review_id, current_helpful = existing[review_hash]
+                if helpful_count != current_helpful:
+                    helpful_updates.append({'_id': review_id, 'helpful_count': helpful_count})
+                else:
+                    stats['unchanged'] += 1
+                continue
+
+            new_rows.append(self._review_row(product_id, review_hash, review_data))
+
+        if new_rows:
+            self.db.execute(ProductReview.__table__.insert(), new_rows)
+        if helpful_updates:
+            table = ProductReview.__table__
+            self.db.execute(
+                table.update().where(table.c.id == bindparam('_id')).values(
+                    helpful_count=bindparam('helpful_count')
+                ),
+                helpful_updates
+            )
+
+        stats['inserted'] += len(new_rows)
+        stats['updated'] += len(helpful_updates)
+
+    def _review_row(self, product_id: int, review_hash: str, review_data: Dict) -> Dict:
+        row = {
+            'product_id': product_id,
+            'review_hash': review_hash,
+            'reviewer_name': review_data.get('reviewer_name'),
+            'reviewer_verified': review_data.get('reviewer_verified', False),
+            'rating': review_data.get('rating'),
+            'review_title': review_data.get('review_title', ''),
+            'review_text': review_data['review_text'],
+            'review_date': review_data.get('review_date'),
+            'helpful_count': review_data.get('helpful_count', 0)
+        }
+
+        # AI analizi sadece yeni yorumlar için
+        if self.analyzer:
+            analysis = self.analyzer.analyze_review(review_data['review_text'])
+            row.update({
+                'sentiment_score': analysis['sentiment_score'],
+                'key_phrases': analysis['key_phrases'],
+                'purchase_reasons': analysis['purchase_reasons'],
+                'pros': analysis['pros'],
+                'cons': analysis['cons']
+            })
+
+        return row
@@ -13,6 +13,7 @@ from datetime import datetime
 from database import SessionLocal, Product, ProductReview
 from turkish_review_ai import TurkishReviewAI
 import urllib.parse
+from http_client import get_http_clients
 
 class ProxyAPIScraper:
     """Proxy ve DNS çözümleriyle TÜM yorumları çeker"""
@@ -30,24 +31,8 @@ class ProxyAPIScraper:
             '172.67.68.118',     # Cloudflare IP 4
         ]
 
-        # Session oluştur
-        self.http_session = requests.Session()
-
-        # Adapter ayarları - DNS timeout'u arttır
-        from requests.adapters import HTTPAdapter
-        from urllib3.util.retry import Retry
-
-        retry_strategy = Retry(
-            total=3,
-            backoff_factor=1,
-            status_forcelist=[429, 500, 502, 503, 504],
-        )
-        adapter = HTTPAdapter(max_retries=retry_strategy)
-        self.http_session.mount("http://", adapter)
-        self.http_session.mount("https://", adapter)
-
-        # Headers güncelle
-        self.http_session.headers.update({
+        # Paylaşılan havuzdan retry'lı session (429/5xx için 3 deneme)
+        self.http_session = get_http_clients().session(retries=3, headers={
             'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Accept': 'application/json, text/plain, */*',
             'Accept-Language': 'tr-TR,tr;q=0.9,en;q=0.8',
@@ -0,0 +1,341 @@
+"""
+Rate Limiter - Host bazlı, kendini ayarlayan (AIMD) hız sınırlayıcı
+
+config.ECOMMERCE_SITES içindeki 'rate_limit' (istekler arası saniye) değerinden
+her host için bir token bucket oluşturur. Hem thread'ler hem asyncio görevleri
+aynı bucket'ı paylaşabilir.
+
+Başlangıç değeri sadece bir tahmindir: sağlıklı (hızlı, 2xx/3xx/4xx) her yanıtta
+hız ve eşzamanlılık toplamsal olarak artar; 429/503, 5xx, zaman aşımı veya
+yavaş yanıtta çarpımsal olarak düşer. Retry-After başlığı varsa host o süre
+boyunca bekletilir. Ayarlar config.RATE_LIMITER içindedir.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+from config import ECOMMERCE_SITES, RATE_LIMITER
+
+logger = logging.getLogger(__name__)
+
+THROTTLE_STATUSES = {429, 503}
+
+
+class TokenBucket:
+    """Klasik token bucket: saniyede `rate` token, en fazla `capacity` birikir"""
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Bir token ayır, kullanılabilir olana kadar beklenecek süreyi döndür"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def set_rate(self, rate: float):
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            self.rate = rate
+
+    def pause(self, seconds: float):
+        """Sonraki token'ı en erken `seconds` sonra ver (Retry-After)"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            self.tokens = min(self.tokens, -seconds * self.rate)
+
+    def acquire(self):
+        """Token alana kadar thread'i beklet"""
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """Token alana kadar görevi beklet (event loop'u bloklamaz)"""
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+def _wake(waiter: asyncio.Future):
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+def parse_retry_after(value) -> Optional[float]:
+    """Retry-After başlığını (saniye veya HTTP tarihi) saniyeye çevir"""
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except (TypeError, ValueError):
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+class AdaptiveLimit:
+    """
+    Tek host için AIMD ayarlı hız (token bucket) ve eşzamanlılık sınırı.
+
+    Artış TCP'deki gibi yanıt başına 1/değer kadardır; yani her "tur"da
+    (saniyede ~rate yanıt) hız additive_rate, eşzamanlılık 1 artar.
+    """
+
+    def __init__(self, interval: float, burst: float = 1.0, settings: Optional[Dict] = None):
+        self.settings = {**RATE_LIMITER, **(settings or {})}
+        rate = 1.0 / interval if interval and interval > 0 else 1.0 / self.settings['min_interval']
+        self.min_rate = 1.0 / self.settings['max_interval']
+        self.max_rate = 1.0 / self.settings['min_interval']
+        self.bucket = TokenBucket(min(max(rate, self.min_rate), self.max_rate), burst)
+
+        self.concurrency = float(self.settings['initial_concurrency'])
+        self.max_concurrency = self.settings['max_concurrency']
+        self.in_flight = 0
+        self._cond = threading.Condition()
+        self._async_waiters = deque()  # (loop, future): slot bekleyen asyncio görevleri
+        self._last_decrease = 0.0
+
+        self.stats = {'ok': 0, 'throttled': 0, 'errors': 0, 'slow': 0, 'latency_ms': 0.0}
+
+    @property
+    def rate(self) -> float:
+        return self.bucket.rate
+
+    # Eşzamanlılık slotları
+    def enter(self):
+        with self._cond:
+            while self.in_flight >= max(1, int(self.concurrency)):
+                self._cond.wait(0.5)
+            self.in_flight += 1
+
+    async def enter_async(self):
+        """Slot boşalana kadar bekle; exit() bekleyen görevi uyandırır (polling yok)"""
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._cond:
+                if self.in_flight < max(1, int(self.concurrency)):
+                    self.in_flight += 1
+                    return
+                waiter = loop.create_future()
+                self._async_waiters.append((loop, waiter))
+            try:
+                # Uyandırılan görev iptal edilirse sinyal kaybolabilir: enter() gibi 0.5 sn'de bir bak
+                await asyncio.wait({waiter}, timeout=0.5)
+            finally:
+                with self._cond:
+                    if (loop, waiter) in self._async_waiters:
+                        self._async_waiters.remove((loop, waiter))
+
+    def _notify(self):
+        """Bir thread'i ve bir asyncio görevini uyandır (_cond tutulurken çağrılır)"""
+        self._cond.notify()
+        while self._async_waiters:
+            loop, waiter = self._async_waiters.popleft()
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(_wake, waiter)
+                return
+
+    def exit(self):
+        with self._cond:
+            self.in_flight -= 1
+            self._notify()
+
+    # Geri bildirim
+    def _increase(self):
+        rate = self.bucket.rate
+        self.bucket.set_rate(min(self.max_rate, rate + self.settings['additive_rate'] / rate))
+        with self._cond:
+            self.concurrency = min(self.max_concurrency, self.concurrency + 1.0 / self.concurrency)
+            self._notify()
+
+    def _decrease(self) -> bool:
+        # Aynı anda dönen hata yanıtları tek bir düşüş sayılır
+        factor = self.settings['backoff_factor']
+        with self._cond:
+            now = time.monotonic()
+            if now - self._last_decrease < self.settings['decrease_cooldown']:
+                return False
+            self._last_decrease = now
+            self.concurrency = max(1.0, self.concurrency * factor)
+        self.bucket.set_rate(max(self.min_rate, self.bucket.rate * factor))
+        return True
+
+    def record(self, status: Optional[int] = None, latency: Optional[float] = None,
+               retry_after: Optional[float] = None):
+        """Yanıt sonucunu bildir; status None ise bağlantı hatası/zaman aşımı"""
+        if latency is not None:
+            self.stats['latency_ms'] = 0.8 * self.stats['latency_ms'] + 0.2 * latency * 1000
+
+        if status in THROTTLE_STATUSES:
+            self.stats['throttled'] += 1
+            self._decrease()
+            if retry_after is None:
+                retry_after = 1.0 / self.bucket.rate
+            self.bucket.pause(min(retry_after, self.settings['max_retry_after']))
+        elif status is None or status >= 500:
+            self.stats['errors'] += 1
+            self._decrease()
+        elif latency is not None and latency > self.settings['slow_response_seconds']:
+            self.stats['slow'] += 1
+            self._decrease()
+        else:
+            self.stats['ok'] += 1
+            self._increase()
+
+    def snapshot(self) -> Dict:
+        return {
+            'rate': round(self.bucket.rate, 3),
+            'interval': round(1.0 / self.bucket.rate, 3),
+            'concurrency': int(self.concurrency),
+            'in_flight': self.in_flight,
+            **self.stats,
+            'latency_ms': round(self.stats['latency_ms'], 1)
+        }
+
+
+class HostRateLimiter:
+    """Host -> AdaptiveLimit eşlemesi"""
+
+    def __init__(self, default_interval: float = 2.0, settings: Optional[Dict] = None):
+        self.default_interval = default_interval
+        self.settings = {**RATE_LIMITER, **(settings or {})}
+        self.adaptive = self.settings.get('adaptive', True)
+        self.limits: Dict[str, AdaptiveLimit] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_sites(cls, sites: Dict = None) -> 'HostRateLimiter':
+        """ECOMMERCE_SITES ve RATE_LIMITER['hosts'] konfigürasyonundan limiter oluştur"""
+        limiter = cls()
+        for site_config in (sites or ECOMMERCE_SITES).values():
+            limiter.configure(site_config['base_url'], site_config.get('rate_limit', 2))
+        for host, interval in limiter.settings.get('hosts', {}).items():
+            limiter.configure(f"https://{host}", interval)
+        return limiter
+
+    @staticmethod
+    def host_of(url: str) -> str:
+        return urlparse(url).netloc.lower()
+
+    def configure(self, url: str, interval: float, burst: float = 1.0):
+        """Host için başlangıç limitini (istekler arası saniye) tanımla"""
+        with self._lock:
+            self.limits[self.host_of(url)] = AdaptiveLimit(interval, burst, self.settings)
+
+    def register(self, url: str, interval: float):
+        """Host için limit tanımlı değilse ekle (mevcut limiti ezmez)"""
+        with self._lock:
+            if self.host_of(url) in self.limits:
+                return
+        self.configure(url, interval)
+
+    def limit_for(self, url: str) -> AdaptiveLimit:
+        host = self.host_of(url)
+        with self._lock:
+            limit = self.limits.get(host)
+            if limit is None:
+                limit = AdaptiveLimit(self.default_interval, settings=self.settings)
+                self.limits[host] = limit
+            return limit
+
+    def bucket_for(self, url: str) -> TokenBucket:
+        return self.limit_for(url).bucket
+
+    def acquire(self, url: str):
+        """Sadece hız limiti (eşzamanlılık slotu almaz)"""
+        self.bucket_for(url).acquire()
+
+    async def acquire_async(self, url: str):
+        await self.bucket_for(url).acquire_async()
+
+    @contextmanager
+    def request(self, url: str):
+        """Eşzamanlılık slotu + hız limiti: with limiter.request(url): ..."""
+        limit = self.limit_for(url)
+        limit.enter()
+        try:
+            limit.bucket.acquire()
+            yield limit
+        finally:
+            limit.exit()
+
+    @asynccontextmanager
+    async def request_async(self, url: str):
+        limit = self.limit_for(url)
+        await limit.enter_async()
+        try:
+            await limit.bucket.acquire_async()
+            yield limit
+        finally:
+            limit.exit()
+
+    def report(self, url: str, status: Optional[int] = None, latency: Optional[float] = None,
+               retry_after=None):
+        """Yanıt sonucunu host limitine bildir (AIMD)"""
+        if not self.adaptive:
+            return
+        limit = self.limit_for(url)
+        before = limit.rate
+        limit.record(status, latency, parse_retry_after(retry_after))
+        if limit.rate < before:
+            logger.info(f"🐢 {self.host_of(url)} yavaşlatıldı: {before:.2f} -> {limit.rate:.2f} istek/sn "
+                        f"(HTTP {status}, eşzamanlılık {int(limit.concurrency)})")
+
+    def rates(self) -> Dict[str, Dict]:
+        """Host başına güncel hız, eşzamanlılık ve sayaçlar"""
+        with self._lock:
+            limits = dict(self.limits)
+        return {host: limit.snapshot() for host, limit in limits.items()}
+
+    def get(self, client, url: str, **kwargs):
+        """
+        requests uyumlu istemciyle limit dahilinde GET at ve sonucu bildir.
+
+        Bağlantı hatası da geri bildirim olarak sayılır ve yeniden fırlatılır.
+        """
+        with self.request(url):
+            start = time.monotonic()
+            try:
+                response = client.get(url, **kwargs)
+            except Exception:
+                self.report(url, None, time.monotonic() - start)
+                raise
+        self.report(url, response.status_code, time.monotonic() - start,
+                    response.headers.get('Retry-After'))
+        return response
+
+
+_default_limiter: Optional[HostRateLimiter] = None
+_default_lock = threading.Lock()
+
+
+def get_rate_limiter() -> HostRateLimiter:
+    """Process genelinde paylaşılan limiter"""
+    global _default_limiter
+    with _default_lock:
+        if _default_limiter is None:
+            _default_limiter = HostRateLimiter.from_sites()
+        return _default_limiter
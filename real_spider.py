@@ -5,31 +5,32 @@ Gerçek Akıllı Örümcek - Tüm kategorileri bulur
 
 import requests
 from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlparse, parse_qs
+from urllib.parse import urlparse, parse_qs
 import re
 import json
-import time
 from typing import List, Dict, Set
-import cloudscraper
 from collections import defaultdict
+from http_client import get_http_clients
+from url_dedup import SeenUrlSet, canonicalize_url
 
 
 class RealSpider:
     """Gerçek kategori bulucu örümcek"""
 
     def __init__(self):
-        self.scraper = cloudscraper.create_scraper()
+        self.scraper = get_http_clients().cached_cloudscraper()
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
             'Accept-Language': 'tr-TR,tr;q=0.9,en;q=0.8',
         }
         self.categories = {}
-        self.visited = set()
+        self.visited = SeenUrlSet()  # Kanonik URL'ler (Bloom filtresi)
 
     def discover_all_categories(self, site_url: str) -> Dict:
         """Sitenin TÜM kategorilerini bul"""
 
         domain = urlparse(site_url).netloc.lower()
+        self.visited.clear()
 
         if 'trendyol' in domain:
             return self._discover_trendyol_all(site_url)
@@ -81,8 +82,6 @@ class RealSpider:
             subcategories = self._get_trendyol_subcategories(base_url, main_cat['path'])
             all_categories.extend(subcategories)
 
-            time.sleep(0.5)  # Rate limiting
-
         # 2. Direkt kategori URL'leri (x-c pattern)
         direct_categories = self._find_trendyol_direct_categories(base_url)
         all_categories.extend(direct_categories)
@@ -138,14 +137,11 @@ class RealSpider:
                     text = link.get_text(strip=True)
 
                     if href and text and len(text) > 2:
-                        # URL'yi temizle
-                        if not href.startswith('http'):
-                            full_url = urljoin(base_url, href)
-                        else:
-                            full_url = href
+                        # URL'yi kanonik hale getir (takip parametreleri, sıra, '/' farkları)
+                        full_url = canonicalize_url(href, base_url)
 
                         # Filtreleme
-                        if self._is_valid_category_url(full_url):
+                        if self._is_valid_category_url(full_url) and self.visited.add(full_url):
                             subcategories.append({
                                 'id': self._extract_id_from_url(full_url),
                                 'name': text,
@@ -356,7 +352,9 @@ class RealSpider:
                     text = link.get_text(strip=True)
 
                     if href and text and self._is_valid_category_url(href):
-                        full_url = urljoin(base_url, href)
+                        full_url = canonicalize_url(href, base_url)
+                        if not self.visited.add(full_url):
+                            continue
 
                         all_categories.append({
                             'id': self._extract_id_from_url(full_url),
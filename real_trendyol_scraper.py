@@ -4,7 +4,6 @@
 Proxy desteği, rate limiting ve hata yönetimi ile
 """
 
-import requests
 from bs4 import BeautifulSoup
 import sqlite3
 import time
@@ -13,6 +12,7 @@ import json
 from datetime import datetime
 from typing import Dict, List, Optional
 import logging
+from http_client import get_http_clients
 
 # Logging ayarları
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -20,7 +20,7 @@ logger = logging.getLogger(__name__)
 
 class TrendyolScraper:
     def __init__(self, use_proxy=False):
-        self.session = requests.Session()
+        self.session = get_http_clients().session()
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
@@ -11,8 +11,9 @@ import time
 from datetime import datetime, timedelta
 from database import SessionLocal, Product, ProductReview
 from turkish_review_ai import TurkishReviewAI
+from persistence import ReviewUpserter
+from rate_limiter import get_rate_limiter
 import random
-import hashlib
 
 class RealtimeReviewFetcher:
     """Gerçek zamanlı yorum çekici"""
@@ -20,6 +21,8 @@ class RealtimeReviewFetcher:
     def __init__(self):
         self.session = SessionLocal()
         self.ai = TurkishReviewAI()
+        self.review_upserter = ReviewUpserter(self.session, analyzer=self.ai)
+        self.rate_limiter = get_rate_limiter()
         self.last_fetch_times = {}  # Ürün bazında son çekim zamanları
 
     def extract_product_id(self, url):
@@ -65,17 +68,23 @@ class RealtimeReviewFetcher:
                     if 'sortBy' not in endpoint:
                         url_with_params += "&sortBy=MOST_HELPFUL"
 
-                    # curl çalıştır
-                    result = subprocess.run(
-                        curl_cmd + [url_with_params],
-                        capture_output=True,
-                        text=True,
-                        timeout=10
-                    )
-
-                    if result.returncode == 0 and result.stdout:
+                    # curl çalıştır (host limiti dahilinde; HTTP kodu son satırda)
+                    with self.rate_limiter.request(url_with_params):
+                        start = time.monotonic()
+                        result = subprocess.run(
+                            curl_cmd + ['-w', '\n%{http_code}', url_with_params],
+                            capture_output=True,
+                            text=True,
+                            timeout=10
+                        )
+
+                    body, _, status = result.stdout.rpartition('\n')
+                    status = int(status) if result.returncode == 0 and status.isdigit() else 0
+                    self.rate_limiter.report(url_with_params, status or None, time.monotonic() - start)
+
+                    if status and body:
                         try:
-                            data = json.loads(result.stdout)
+                            data = json.loads(body)
 
                             # Farklı response formatlarını handle et
                             content = None
@@ -109,7 +118,6 @@ class RealtimeReviewFetcher:
                             pass
 
                     page += 1
-                    time.sleep(0.5)  # Rate limiting
 
                 if reviews:
                     break  # Başarılı endpoint bulundu
@@ -221,13 +229,6 @@ class RealtimeReviewFetcher:
             if html_reviews:
                 strategies_tried.append(f"HTML: {len(html_reviews)} yorum")
 
-        # 3. Eğer hala yeterli yorum yoksa, mevcut yorumları koru
-        if len(all_reviews) < 10:
-            existing = self.session.query(ProductReview).filter_by(product_id=product_id).all()
-            if existing:
-                print(f"ℹ️ Mevcut {len(existing)} yorum korunuyor")
-                return []  # Mevcut yorumları değiştirme
-
         print(f"✅ Toplam {len(all_reviews)} yorum çekildi ({', '.join(strategies_tried)})")
         return all_reviews
 
@@ -251,48 +252,22 @@ class RealtimeReviewFetcher:
         new_reviews = self.fetch_reviews_smart(product_id)
 
         if new_reviews:
-            # Mevcut yorumları temizle
-            self.session.query(ProductReview).filter_by(product_id=product_id).delete()
-            self.session.commit()
-
-            # Yeni yorumları kaydet
-            saved_count = 0
-            for review_data in new_reviews[:100]:  # Max 100 yorum
-                # AI analizi
-                analysis = self.ai.analyze_review(review_data['review_text'])
-
-                # Duplike kontrolü (hash ile)
-                review_hash = hashlib.md5(review_data['review_text'].encode()).hexdigest()
-
-                review = ProductReview(
-                    product_id=product_id,
-                    reviewer_name=review_data['reviewer_name'],
-                    reviewer_verified=review_data['reviewer_verified'],
-                    rating=review_data['rating'],
-                    review_title='',
-                    review_text=review_data['review_text'],
-                    review_date=review_data['review_date'],
-                    helpful_count=review_data['helpful_count'],
-                    sentiment_score=analysis['sentiment_score'],
-                    key_phrases=analysis['key_phrases'],
-                    purchase_reasons=analysis['purchase_reasons'],
-                    pros=analysis['pros'],
-                    cons=analysis['cons']
-                )
-                self.session.add(review)
-                saved_count += 1
-
-            self.session.commit()
+            # Sadece yeni yorumları ekle, mevcutların helpful_count'unu güncelle
+            stats = self.review_upserter.upsert(product_id, new_reviews)
             self.last_fetch_times[product_id] = datetime.now()
 
-            print(f"✅ {saved_count} yorum kaydedildi")
-            return True
+            print(f"✅ {stats['inserted']} yeni yorum, {stats['updated']} güncellenen, "
+                  f"{stats['unchanged']} değişmeyen")
+            return stats
         else:
             print(f"ℹ️ Yeni yorum bulunamadı, mevcut yorumlar korunuyor")
             return False
 
-    def continuous_update(self, interval_minutes=30):
-        """Sürekli güncelleme modu"""
+    def continuous_update(self, interval_minutes=30, top_k=None):
+        """Sürekli güncelleme modu - her turda en öncelikli ürünler yenilenir"""
+        from review_scheduler import ReviewRefreshScheduler
+
+        scheduler = ReviewRefreshScheduler(self.session)
 
         print("\n" + "="*60)
         print("🔄 GERÇEK ZAMANLI YORUM GÜNCELLEYİCİ")
@@ -300,12 +275,10 @@ class RealtimeReviewFetcher:
         print("="*60)
 
         while True:
-            # Tüm ürünleri güncelle
-            products = self.session.query(Product).all()
-
-            for product in products:
-                self.update_product_reviews(product.id)
-                time.sleep(2)  # Rate limiting
+            # Sıra hareketi / yorum artışı / bekleme süresine göre seçilen ürünler
+            for product_id in scheduler.next_batch(top_k):
+                stats = self.update_product_reviews(product_id, force=True)
+                scheduler.mark_fetched(product_id, new_reviews=stats['inserted'] if stats else 0)
 
             # Özet göster
             total_reviews = self.session.query(ProductReview).count()
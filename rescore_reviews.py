@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Gece çalışan yorum yeniden skorlama - product_reviews tablosundaki tüm
+yorumların sentiment_score değerini TurkishReviewAI.analyze_batch ile günceller
+"""
+
+import sys
+import time
+
+from database import SessionLocal, ProductReview
+from turkish_review_ai import TurkishReviewAI
+
+
+def rescore_reviews(chunk_size: int = 50000, processes: int = None):
+    """Yorumları chunk'lar halinde oku, toplu skorla ve güncelle"""
+    session = SessionLocal()
+    ai = TurkishReviewAI()
+    start = time.time()
+    total = 0
+
+    try:
+        last_id = 0
+        while True:
+            rows = session.query(ProductReview.id, ProductReview.review_text).filter(
+                ProductReview.id > last_id
+            ).order_by(ProductReview.id).limit(chunk_size).all()
+
+            if not rows:
+                break
+
+            result = ai.analyze_batch([text or '' for _, text in rows], processes=processes)
+            session.bulk_update_mappings(ProductReview, [
+                {'id': review_id, 'sentiment_score': float(score)}
+                for (review_id, _), score in zip(rows, result['sentiment_scores'])
+            ])
+            session.commit()
+
+            total += len(rows)
+            last_id = rows[-1][0]
+            print(f"  ✓ {total} yorum skorlandı")
+
+        print(f"✅ {total} yorum {time.time() - start:.2f} saniyede yeniden skorlandı")
+
+    except Exception as e:
+        print(f"❌ Hata: {e}")
+        session.rollback()
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    process_count = int(sys.argv[1]) if len(sys.argv) > 1 else None
+    rescore_reviews(processes=process_count)
@@ -0,0 +1,220 @@
+"""
+Review Fetcher - Sayfa seviyesinde paralel Trendyol yorum çekici
+
+İlk sayfadan (page=0) toplam sayfa sayısını öğrenir, kalan sayfaları host
+bazlı eşzamanlılık sınırı altında aynı anda çeker; bekleyen sayfa görevi
+sayısı bu sınırla (kayan pencere) tutulur. Çalışan ilk endpoint
+bulununca diğer endpoint'ler denenmez. Her sayfa geldiği anda `on_page`
+callback'ine verilir; tüm sayfalar bellekte biriktirilmez. İstek hızı
+rate_limiter'ın host bazlı AIMD limitine göre ayarlanır. HTTP/2 istemcisi
+http_client fabrikasından ödünç alınır, ürünler arasında bağlantılar korunur.
+"""
+
+import asyncio
+import logging
+import time
+import weakref
+from datetime import datetime
+from itertools import islice
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import httpx
+
+from config import SCRAPING
+from http_client import get_http_clients
+from rate_limiter import get_rate_limiter
+
+logger = logging.getLogger(__name__)
+
+REVIEW_ENDPOINTS = [
+    "https://public.trendyol.com/discovery-web-webproductgw-santral/api/review/{id}",
+    "https://public.trendyol.com/discovery-web-productgw-service/api/review/{id}",
+    "https://public.trendyol.com/discovery-web-webproductgw-santral/product-review/{id}",
+    "https://api.trendyol.com/discovery-web-webproductgw-santral/api/review/{id}",
+    "https://public-mdc.trendyol.com/discovery-web-webproductgw-santral/api/review/{id}",
+]
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'application/json, text/plain, */*',
+    'Accept-Language': 'tr-TR,tr;q=0.9,en;q=0.8',
+    'Origin': 'https://www.trendyol.com',
+    'Referer': 'https://www.trendyol.com/',
+    'X-Storefront-ID': 'TR',
+    'X-Application-ID': 'web'
+}
+
+PageCallback = Callable[[List[Dict]], None]
+
+
+def parse_review_date(value) -> datetime:
+    """API tarih alanını (ISO veya epoch ms) datetime'a çevir"""
+    if not value:
+        return datetime.now()
+
+    try:
+        if isinstance(value, (int, float)):
+            timestamp = value / 1000 if value > 1000000000000 else value
+            return datetime.fromtimestamp(timestamp)
+        if 'T' in str(value):
+            return datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except (ValueError, OverflowError, OSError):
+        pass
+
+    return datetime.now()
+
+
+def parse_review_page(data: Dict) -> Tuple[List[Dict], Optional[int]]:
+    """Yorum API cevabından (yorumlar, toplam_sayfa) çıkar"""
+    container = data
+    if isinstance(data.get('result'), dict):
+        container = data['result'].get('productReviews') or data['result']
+
+    content = container.get('content') or container.get('reviews') or []
+    total_pages = container.get('totalPages')
+
+    reviews = []
+    for r in content:
+        comment = r.get('comment') or r.get('text') or ''
+        if not comment:
+            continue
+        reviews.append({
+            'reviewer_name': r.get('userFullName') or 'Trendyol Müşterisi',
+            'reviewer_verified': r.get('verifiedPurchase', False),
+            'rating': r.get('rate', r.get('rating', 5)),
+            'review_title': r.get('title', ''),
+            'review_text': comment,
+            'review_date': parse_review_date(r.get('commentDateISOtype') or r.get('lastModifiedDate')),
+            'helpful_count': r.get('helpfulCount', 0)
+        })
+
+    return reviews, total_pages
+
+
+class ConcurrentReviewFetcher:
+    """Yorum sayfalarını eşzamanlı çeker ve akış halinde teslim eder"""
+
+    def __init__(self, page_size: int = 50, max_pages: int = 100,
+                 per_host_concurrency: Optional[int] = None,
+                 headers: Optional[Dict] = None, timeout: float = 10):
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.per_host_concurrency = per_host_concurrency or SCRAPING.get('review_concurrency_per_host', 8)
+        self.headers = headers or DEFAULT_HEADERS
+        self.timeout = timeout
+        self._host_limits = weakref.WeakKeyDictionary()  # loop -> {host: Semaphore}
+        self.limiter = get_rate_limiter()
+
+    def _semaphore(self, url: str) -> asyncio.Semaphore:
+        # Semaphore bir event loop'a bağlanır; fetcher farklı thread'lerden
+        # (farklı loop'lardan) kullanılabildiği için loop başına tutulur
+        limits = self._host_limits.setdefault(asyncio.get_running_loop(), {})
+        host = urlparse(url).netloc
+        if host not in limits:
+            limits[host] = asyncio.Semaphore(self.per_host_concurrency)
+        return limits[host]
+
+    async def _get_page(self, client: httpx.AsyncClient, url: str, page: int) -> Optional[Dict]:
+        params = {'page': page, 'size': self.page_size, 'sortBy': 'MOST_HELPFUL', 'culture': 'tr-TR'}
+        # Sabit üst sınır (semaphore) + host'un güncel AIMD limiti
+        async with self._semaphore(url), self.limiter.request_async(url):
+            start = time.monotonic()
+            try:
+                response = await client.get(url, params=params, headers=self.headers, timeout=self.timeout)
+            except httpx.HTTPError as e:
+                self.limiter.report(url, None, time.monotonic() - start)
+                logger.warning(f"Yorum sayfası alınamadı {url} (sayfa {page}): {e}")
+                return None
+
+        self.limiter.report(url, response.status_code, time.monotonic() - start,
+                            response.headers.get('Retry-After'))
+
+        if response.status_code != 200:
+            logger.info(f"  ✗ HTTP {response.status_code}: {url}")
+            return None
+
+        try:
+            return response.json()
+        except ValueError:
+            return None
+
+    async def fetch(self, trendyol_id: str, on_page: PageCallback) -> int:
+        """Tüm yorum sayfalarını çek, her sayfayı on_page'e ver; toplam yorum sayısını döndür"""
+        client = get_http_clients().async_client()
+        for template in REVIEW_ENDPOINTS:
+            url = template.format(id=trendyol_id)
+            first = await self._get_page(client, url, 0)
+            if not first:
+                continue
+
+            reviews, total_pages = parse_review_page(first)
+            if not reviews:
+                continue
+
+            # Çalışan endpoint bulundu, diğerlerini deneme
+            total = len(reviews)
+            await asyncio.to_thread(on_page, reviews)
+
+            page_count = min(total_pages or 1, self.max_pages)
+            logger.info(f"✓ {url}: {page_count} sayfa yorum")
+
+            # Kayan pencere: aynı anda en fazla per_host_concurrency sayfa görevi bekler
+            pages = iter(range(1, page_count))
+            pending = {asyncio.ensure_future(self._get_page(client, url, page))
+                       for page in islice(pages, self.per_host_concurrency)}
+            try:
+                while pending:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        # Callback çalışırken ağ boş kalmasın: önce pencereyi doldur
+                        page = next(pages, None)
+                        if page is not None:
+                            pending.add(asyncio.ensure_future(self._get_page(client, url, page)))
+
+                        data = task.result()
+                        if not data:
+                            continue
+                        page_reviews, _ = parse_review_page(data)
+                        if page_reviews:
+                            total += len(page_reviews)
+                            await asyncio.to_thread(on_page, page_reviews)
+            finally:
+                for task in pending:
+                    task.cancel()
+
+            return total
+
+        return 0
+
+    async def fetch_pages(self, trendyol_id: str, pages: range, on_page: PageCallback) -> int:
+        """Sadece verilen sayfa aralığını çek (iş kuyruğundaki parçalı yorum işleri için)"""
+        client = get_http_clients().async_client()
+        for template in REVIEW_ENDPOINTS:
+            url = template.format(id=trendyol_id)
+            results = await asyncio.gather(*(self._get_page(client, url, page) for page in pages))
+            if not any(results):
+                continue
+
+            total = 0
+            for data in results:
+                page_reviews, _ = parse_review_page(data) if data else ([], None)
+                if page_reviews:
+                    total += len(page_reviews)
+                    await asyncio.to_thread(on_page, page_reviews)
+            return total
+
+        return 0
+
+    def fetch_pages_sync(self, trendyol_id: str, pages: range, on_page: PageCallback) -> int:
+        return get_http_clients().run_sync(self.fetch_pages(trendyol_id, pages, on_page))
+
+    def fetch_sync(self, trendyol_id: str, on_page: PageCallback) -> int:
+        """Senkron koddan çağırmak için (thread'in kalıcı loop'unda, bağlantılar korunur)"""
+        return get_http_clients().run_sync(self.fetch(trendyol_id, on_page))
+
+    def fetch_all(self, trendyol_id: str) -> List[Dict]:
+        """Tüm yorumları liste olarak döndür (küçük ürünler için)"""
+        collected: List[Dict] = []
+        self.fetch_sync(trendyol_id, collected.extend)
+        return collected
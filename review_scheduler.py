@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Review Scheduler - Sıralama hareketine göre yorum yenileme kuyruğu
+
+Ürünleri RankingHistory'deki sıra değişimi, sitedeki yorum sayısı artışı ve
+son çekimden beri geçen süreye göre puanlar; en yüksek öncelikli top-K ürünü
+bir worker havuzuna dağıtır. Öncelik ve son çekim bilgisi
+review_refresh_state tablosunda kalıcıdır. Başarısız çekimler son çekim
+sayılmaz; ürün artan bekleme süresiyle (min_refresh_minutes * 2^(hata-1))
+tekrar denenir.
+"""
+
+import heapq
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from config import REVIEW_SCHEDULER
+from database import SessionLocal, Product, RankingHistory, ReviewRefreshState
+from history import seen_since
+
+logger = logging.getLogger(__name__)
+
+
+class ReviewRefreshScheduler:
+    """Kalıcı öncelikli yorum yenileme planlayıcısı"""
+
+    def __init__(self, session: Optional[Session] = None, settings: Optional[Dict] = None):
+        self.session = session or SessionLocal()
+        self.settings = {**REVIEW_SCHEDULER, **(settings or {})}
+        self.weights = self.settings['weights']
+
+    def compute_priorities(self, product_ids: Optional[Iterable[int]] = None) -> Dict[int, Dict]:
+        """Her ürün için öncelik skorunu ve bileşenlerini hesapla"""
+        now = datetime.utcnow()
+        window_start = now - timedelta(hours=self.settings['rank_window_hours'])
+
+        products = self.session.query(Product.id, Product.review_count)
+        rankings = self.session.query(
+            RankingHistory.product_id,
+            func.min(RankingHistory.rank_position),
+            func.max(RankingHistory.rank_position),
+            func.max(RankingHistory.total_reviews)
+        ).filter(
+            # on_change modunda pencere başında geçerli olan satır pencereden önce
+            # başlamış olabilir; aralığı pencereyle kesişen satırlar alınır
+            seen_since(RankingHistory, window_start)
+        )
+        states = self.session.query(ReviewRefreshState)
+
+        if product_ids is not None:
+            product_ids = list(product_ids)
+            products = products.filter(Product.id.in_(product_ids))
+            rankings = rankings.filter(RankingHistory.product_id.in_(product_ids))
+            states = states.filter(ReviewRefreshState.product_id.in_(product_ids))
+
+        # Pencere içindeki sıra hareketi ve sitedeki son yorum sayısı (tek sorgu)
+        ranking = {
+            product_id: (min_rank, max_rank, max_reviews)
+            for product_id, min_rank, max_rank, max_reviews in rankings.group_by(RankingHistory.product_id)
+        }
+        states = {state.product_id: state for state in states}
+
+        priorities = {}
+        for product_id, review_count in products:
+            min_rank, max_rank, window_reviews = ranking.get(product_id, (None, None, None))
+            state = states.get(product_id)
+
+            rank_churn = (max_rank - min_rank) if min_rank is not None else 0
+            current_reviews = max(window_reviews or 0, review_count or 0)
+            last_count = (state.last_review_count or 0) if state else 0
+            review_delta = max(current_reviews - last_count, 0)
+
+            if state and state.last_fetched_at:
+                staleness = (now - state.last_fetched_at).total_seconds() / 3600
+            else:
+                staleness = self.settings['max_staleness_hours']
+
+            priorities[product_id] = {
+                'priority': (
+                    self.weights['rank_churn'] * rank_churn +
+                    self.weights['review_delta'] * review_delta +
+                    self.weights['staleness'] * staleness
+                ),
+                'rank_churn': rank_churn,
+                'review_delta': review_delta,
+                'staleness_hours': staleness,
+                'current_reviews': current_reviews,
+                'last_fetched_at': state.last_fetched_at if state else None,
+                'retry_at': self._retry_at(state)
+            }
+
+        return priorities
+
+    def next_batch(self, k: Optional[int] = None,
+                   product_ids: Optional[Iterable[int]] = None) -> List[int]:
+        """En yüksek öncelikli K ürünü seç, öncelikleri kaydet"""
+        k = k or self.settings['top_k']
+        priorities = self.compute_priorities(product_ids)
+        self._save_priorities(priorities)
+
+        min_age = timedelta(minutes=self.settings['min_refresh_minutes'])
+        now = datetime.utcnow()
+        due = [
+            (info['priority'], product_id)
+            for product_id, info in priorities.items()
+            if (not info['last_fetched_at'] or now - info['last_fetched_at'] >= min_age)
+            and (info['retry_at'] is None or now >= info['retry_at'])
+        ]
+
+        return [product_id for _, product_id in heapq.nlargest(k, due)]
+
+    def _retry_at(self, state: Optional[ReviewRefreshState]) -> Optional[datetime]:
+        """Art arda hatalardan sonra ürünün en erken tekrar deneneceği an"""
+        if state is None or not state.failure_count or state.last_failed_at is None:
+            return None
+        delay = min(
+            self.settings['min_refresh_minutes'] * 2 ** (state.failure_count - 1),
+            self.settings['max_staleness_hours'] * 60
+        )
+        return state.last_failed_at + timedelta(minutes=delay)
+
+    def _save_priorities(self, priorities: Dict[int, Dict]):
+        existing = {
+            state.product_id: state for state in self.session.query(ReviewRefreshState).filter(
+                ReviewRefreshState.product_id.in_(list(priorities))
+            )
+        }
+        for product_id, info in priorities.items():
+            state = existing.get(product_id)
+            if state is None:
+                state = ReviewRefreshState(product_id=product_id, last_review_count=0, fetch_count=0)
+                self.session.add(state)
+            state.priority = info['priority']
+        self.session.commit()
+
+    def mark_fetched(self, product_id: int, new_reviews: int = 0, review_count: Optional[int] = None):
+        """Çekim sonucunu kaydet"""
+        state = self.session.query(ReviewRefreshState).filter_by(product_id=product_id).first()
+        if state is None:
+            state = ReviewRefreshState(product_id=product_id, fetch_count=0)
+            self.session.add(state)
+
+        if review_count is None:
+            review_count = self.compute_priorities([product_id]).get(product_id, {}).get('current_reviews', 0)
+
+        state.last_fetched_at = datetime.utcnow()
+        state.last_new_reviews = new_reviews
+        state.last_review_count = review_count
+        state.fetch_count = (state.fetch_count or 0) + 1
+        state.failure_count = 0
+        state.last_error = None
+        state.priority = 0
+        self.session.commit()
+
+    def mark_failed(self, product_id: int, error: Optional[str] = None):
+        """Başarısız çekimi kaydet (last_fetched_at / last_review_count değişmez, sinyal korunur)"""
+        state = self.session.query(ReviewRefreshState).filter_by(product_id=product_id).first()
+        if state is None:
+            state = ReviewRefreshState(product_id=product_id, last_review_count=0, fetch_count=0)
+            self.session.add(state)
+
+        state.failure_count = (state.failure_count or 0) + 1
+        state.last_failed_at = datetime.utcnow()
+        state.last_error = error
+        self.session.commit()
+
+    def dispatch(self, refresh: Callable[[int], Optional[Dict]], k: Optional[int] = None,
+                 workers: Optional[int] = None,
+                 product_ids: Optional[Iterable[int]] = None) -> Dict[int, Optional[Dict]]:
+        """
+        Top-K ürünü worker havuzuna dağıt.
+
+        refresh(product_id) her worker thread'inde çağrılır ve
+        {'inserted': ...} gibi bir sayaç sözlüğü (ya da başarısızsa None/False)
+        döndürür. Sonuçlar geldikçe review_refresh_state güncellenir.
+        """
+        batch = self.next_batch(k, product_ids)
+        if not batch:
+            return {}
+
+        workers = workers or self.settings['workers']
+        logger.info(f"🔄 {len(batch)} ürün yorum yenilemeye gönderiliyor ({workers} worker)")
+
+        results = {}
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(refresh, product_id): product_id for product_id in batch}
+            for future in as_completed(futures):
+                product_id = futures[future]
+                error = None
+                try:
+                    stats = future.result()
+                    if stats is None or stats is False:
+                        error = "Yorumlar alınamadı"
+                except Exception as e:
+                    logger.error(f"Yorum yenileme hatası {product_id}: {e}")
+                    error = str(e)
+
+                if error is not None:
+                    results[product_id] = None
+                    self.mark_failed(product_id, error)
+                    continue
+
+                results[product_id] = stats
+                self.mark_fetched(product_id, new_reviews=stats.get('inserted', 0))
+
+        return results
+
+
+def realtime_refresh_worker() -> Callable[[int], Optional[Dict]]:
+    """Her thread için ayrı RealtimeReviewFetcher (ayrı DB session) kullanan worker"""
+    from realtime_review_fetcher import RealtimeReviewFetcher
+
+    local = threading.local()
+
+    def refresh(product_id: int) -> Optional[Dict]:
+        if not hasattr(local, 'fetcher'):
+            local.fetcher = RealtimeReviewFetcher()
+        return local.fetcher.update_product_reviews(product_id, force=True) or None
+
+    return refresh
+
+
+def run_forever(interval_minutes: int = 30):
+    """Her turda en öncelikli ürünleri yenile"""
+    scheduler = ReviewRefreshScheduler()
+    refresh = realtime_refresh_worker()
+
+    while True:
+        results = scheduler.dispatch(refresh)
+        refreshed = sum(1 for stats in results.values() if stats)
+        print(f"📊 {refreshed}/{len(results)} ürünün yorumları yenilendi")
+        print(f"⏳ {interval_minutes} dakika bekleniyor...")
+        time.sleep(interval_minutes * 60)
+
+
+if __name__ == "__main__":
+    run_forever()
@@ -1,16 +1,22 @@
 #!/usr/bin/env python3
 """
 Web scraper'ı çalıştır ve ürünleri veritabanına kaydet
+
+Paralel CI işleri için:
+    python run_scraper.py [site_key] [max_pages] --shard 0/4   # URL'lerin 1/4'ü
+    python run_scraper.py --merge shard_*.db                   # shard DB'lerini birleştir
 """
 
-import time
-from database import SessionLocal, SiteConfig, SiteUrl, Product
+from database import SessionLocal, SiteConfig, SiteUrl, Product, init_database
 from trendyol_scraper import TrendyolScraper
 from hepsiburada_scraper import HepsiburadaScraper
+from rate_limiter import get_rate_limiter
+from sharding import Shard, add_shard_arguments, filter_shard, format_shard, merge_shard_databases, site_url_key
 from datetime import datetime
+from typing import Optional
 
-def run_scraper(site_key: str = None, max_pages: int = 1):
-    """Belirtilen site için scraper'ı çalıştır"""
+def run_scraper(site_key: str = None, max_pages: int = 1, shard: Optional[Shard] = None, max_urls: int = 3):
+    """Belirtilen site için scraper'ı çalıştır (shard verilirse sadece o shard'ın URL'leri)"""
 
     session = SessionLocal()
 
@@ -40,6 +46,9 @@ def run_scraper(site_key: str = None, max_pages: int = 1):
                 print(f"⚠️ {site.site_key} için scraper bulunamadı, geçiliyor...")
                 continue
 
+            # SiteConfig.rate_limit başlangıç değeri; gerisini limiter ayarlar
+            get_rate_limiter().register(site.base_url, site.rate_limit or 2.0)
+
             # Bu site için URL'leri al
             urls = session.query(SiteUrl).filter_by(
                 site_id=site.id,
@@ -50,9 +59,13 @@ def run_scraper(site_key: str = None, max_pages: int = 1):
                 print(f"  ⚠️ {site.site_name} için aktif URL bulunamadı")
                 continue
 
+            urls = filter_shard(urls, shard, key=lambda u: site_url_key(site.base_url, u.url_path))
+            if shard:
+                print(f"  🧩 Shard {format_shard(shard)}: {len(urls)} URL")
+
             site_product_count = 0
 
-            for url in urls[:3]:  # İlk 3 URL'yi çek
+            for url in urls[:max_urls or None]:  # Varsayılan: ilk 3 URL
                 print(f"\n  📍 Kategori: {url.category or 'Genel'}")
                 print(f"  🔗 URL: {url.url_path[:80]}...")
 
@@ -108,8 +121,6 @@ def run_scraper(site_key: str = None, max_pages: int = 1):
                     print(f"  ❌ Hata: {str(e)}")
                     session.rollback()
 
-                time.sleep(2)  # Rate limiting
-
             print(f"\n✅ {site.site_name} için {site_product_count} yeni ürün eklendi")
             total_products += site_product_count
 
@@ -120,6 +131,12 @@ def run_scraper(site_key: str = None, max_pages: int = 1):
         total_in_db = session.query(Product).count()
         print(f"📦 Veritabanında toplam {total_in_db} ürün var")
 
+        # Sitelerin tolere ettiği hızlar (AIMD sonrası)
+        for host, info in get_rate_limiter().rates().items():
+            if info['ok'] or info['throttled'] or info['errors']:
+                print(f"⏱️ {host}: {info['rate']} istek/sn, eşzamanlılık {info['concurrency']} "
+                      f"({info['ok']} başarılı, {info['throttled']} 429/503)")
+
     except Exception as e:
         print(f"❌ Genel hata: {e}")
         session.rollback()
@@ -128,19 +145,31 @@ def run_scraper(site_key: str = None, max_pages: int = 1):
 
 
 if __name__ == "__main__":
-    import sys
+    import argparse
 
     # Komut satırı parametreleri
-    site_key = sys.argv[1] if len(sys.argv) > 1 else None
-    max_pages = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+    parser = argparse.ArgumentParser(description="Market Spider scraper")
+    parser.add_argument('site_key', nargs='?', help="Site anahtarı (boşsa tüm aktif siteler)")
+    parser.add_argument('max_pages', nargs='?', type=int, default=1, help="URL başına max sayfa")
+    parser.add_argument('--max-urls', type=int, default=3, help="Site başına max URL (0 = hepsi)")
+    add_shard_arguments(parser)
+    args = parser.parse_args()
+
+    if args.merge:
+        # Hedef DB'de snapshot/yeni kolonlar yoksa birleştirme yarıda kalır
+        init_database()
+        merge_shard_databases(args.merge)
+        raise SystemExit(0)
 
     print("🚀 Market Spider Scraper")
     print("-" * 60)
 
-    if site_key:
-        print(f"Site: {site_key}")
+    if args.site_key:
+        print(f"Site: {args.site_key}")
     else:
         print("Tüm aktif siteler çekilecek")
-    print(f"Max sayfa: {max_pages}")
+    print(f"Max sayfa: {args.max_pages}")
+    if args.shard:
+        print(f"Shard: {format_shard(args.shard)}")
 
-    run_scraper(site_key, max_pages)
\ No newline at end of file
+    run_scraper(args.site_key, args.max_pages, shard=args.shard, max_urls=args.max_urls)
@@ -0,0 +1,270 @@
+"""
+Scrape Scheduler - SiteUrl tablosundan beslenen iş planlayıcısı
+
+Her tick'te vadesi gelen SiteUrl kayıtları bulunur: yenileme aralığı
+önceliğe göre belirlenir (config.SCHEDULER['refresh_minutes'], 1 = sıcak
+kategori saatlik, 3 = soğuk kategori günlük). İşler önce önceliğe sonra
+gecikme oranına göre sıralanıp sınırlı bir worker havuzuna dağıtılır.
+Ürünler ve last_scraped / last_product_count / total_scrape_count
+güncellemesi (tek UPDATE) process'in tek yazıcısında (db_writer) aynı
+transaction'da kaydedilir; planlayıcının session'ı sadece okuma içindir.
+
+Hata veren ya da ürün döndürmeyen URL son çekim sayılmaz; failure_count ile
+üstel artan bekleme süresi boyunca planlanmaz ve aynı öncelikte sağlıklı
+URL'lerin arkasına sıralanır, böylece bozuk URL'ler tick'leri doldurmaz.
+
+shard verilirse (sharding.parse_shard) sadece URL'i bu shard'a düşen işler
+planlanır; paralel CI runner'ları aynı tabloyu çakışmadan paylaşır.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from base_scraper import ProductNormalizer
+from config import ECOMMERCE_SITES, SCHEDULER
+from database import SessionLocal, SiteConfig, SiteUrl
+from db_writer import get_db_writer
+from persistence import BulkProductWriter, summarize_batches
+from sharding import Shard, in_shard, site_url_key
+
+logger = logging.getLogger(__name__)
+
+
+class SiteUrlScheduler:
+    """SiteUrl öncelik ve vadelerine göre scraping işlerini dağıtır"""
+
+    def __init__(self, spider, session: Optional[Session] = None, settings: Optional[Dict] = None,
+                 shard: Optional[Shard] = None):
+        self.spider = spider
+        self.session = session or SessionLocal()
+        self.settings = {**SCHEDULER, **(settings or {})}
+        self.shard = shard
+        self.writer = get_db_writer()
+        self._local = threading.local()
+        self._scrapers: List[tuple] = []  # (thread ident, scraper): kapatmak için
+        self._scrapers_lock = threading.Lock()
+
+    def refresh_interval(self, priority: Optional[int]) -> timedelta:
+        minutes = self.settings['refresh_minutes'].get(priority or 1, self.settings['default_refresh_minutes'])
+        return timedelta(minutes=minutes)
+
+    def retry_at(self, site_url: SiteUrl) -> Optional[datetime]:
+        """Art arda hatalardan sonra URL'in en erken tekrar deneneceği an"""
+        if not site_url.failure_count or site_url.last_failed_at is None:
+            return None
+        minutes = min(
+            self.settings['failure_backoff_minutes'] * 2 ** (site_url.failure_count - 1),
+            self.settings['max_failure_backoff_minutes']
+        )
+        return site_url.last_failed_at + timedelta(minutes=minutes)
+
+    def due_jobs(self, limit: Optional[int] = None, now: Optional[datetime] = None,
+                 force: bool = False) -> List[SiteUrl]:
+        """
+        Vadesi gelmiş aktif URL'ler: öncelik, hata sayısı, sonra gecikme oranı
+        sırasıyla (force: vadeye ve hata beklemesine bakma)
+        """
+        now = now or datetime.utcnow()
+        limit = limit or self.settings['max_jobs_per_tick']
+
+        rows = (
+            self.session.query(SiteUrl, SiteConfig.site_key, SiteConfig.base_url)
+            .join(SiteConfig, SiteUrl.site_id == SiteConfig.id)
+            .filter(SiteUrl.is_active.is_(True), SiteConfig.is_active.is_(True))
+            .all()
+        )
+
+        due = []
+        for site_url, site_key, base_url in rows:
+            if site_key not in self.spider.scrapers:
+                continue
+            if not in_shard(site_url_key(base_url, site_url.url_path), self.shard):
+                continue
+
+            retry_at = self.retry_at(site_url)
+            if retry_at is not None and now < retry_at and not force:
+                continue
+
+            interval = self.refresh_interval(site_url.priority)
+            if site_url.last_scraped is None:
+                overdue = float('inf')  # Hiç çekilmemiş
+            else:
+                overdue = (now - site_url.last_scraped) / interval
+                if overdue < 1 and not force:
+                    continue
+            due.append((site_url.priority or 1, site_url.failure_count or 0, -overdue, site_url.id,
+                        site_url, site_key, base_url))
+
+        due.sort(key=lambda item: item[:4])
+        jobs = []
+        for *_, site_url, site_key, base_url in due[:limit]:
+            # Worker thread'lerine session'sız (detached) nesne gider
+            self.session.expunge(site_url)
+            site_url.site_key = site_key
+            site_url.base_url = base_url
+            jobs.append(site_url)
+        self.session.rollback()
+        return jobs
+
+    def _scraper(self, site_key: str, base_url: str):
+        """Thread başına site scraper'ı"""
+        scrapers = self._local.__dict__.setdefault('scrapers', {})
+        if site_key not in scrapers:
+            site_config = {**ECOMMERCE_SITES.get(site_key, {}), 'base_url': base_url}
+            scrapers[site_key] = self.spider.scrapers[site_key](site_config)
+            with self._scrapers_lock:
+                self._scrapers.append((threading.get_ident(), scrapers[site_key]))
+        return scrapers[site_key]
+
+    def close_scrapers(self, keep_current: bool = False):
+        """Thread scraper'larını kapat (keep_current: çağıran thread'inkiler kalır)"""
+        current = threading.get_ident()
+        with self._scrapers_lock:
+            closing = [scraper for ident, scraper in self._scrapers if not (keep_current and ident == current)]
+            self._scrapers = [item for item in self._scrapers if keep_current and item[0] == current]
+        if not keep_current:
+            self._local.__dict__.pop('scrapers', None)
+
+        for scraper in closing:
+            try:
+                scraper.close()
+            except Exception as e:
+                logger.warning(f"Scraper kapatılamadı: {e}")
+
+    def run_job(self, site_url: SiteUrl) -> List[Dict]:
+        """Worker thread: URL'i çek (DB'ye dokunmaz)"""
+        return self._scraper(site_url.site_key, site_url.base_url).scrape_site_url(site_url)
+
+    def load(self, site_url_id: int) -> Optional[SiteUrl]:
+        """Tek SiteUrl'i iş olarak yükle (iş kuyruğu worker'ları için)"""
+        row = (
+            self.session.query(SiteUrl, SiteConfig.site_key, SiteConfig.base_url)
+            .join(SiteConfig, SiteUrl.site_id == SiteConfig.id)
+            .filter(SiteUrl.id == site_url_id)
+            .first()
+        )
+        if row is None:
+            return None
+
+        site_url, site_key, base_url = row
+        self.session.expunge(site_url)
+        site_url.site_key = site_key
+        site_url.base_url = base_url
+        self.session.rollback()
+        return site_url
+
+    def save_result(self, site_url: SiteUrl, products: List[Dict]) -> Dict:
+        """Ürünleri kaydet ve URL istatistiklerini güncelle (tek yazma işi)"""
+        if not products:
+            # Sayfa alınamayınca scraper boş liste döner: last_scraped'e dokunma, URL vadeli kalsın
+            raise RuntimeError(f"Ürün bulunamadı: {site_url.url_path}")
+        normalized = [ProductNormalizer.normalize_product(product, site_url.site_key) for product in products]
+        batches = self.writer.submit(_write_result, site_url.id, normalized, len(products)).result()
+        return {'products': len(products), **summarize_batches(batches)}
+
+    def mark_scraped(self, site_url_id: int, product_count: int):
+        self.writer.submit(_mark_scraped, site_url_id, product_count).result()
+
+    def record_failure(self, site_url: SiteUrl, error: str):
+        """Başarısız denemeyi kaydet (last_scraped değişmez, URL bekleme süresine girer)"""
+        try:
+            self.writer.submit(_mark_failed, site_url.id, error).result()
+        except Exception as e:
+            logger.warning(f"URL hatası kaydedilemedi {site_url.url_path}: {e}")
+
+    def dispatch(self, limit: Optional[int] = None, workers: Optional[int] = None,
+                 force: bool = False) -> Dict[int, Dict]:
+        """Vadesi gelen işleri worker havuzunda çalıştır, sonuçları kaydet"""
+        jobs = self.due_jobs(limit, force=force)
+        if not jobs:
+            return {}
+
+        workers = workers or self.settings['workers']
+        logger.info(f"📅 {len(jobs)} URL işi dağıtılıyor ({workers} worker)")
+
+        started_at = time.time()
+        results = {}
+        site_results: Dict[str, Dict] = {}
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = {executor.submit(self.run_job, site_url): site_url for site_url in jobs}
+                for future in as_completed(futures):
+                    site_url = futures[future]
+                    site_result = site_results.setdefault(site_url.site_key, {
+                        'products_found': 0, 'products_updated': 0, 'errors': [], 'duration': 0
+                    })
+                    try:
+                        result = self.save_result(site_url, future.result())
+                        results[site_url.id] = result
+                        site_result['products_found'] += result['products']
+                        site_result['products_updated'] += result['updated']
+                    except Exception as e:
+                        # Vadesi geçmiş kalır, bir sonraki tick'te tekrar denenir
+                        logger.error(f"URL işi başarısız {site_url.url_path}: {e}")
+                        self.session.rollback()
+                        self.record_failure(site_url, str(e))
+                        results[site_url.id] = None
+                        site_result['errors'].append(str(e))
+        finally:
+            # Havuz thread'leri bitti; onların tarayıcı/oturum kaynaklarını bırak
+            self.close_scrapers(keep_current=True)
+
+        for site_key, site_result in site_results.items():
+            site_result['duration'] = time.time() - started_at
+            self.spider.save_scrape_log(site_key, site_result)
+
+        done = sum(1 for result in results.values() if result)
+        logger.info(f"✅ {done}/{len(jobs)} URL işi tamamlandı ({time.time() - started_at:.1f}s)")
+        return results
+
+    def has_jobs(self) -> bool:
+        """Planlanacak SiteUrl kaydı var mı"""
+        return self.session.query(SiteUrl.id).filter(SiteUrl.is_active.is_(True)).first() is not None
+
+    def job_count(self) -> int:
+        """Aktif SiteUrl sayısı (shard filtresinden önce; tam tarama limiti için)"""
+        return self.session.query(SiteUrl.id).filter(SiteUrl.is_active.is_(True)).count()
+
+    def close(self):
+        self.close_scrapers()
+        self.session.close()
+
+
+def _mark_scraped(session: Session, site_url_id: int, product_count: int):
+    """İstatistikleri tek UPDATE ile güncelle (sayaç artışı SQL tarafında)"""
+    session.query(SiteUrl).filter(SiteUrl.id == site_url_id).update({
+        SiteUrl.last_scraped: datetime.utcnow(),
+        SiteUrl.last_product_count: product_count,
+        SiteUrl.total_scrape_count: SiteUrl.total_scrape_count + 1,
+        SiteUrl.failure_count: 0,
+        SiteUrl.last_error: None
+    }, synchronize_session=False)
+
+
+def _mark_failed(session: Session, site_url_id: int, error: str):
+    """Hata sayacını artır; last_scraped'e dokunma"""
+    session.query(SiteUrl).filter(SiteUrl.id == site_url_id).update({
+        SiteUrl.failure_count: func.coalesce(SiteUrl.failure_count, 0) + 1,
+        SiteUrl.last_failed_at: datetime.utcnow(),
+        SiteUrl.last_error: error
+    }, synchronize_session=False)
+
+
+def _write_result(session: Session, site_url_id: int, products: List[Dict], product_count: int) -> List[Dict]:
+    batches = BulkProductWriter(session).write(products, commit=False)
+    _mark_scraped(session, site_url_id, product_count)
+    return batches
+
+
+def in_active_window(now: Optional[datetime] = None) -> bool:
+    """SCHEDULER start_time / end_time aralığında mıyız"""
+    now = (now or datetime.now()).strftime('%H:%M')
+    start, end = SCHEDULER.get('start_time', '00:00'), SCHEDULER.get('end_time', '23:59')
+    return start <= now <= end if start <= end else now >= start or now <= end
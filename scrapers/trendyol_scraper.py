@@ -2,21 +2,106 @@
 Trendyol Scraper
 """
 
-from bs4 import BeautifulSoup
-from typing import List, Dict, Optional
+from typing import Callable, List, Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlparse
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from base_scraper import BaseScraper
+from config import SCRAPING
+import logging
 import re
 import json
 
+logger = logging.getLogger(__name__)
+
+INITIAL_STATE_MARKER = b'window.__SEARCH_APP_INITIAL_STATE__'
+CDN_URL = "https://cdn.dsmcdn.com"
+API_URL = "https://public.trendyol.com/discovery-web-searchgw-service/v2/api/infinite-scroll"
+
+_json_decoder = json.JSONDecoder()
+
 
 class TrendyolScraper(BaseScraper):
     """Trendyol.com scraper"""
 
-    def find_product_elements(self, soup: BeautifulSoup) -> List:
+    def parse(self, content: bytes) -> List[Dict]:
+        """
+        Listeleme sayfasını parse et.
+
+        Sayfadaki `window.__SEARCH_APP_INITIAL_STATE__` JSON'u tüm ürün
+        listesini içerir; varsa DOM ağacı kurmadan tek JSON decode ile okunur.
+        Blob yoksa BeautifulSoup ile DOM parse'a düşülür.
+        """
+        state = self.extract_initial_state(content)
+        if state and state.get('products'):
+            products = [p for p in state['products'] if p.get('cardType', 'PRODUCT') == 'PRODUCT']
+            return [self.map_state_product(product, rank)
+                    for rank, product in enumerate(products[:100], 1)]
+
+        return super().parse(content)
+
+    @staticmethod
+    def extract_initial_state(content: bytes) -> Optional[Dict]:
+        """Sayfadaki arama state JSON'unu kesip çöz"""
+        if not content:
+            return None
+
+        marker = content.find(INITIAL_STATE_MARKER)
+        if marker < 0:
+            return None
+
+        start = content.find(b'{', marker)
+        if start < 0:
+            return None
+
+        end = content.find(b'</script>', start)
+
+        blob = content[start:end if end > 0 else len(content)].decode('utf-8', errors='replace')
+        try:
+            state, _ = _json_decoder.raw_decode(blob)
+        except ValueError:
+            return None
+
+        return state if isinstance(state, dict) else None
+
+    def map_state_product(self, product: Dict, rank: int) -> Dict:
+        """State JSON'daki ürünü DOM parse ile aynı sözlük yapısına çevir"""
+        price = product.get('price') or {}
+        rating = product.get('ratingScore') or {}
+        images = product.get('images') or []
+        brand = (product.get('brand') or {}).get('name', '')
+        title = product.get('name', '')
+
+        product_data = {
+            'id': str(product.get('id', '')),
+            'title': title,
+            'brand': brand,
+            'url': self.make_absolute_url(product.get('url', '')),
+            'image': f"{CDN_URL}{images[0]}" if images else '',
+            'price': price.get('discountedPrice') or price.get('sellingPrice'),
+            'original_price': price.get('originalPrice'),
+            'rating': rating.get('averageRating'),
+            'review_count': rating.get('totalCount', 0),
+            'category': self.categorize_product(title, product.get('categoryHierarchy', '')),
+            'sub_category': product.get('categoryName', ''),
+            'rank': rank
+        }
+
+        if product.get('freeCargo'):
+            product_data['free_shipping'] = True
+
+        # "2000+" gibi sipariş sayısı
+        order_count = ((product.get('socialProof') or {}).get('orderCount') or {}).get('count', '')
+        match = re.fullmatch(r'(\d+)\+?', str(order_count))
+        if match:
+            product_data['sales_count'] = int(match.group(1))
+
+        return product_data
+
+    def find_product_elements(self, document) -> List:
         """Trendyol'da ürün elementlerini bul"""
         # Farklı container'ları dene
         selectors = [
@@ -28,7 +113,7 @@ class TrendyolScraper(BaseScraper):
         ]
 
         for selector in selectors:
-            elements = soup.select(selector)
+            elements = self.select(document, selector)
             if elements:
                 return elements
 
@@ -40,79 +125,78 @@ class TrendyolScraper(BaseScraper):
             product_data = {}
 
             # Ürün ID
-            product_id = element.get('data-id', '')
-            if not product_id:
+            product_id = self.attr(element, 'data-id', '')
+            link = self.select_one(element, 'a')
+            href = self.attr(link, 'href') if link is not None else None
+            if not product_id and href:
                 # ID'yi link'ten çıkarmaya çalış
-                link = element.select_one('a')
-                if link and link.get('href'):
-                    product_id = self.extract_product_id(link['href'])
+                product_id = self.extract_product_id(href)
 
             product_data['id'] = product_id
 
             # Ürün başlığı ve linki
-            title_elem = element.select_one('span[class*="prdct-desc-cntnr-name"], '
-                                           'span[class*="product-name"], '
-                                           'div[class*="product-title"]')
-            if title_elem:
-                product_data['title'] = self.clean_text(title_elem.text)
+            title_elem = self.select_one(element, 'span[class*="prdct-desc-cntnr-name"], '
+                                                  'span[class*="product-name"], '
+                                                  'div[class*="product-title"]')
+            if title_elem is not None:
+                product_data['title'] = self.clean_text(self.text(title_elem))
 
             # Marka
-            brand_elem = element.select_one('span[class*="prdct-desc-cntnr-ttl"], '
-                                           'span[class*="product-brand"]')
-            if brand_elem:
-                product_data['brand'] = self.clean_text(brand_elem.text)
+            brand_elem = self.select_one(element, 'span[class*="prdct-desc-cntnr-ttl"], '
+                                                  'span[class*="product-brand"]')
+            if brand_elem is not None:
+                product_data['brand'] = self.clean_text(self.text(brand_elem))
 
             # URL
-            link_elem = element.select_one('a')
-            if link_elem and link_elem.get('href'):
-                product_data['url'] = self.make_absolute_url(link_elem['href'])
+            if href:
+                product_data['url'] = self.make_absolute_url(href)
 
             # Resim
-            img_elem = element.select_one('img')
-            if img_elem:
-                product_data['image'] = img_elem.get('src') or img_elem.get('data-src')
+            img_elem = self.select_one(element, 'img')
+            if img_elem is not None:
+                product_data['image'] = self.attr(img_elem, 'src') or self.attr(img_elem, 'data-src')
 
             # Fiyat
-            price_elem = element.select_one('div[class*="price-value"], '
-                                           'span[class*="prc-box-dscntd"], '
-                                           'div[class*="product-price"]')
-            if price_elem:
-                product_data['price'] = self.parse_price(price_elem.text)
+            price_elem = self.select_one(element, 'div[class*="price-value"], '
+                                                  'span[class*="prc-box-dscntd"], '
+                                                  'div[class*="product-price"]')
+            if price_elem is not None:
+                product_data['price'] = self.parse_price(self.text(price_elem))
 
             # Orijinal fiyat
-            original_price_elem = element.select_one('span[class*="prc-box-orgnl"], '
-                                                    'del[class*="price"]')
-            if original_price_elem:
-                product_data['original_price'] = self.parse_price(original_price_elem.text)
+            original_price_elem = self.select_one(element, 'span[class*="prc-box-orgnl"], '
+                                                           'del[class*="price"]')
+            if original_price_elem is not None:
+                product_data['original_price'] = self.parse_price(self.text(original_price_elem))
 
             # Rating ve yorumlar
-            rating_elem = element.select_one('div[class*="rating-score"], '
-                                            'span[class*="rating"]')
-            if rating_elem:
-                rating_text = self.clean_text(rating_elem.text)
+            rating_elem = self.select_one(element, 'div[class*="rating-score"], '
+                                                   'span[class*="rating"]')
+            if rating_elem is not None:
+                rating_text = self.clean_text(self.text(rating_elem))
                 try:
                     product_data['rating'] = float(rating_text.replace(',', '.'))
                 except:
                     pass
 
             # Yorum sayısı
-            review_elem = element.select_one('span[class*="rating-count"], '
-                                            'span[class*="review-count"]')
-            if review_elem:
-                review_text = re.findall(r'\d+', review_elem.text)
+            review_elem = self.select_one(element, 'span[class*="rating-count"], '
+                                                   'span[class*="review-count"]')
+            if review_elem is not None:
+                review_text = re.findall(r'\d+', self.text(review_elem))
                 if review_text:
                     product_data['review_count'] = int(review_text[0])
 
             # Satıcı bilgisi
-            seller_elem = element.select_one('span[class*="seller-name"], '
-                                            'div[class*="merchant-name"]')
-            if seller_elem:
-                product_data['seller'] = self.clean_text(seller_elem.text)
+            seller_elem = self.select_one(element, 'span[class*="seller-name"], '
+                                                   'div[class*="merchant-name"]')
+            if seller_elem is not None:
+                product_data['seller'] = self.clean_text(self.text(seller_elem))
 
             # Kargo bilgisi
-            shipping_elem = element.select_one('div[class*="shipment"], '
-                                              'span[class*="free-shipping"]')
-            if shipping_elem:
+            shipping_elem = self.select_one(element, 'div[class*="shipment"], '
+                                                     'span[class*="free-shipping"]')
+            if shipping_elem is not None:
                 product_data['free_shipping'] = True
 
             # Kategori
@@ -130,16 +214,11 @@ class TrendyolScraper(BaseScraper):
             print(f"Ürün verisi çıkarılamadı: {e}")
             return None
 
-    def scrape_best_sellers_api(self, category_id: str = None) -> List[Dict]:
-        """Trendyol API üzerinden en çok satan ürünleri al"""
-        products = []
-
-        # Trendyol'un internal API'si
-        api_url = "https://public.trendyol.com/discovery-web-searchgw-service/v2/api/infinite-scroll"
-
+    def api_params(self, page: int, category_id: str = None) -> Dict:
+        """Infinite-scroll API'sinin sayfa parametreleri"""
         params = {
             'sst': 'BEST_SELLER',  # En çok satanlar
-            'pi': 1,  # Sayfa
+            'pi': page,  # Sayfa
             'culture': 'tr-TR',
             'userGenderId': '',
             'pId': '',
@@ -153,38 +232,136 @@ class TrendyolScraper(BaseScraper):
         }
 
         if category_id:
-            params['wb'] = category_id  # Kategori ID
+            params['wc'] = category_id  # Kategori ID
+
+        return params
+
+    def fetch_api_page(self, page: int, category_id: str = None) -> List[Dict]:
+        """Tek API sayfasının ham ürün listesi (host limiti dahilinde)"""
+        response = self.rate_limiter.get(self.scraper, API_URL, params=self.api_params(page, category_id),
+                                         headers=self.headers, timeout=30)
+        response.raise_for_status()
+        return ((response.json() or {}).get('result') or {}).get('products') or []
+
+    @staticmethod
+    def map_api_product(product: Dict, rank: int) -> Dict:
+        return {
+            'id': product.get('id'),
+            'title': product.get('name'),
+            'brand': (product.get('brand') or {}).get('name'),
+            'url': f"https://www.trendyol.com{product.get('url')}",
+            'image': f"{CDN_URL}{(product.get('images') or [{}])[0].get('url', '')}",
+            'price': (product.get('price') or {}).get('sellingPrice'),
+            'original_price': (product.get('price') or {}).get('originalPrice'),
+            'rating': (product.get('ratingScore') or {}).get('averageRating'),
+            'review_count': (product.get('ratingScore') or {}).get('totalRatingCount'),
+            'seller': (product.get('merchant') or {}).get('name'),
+            'category': product.get('categoryName'),
+            'rank': rank,
+            'in_stock': not product.get('hasStock', True)
+        }
 
+    def scrape_best_sellers_api(self, category_id: str = None, max_pages: int = None,
+                                max_products: int = None,
+                                on_page: Callable[[List[Dict]], None] = None) -> List[Dict]:
+        """
+        Trendyol API üzerinden en çok satan ürünleri al.
+
+        1..max_pages sayfaları eşzamanlı istenir (host limiti dahilinde) ve
+        sıra ile işlenir: ürünler sayfalar arası ID'ye göre tekilleştirilir,
+        rank kümülatiftir. İlk sayfadan kısa gelen sayfada durulur, kalan
+        istekler iptal edilir. on_page verilirse her sayfanın ürünleri
+        geldikçe (sırayla) ona aktarılır. HTML fallback'i sadece hiç sayfa
+        alınamadıysa çalışır; on_page'in hataları olduğu gibi yükselir.
+        """
+        max_pages = max_pages or self.site_config.get('max_pages', 1)
+        max_products = max_products or self.site_config.get('max_products', 100)
+
+        products = []
+        seen_ids = set()
+        page_size = None
+        in_callback = False
+
+        executor = ThreadPoolExecutor(max_workers=min(max_pages, SCRAPING['max_workers']))
+        futures = {page: executor.submit(self.fetch_api_page, page, category_id)
+                   for page in range(1, max_pages + 1)}
         try:
-            response = self.scraper.get(api_url, params=params, headers=self.headers)
-            data = response.json()
-
-            if 'result' in data and 'products' in data['result']:
-                for rank, product in enumerate(data['result']['products'][:100], 1):
-                    product_data = {
-                        'id': product.get('id'),
-                        'title': product.get('name'),
-                        'brand': product.get('brand', {}).get('name'),
-                        'url': f"https://www.trendyol.com{product.get('url')}",
-                        'image': f"https://cdn.dsmcdn.com{product.get('images', [{}])[0].get('url', '')}",
-                        'price': product.get('price', {}).get('sellingPrice'),
-                        'original_price': product.get('price', {}).get('originalPrice'),
-                        'rating': product.get('ratingScore', {}).get('averageRating'),
-                        'review_count': product.get('ratingScore', {}).get('totalRatingCount'),
-                        'seller': product.get('merchant', {}).get('name'),
-                        'category': product.get('categoryName'),
-                        'rank': rank,
-                        'in_stock': not product.get('hasStock', True)
-                    }
-                    products.append(product_data)
+            # Sayfalar geldikçe değil sırayla tüket: rank ve tekilleştirme sıraya bağlı
+            for page, future in futures.items():
+                try:
+                    raw_products = future.result()
+                except Exception as e:
+                    if page == 1:
+                        raise
+                    logger.warning(f"API sayfası {page} alınamadı, duruluyor: {e}")
+                    break
+
+                page_size = page_size or len(raw_products)
+                page_products = []
+                for product in raw_products:
+                    product_id = product.get('id')
+                    if product_id in seen_ids:
+                        continue
+                    seen_ids.add(product_id)
+                    page_products.append(self.map_api_product(product, len(products) + len(page_products) + 1))
+                    if len(products) + len(page_products) >= max_products:
+                        break
+
+                products.extend(page_products)
+                if on_page and page_products:
+                    in_callback = True
+                    on_page(page_products)
+                    in_callback = False
+
+                if len(products) >= max_products or len(raw_products) < page_size or not raw_products:
+                    break
 
         except Exception as e:
+            if in_callback:
+                # Kaydetme (on_page) hatası API hatası değildir: çağırana ilet
+                raise
+            if products:
+                # Sayfalar on_page'e aktarıldı; fallback aynı ürünleri tekrar yazardı
+                logger.warning(f"API hatası, {len(products)} ürünle duruluyor: {e}")
+                return products
+
             print(f"API hatası: {e}")
             # Fallback to web scraping
-            return self.scrape_best_sellers("https://www.trendyol.com/en-cok-satanlar")
+            products = self.scrape_best_sellers("https://www.trendyol.com/en-cok-satanlar")
+            if on_page and products:
+                on_page(products)
+            return products
+
+        finally:
+            # Kısa sayfadan sonrakiler gereksiz: başlamamış istekleri iptal et
+            for future in futures.values():
+                future.cancel()
+            executor.shutdown(wait=False)
 
         return products
 
+    @staticmethod
+    def category_id_from_url(url: str) -> Optional[str]:
+        """?wc=103108 ya da /...-x-c103108 biçimindeki kategori ID'si"""
+        category_id = (parse_qs(urlparse(url).query).get('wc') or [None])[0]
+        if category_id:
+            return category_id
+        match = re.search(r'-c(\d+)(?:$|[/?])', urlparse(url).path)
+        return match.group(1) if match else None
+
+    def scrape_site_url(self, site_url, on_page: Callable[[List[Dict]], None] = None) -> List[Dict]:
+        """SiteUrl kaydını (max_pages / max_products ve kategori ID'si ile) API'den çek"""
+        category_id = self.category_id_from_url(site_url.url_path)
+        if category_id is None and 'en-cok-satan' not in site_url.url_path:
+            # Kategori ID'si çözülemeyen sayfa (butik, arama vs.): HTML listeleme
+            return super().scrape_site_url(site_url, on_page)
+
+        return self.scrape_best_sellers_api(
+            category_id=category_id,
+            max_pages=site_url.max_pages,
+            max_products=site_url.max_products,
+            on_page=on_page
+        )
 
 if __name__ == "__main__":
     # Test
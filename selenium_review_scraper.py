@@ -4,19 +4,16 @@ Selenium ile GERÇEK Trendyol Yorumları Çeker
 Gerçek tarayıcı kullanarak API kısıtlamalarını aşar
 """
 
-from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
-from webdriver_manager.chrome import ChromeDriverManager
 import time
 import json
 from datetime import datetime
 from database import SessionLocal, Product, ProductReview
 from turkish_review_ai import TurkishReviewAI
+from browser_pool import get_browser_pool
 
 class SeleniumTrendyolScraper:
     """Selenium ile gerçek Trendyol yorumları çeker"""
@@ -25,38 +22,18 @@ class SeleniumTrendyolScraper:
         self.session = SessionLocal()
         self.ai = TurkishReviewAI()
         self.driver = None
+        self._lease = None
         self.headless = headless
         self._setup_driver()
 
     def _setup_driver(self):
-        """Chrome driver'ı ayarla"""
-        chrome_options = Options()
-
-        if self.headless:
-            chrome_options.add_argument("--headless")
-
-        # Anti-detection ayarları
-        chrome_options.add_argument("--disable-blink-features=AutomationControlled")
-        chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-        chrome_options.add_experimental_option('useAutomationExtension', False)
-        chrome_options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
-        chrome_options.add_argument("--window-size=1920,1080")
-        chrome_options.add_argument("--disable-gpu")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-
-        # ChromeDriver'ı otomatik indir ve ayarla
-        service = Service(ChromeDriverManager().install())
-        self.driver = webdriver.Chrome(service=service, options=chrome_options)
-
-        # JavaScript detection bypass
-        self.driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {
-            'source': '''
-                Object.defineProperty(navigator, 'webdriver', {
-                    get: () => undefined
-                })
-            '''
-        })
+        """Paylaşılan Chrome havuzundan driver ödünç al"""
+        self.pool = get_browser_pool(
+            headless=self.headless,
+            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+        )
+        self._lease = self.pool.acquire()
+        self.driver = self._lease.driver
 
     def get_product_reviews(self, product_url: str, max_reviews: int = 100):
         """Ürün yorumlarını gerçek tarayıcı ile çek"""
@@ -384,9 +361,11 @@ class SeleniumTrendyolScraper:
         print("="*60)
 
     def close(self):
-        """Browser'ı kapat"""
-        if self.driver:
-            self.driver.quit()
+        """Browser'ı havuza iade et"""
+        if self._lease is not None:
+            self.pool.release(self._lease)
+            self._lease = None
+            self.driver = None
 
     def __del__(self):
         """Destructor - browser'ı kapat"""
@@ -0,0 +1,391 @@
+"""
+Sharding - Paralel CI işleri için deterministik iş bölme ve shard DB birleştirme
+
+`--shard i/n` ile çalışan her runner SiteUrl işlerinin ve kategori
+URL'lerinin yalnızca kendi payını çeker. Pay, kanonik URL'in sabit
+(process'ten bağımsız) hash'i ile belirlenir; aynı URL her çalıştırmada
+aynı shard'a düşer, shard'lar birbirinin işini tekrar etmez.
+
+Her runner kendi market_spider.db dosyasına yazar. merge_shard_databases
+bu dosyaları ana veritabanına katlar:
+- ürünler product_id ile tekilleştirilir (daha yeni güncellenen kazanır),
+- fiyat / sıralama geçmişi eklenir ((ürün, timestamp) aynıysa atlanır),
+- yorumlar (ürün, review_hash) ile tekilleştirilir,
+- SiteUrl istatistikleri ve scrape log'ları taşınır,
+- product_latest_snapshot geçmişten yeniden kurulur.
+"""
+
+import argparse
+import hashlib
+import logging
+import os
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, TypeVar
+
+from sqlalchemy import bindparam, create_engine, inspect, select, tuple_
+from sqlalchemy.orm import Session
+
+from database import (
+    SessionLocal, SiteConfig, SiteUrl, Product, PriceHistory, RankingHistory,
+    ProductReview, ScrapeLog, backfill_latest_snapshots
+)
+from url_dedup import canonicalize_url
+
+logger = logging.getLogger(__name__)
+
+Shard = Tuple[int, int]  # (index, count), index 0 tabanlı
+T = TypeVar('T')
+
+CHUNK_SIZE = 500
+
+
+def parse_shard(value: Optional[str]) -> Optional[Shard]:
+    """'i/n' ifadesini (i, n) olarak çöz; i 0 tabanlıdır (0/4 ... 3/4)"""
+    if not value:
+        return None
+
+    try:
+        index, count = (int(part) for part in value.split('/'))
+    except ValueError:
+        raise ValueError(f"Geçersiz shard: {value!r} (beklenen biçim: i/n, örn. 0/4)")
+
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"Geçersiz shard: {value!r} (0 <= i < n olmalı)")
+    return index, count
+
+
+def shard_of(url: str, count: int) -> int:
+    """URL'in düştüğü shard; Python hash()'i process başına rastgele olduğu için sha1 kullanılır"""
+    digest = hashlib.sha1(canonicalize_url(url).encode('utf-8')).hexdigest()
+    return int(digest[:12], 16) % count
+
+
+def in_shard(url: str, shard: Optional[Shard]) -> bool:
+    if shard is None or shard[1] == 1:
+        return True
+    return shard_of(url, shard[1]) == shard[0]
+
+
+def filter_shard(items: Iterable[T], shard: Optional[Shard], key: Callable[[T], str]) -> List[T]:
+    """Sadece bu shard'a düşen öğeleri döndür (sıra korunur)"""
+    items = list(items)
+    if shard is None:
+        return items
+    return [item for item in items if in_shard(key(item), shard)]
+
+
+def site_url_key(base_url: str, url_path: str) -> str:
+    """SiteUrl için shard anahtarı: tam (mutlak) URL"""
+    return url_path if url_path.startswith('http') else f"{base_url.rstrip('/')}/{url_path.lstrip('/')}"
+
+
+def format_shard(shard: Optional[Shard]) -> str:
+    return f"{shard[0]}/{shard[1]}" if shard else "tümü"
+
+
+def _chunks(items: List[T], size: int = CHUNK_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class ShardMerger:
+    """Bir veya daha fazla shard veritabanını hedef session'a katlar"""
+
+    def __init__(self, session: Optional[Session] = None):
+        self.session = session or SessionLocal()
+        self.stats = {
+            'shards': 0, 'products_inserted': 0, 'products_updated': 0,
+            'price_rows': 0, 'ranking_rows': 0, 'reviews': 0,
+            'site_urls': 0, 'scrape_logs': 0
+        }
+
+    def merge(self, paths: List[str]) -> Dict:
+        for path in paths:
+            self.merge_one(path)
+
+        # Son fiyat/sıra özeti, eklenen geçmiş satırlarından yeniden kurulur
+        backfill_latest_snapshots(self.session.connection())
+        self.session.commit()
+        return self.stats
+
+    def merge_one(self, path: str):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Shard veritabanı bulunamadı: {path}")
+
+        engine = create_engine(f"sqlite:///{path}")
+        try:
+            with engine.connect() as source:
+                self._columns = {table: {column['name'] for column in inspect(source).get_columns(table)}
+                                 for table in inspect(source).get_table_names()}
+                site_map = self._merge_sites(source)
+                self._merge_site_urls(source, site_map)
+                product_map = self._merge_products(source, site_map)
+                self._merge_history(source, PriceHistory, product_map, 'price_rows')
+                self._merge_history(source, RankingHistory, product_map, 'ranking_rows')
+                self._merge_reviews(source, product_map)
+                self._merge_scrape_logs(source)
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+        finally:
+            engine.dispose()
+
+        self.stats['shards'] += 1
+        logger.info(f"🔀 Shard birleştirildi: {path}")
+
+    def _rows(self, source, model) -> List[Dict]:
+        """Shard tablosundaki satırlar (sadece iki tarafta da bulunan kolonlar)"""
+        table = model.__table__
+        available = self._columns.get(table.name)
+        if not available:
+            return []
+        columns = [column for column in table.columns if column.name in available]
+        return [dict(row._mapping) for row in source.execute(select(*columns))]
+
+    def _merge_sites(self, source) -> Dict[int, int]:
+        """Shard site_configs.id -> hedef site_configs.id (site_key üzerinden)"""
+        target = dict(self.session.query(SiteConfig.site_key, SiteConfig.id))
+        site_map = {}
+        for row in self._rows(source, SiteConfig):
+            if row['site_key'] not in target:
+                site = SiteConfig(**{key: value for key, value in row.items() if key != 'id'})
+                self.session.add(site)
+                self.session.flush()
+                target[site.site_key] = site.id
+            site_map[row['id']] = target[row['site_key']]
+        return site_map
+
+    def _merge_site_urls(self, source, site_map: Dict[int, int]):
+        """Yeni URL'leri ekle, çekim istatistiklerini en güncel olandan al"""
+        target = {
+            (site_id, url_path): (url_id, last_scraped, total)
+            for url_id, site_id, url_path, last_scraped, total in self.session.query(
+                SiteUrl.id, SiteUrl.site_id, SiteUrl.url_path, SiteUrl.last_scraped, SiteUrl.total_scrape_count
+            )
+        }
+
+        table = SiteUrl.__table__
+        new_rows, updates = [], []
+        for row in self._rows(source, SiteUrl):
+            row.pop('id')
+            site_id = site_map.get(row['site_id'])
+            if site_id is None:
+                continue
+            row['site_id'] = site_id
+            key = (site_id, row['url_path'])
+
+            if key not in target:
+                target[key] = (None, row.get('last_scraped'), row.get('total_scrape_count'))
+                new_rows.append(row)
+                continue
+
+            url_id, last_scraped, total = target[key]
+            if url_id and row.get('last_scraped') and (last_scraped is None or row['last_scraped'] > last_scraped):
+                updates.append({
+                    '_id': url_id,
+                    'last_scraped': row['last_scraped'],
+                    'last_product_count': row.get('last_product_count') or 0,
+                    'total_scrape_count': max(total or 0, row.get('total_scrape_count') or 0)
+                })
+
+        if new_rows:
+            self.session.execute(table.insert(), new_rows)
+        if updates:
+            self.session.execute(
+                table.update().where(table.c.id == bindparam('_id')).values(
+                    last_scraped=bindparam('last_scraped'),
+                    last_product_count=bindparam('last_product_count'),
+                    total_scrape_count=bindparam('total_scrape_count')
+                ),
+                updates
+            )
+        self.stats['site_urls'] += len(new_rows) + len(updates)
+
+    @staticmethod
+    def _legacy_key(row) -> Tuple:
+        """product_id'si olmayan eski kayıtlar için kimlik: site + URL + isim"""
+        return (row['site_name'], row.get('product_url') or row.get('url'), row['name'])
+
+    def _merge_products(self, source, site_map: Dict[int, int]) -> Dict[int, int]:
+        """Ürünleri product_id ile tekilleştir; shard products.id -> hedef products.id"""
+        table = Product.__table__
+        rows = self._rows(source, Product)
+        product_map = {}
+
+        # product_id'siz eski kayıtlar (birleştirme başına bir kez yüklenir)
+        legacy = {
+            self._legacy_key(row._mapping): (row.id, row.updated_at)
+            for row in self.session.execute(
+                select(table.c.id, table.c.site_name, table.c.product_url, table.c.url,
+                       table.c.name, table.c.updated_at).where(table.c.product_id.is_(None))
+            )
+        }
+
+        for chunk in _chunks(rows):
+            existing = {
+                product_id: (row_id, updated_at)
+                for row_id, product_id, updated_at in self.session.query(
+                    Product.id, Product.product_id, Product.updated_at
+                ).filter(Product.product_id.in_([row['product_id'] for row in chunk if row['product_id']]))
+            }
+
+            new_rows, updates = [], []
+            for row in chunk:
+                shard_id = row.pop('id')
+                row['site_id'] = site_map.get(row['site_id'])
+                known = existing if row['product_id'] else legacy
+                key = row['product_id'] or self._legacy_key(row)
+
+                if key not in known:
+                    known[key] = (None, row.get('updated_at'))
+                    new_rows.append((shard_id, key, row))
+                    continue
+
+                target_id, updated_at = known[key]
+                if target_id is None:
+                    # Aynı shard içinde tekrar eden ürün; ilk satırın eklenmesini bekler
+                    new_rows.append((shard_id, key, None))
+                    continue
+                product_map[shard_id] = target_id
+                # Shard'daki kayıt daha yeniyse ürün alanlarını güncelle
+                if row.get('updated_at') and (updated_at is None or row['updated_at'] > updated_at):
+                    row.pop('created_at', None)
+                    updates.append({'_id': target_id, **row})
+
+            inserts = [row for _, _, row in new_rows if row is not None]
+            if inserts:
+                ids = self.session.execute(
+                    table.insert().returning(table.c.id, sort_by_parameter_order=True), inserts
+                ).scalars().all()
+                inserted = {}
+                for _, key, row in new_rows:
+                    if row is None:
+                        continue
+                    inserted[key] = ids[len(inserted)]
+                    (existing if row['product_id'] else legacy)[key] = (inserted[key], row.get('updated_at'))
+                for shard_id, key, _ in new_rows:
+                    product_map[shard_id] = inserted[key]
+
+            if updates:
+                values = {name: bindparam(name) for name in updates[0]
+                          if name not in ('_id', 'product_id')}
+                self.session.execute(table.update().where(table.c.id == bindparam('_id')).values(**values),
+                                     updates)
+
+            self.stats['products_inserted'] += len(inserts)
+            self.stats['products_updated'] += len(updates)
+
+        return product_map
+
+    def _merge_history(self, source, model, product_map: Dict[int, int], stat: str):
+        """Geçmiş satırlarını ekle; aynı (ürün, timestamp) hedefte varsa atla"""
+        rows = self._rows(source, model)
+        for row in rows:
+            row.pop('id')
+            row['product_id'] = product_map.get(row['product_id'])
+        rows = [row for row in rows if row['product_id'] is not None]
+
+        table = model.__table__
+        for chunk in _chunks(rows):
+            known = set(self.session.execute(
+                select(table.c.product_id, table.c.timestamp).where(
+                    table.c.product_id.in_({row['product_id'] for row in chunk})
+                )
+            ).all())
+
+            fresh = []
+            for row in chunk:
+                key = (row['product_id'], row['timestamp'])
+                if key not in known:
+                    known.add(key)
+                    fresh.append(row)
+
+            if fresh:
+                self.session.execute(table.insert(), fresh)
+            self.stats[stat] += len(fresh)
+
+    def _merge_reviews(self, source, product_map: Dict[int, int]):
+        """Yorumları (ürün, review_hash) ile tekilleştirerek ekle"""
+        rows = self._rows(source, ProductReview)
+        for row in rows:
+            row.pop('id')
+            row['product_id'] = product_map.get(row['product_id'])
+            row['review_hash'] = row.get('review_hash') or ProductReview.fingerprint(row.get('review_text'))
+        rows = [row for row in rows if row['product_id'] is not None]
+
+        table = ProductReview.__table__
+        for chunk in _chunks(rows):
+            known = set(self.session.execute(
+                select(table.c.product_id, table.c.review_hash).where(
+                    tuple_(table.c.product_id, table.c.review_hash).in_(
+                        [(row['product_id'], row['review_hash']) for row in chunk]
+                    )
+                )
+            ).all())
+
+            fresh = []
+            for row in chunk:
+                key = (row['product_id'], row['review_hash'])
+                if key not in known:
+                    known.add(key)
+                    fresh.append(row)
+
+            if fresh:
+                self.session.execute(table.insert(), fresh)
+            self.stats['reviews'] += len(fresh)
+
+    def _merge_scrape_logs(self, source):
+        """Scrape log'larını taşı (aynı site ve zamanlı kayıt tekrar eklenmez)"""
+        rows = self._rows(source, ScrapeLog)
+        if not rows:
+            return
+
+        known = set(self.session.query(ScrapeLog.site_name, ScrapeLog.timestamp).filter(
+            ScrapeLog.timestamp >= min(row['timestamp'] or datetime.min for row in rows)
+        ))
+        fresh = []
+        for row in rows:
+            row.pop('id')
+            key = (row['site_name'], row['timestamp'])
+            if key not in known:
+                known.add(key)
+                fresh.append(row)
+
+        if fresh:
+            self.session.execute(ScrapeLog.__table__.insert(), fresh)
+        self.stats['scrape_logs'] += len(fresh)
+
+    def close(self):
+        self.session.close()
+
+
+def merge_shard_databases(paths: List[str], session: Optional[Session] = None) -> Dict:
+    """Shard veritabanlarını ana veritabanına katla, özet istatistikleri döndür"""
+    merger = ShardMerger(session)
+    try:
+        stats = merger.merge(paths)
+    finally:
+        if session is None:
+            merger.close()
+
+    print(f"🔀 {stats['shards']} shard birleştirildi: "
+          f"{stats['products_inserted']} yeni / {stats['products_updated']} güncellenen ürün, "
+          f"{stats['price_rows']} fiyat, {stats['ranking_rows']} sıralama, "
+          f"{stats['reviews']} yorum, {stats['site_urls']} URL")
+    return stats
+
+
+def _shard_argument(value: str) -> Shard:
+    try:
+        return parse_shard(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def add_shard_arguments(parser: argparse.ArgumentParser):
+    """run_scraper.py ve main.py için ortak --shard / --merge seçenekleri"""
+    parser.add_argument('--shard', type=_shard_argument, metavar='i/n',
+                        help="Sadece bu shard'ın URL'lerini çek (0 tabanlı, örn. 0/4)")
+    parser.add_argument('--merge', nargs='+', metavar='SHARD_DB',
+                        help="Shard veritabanlarını ana veritabanına birleştir ve çık")
@@ -10,14 +10,14 @@ import re
 from urllib.parse import urljoin, urlparse, parse_qs
 import json
 from typing import List, Dict
-import cloudscraper
+from http_client import get_http_clients
 
 
 class SmartCategoryFinder:
     """Akıllı kategori bulucu"""
 
     def __init__(self):
-        self.scraper = cloudscraper.create_scraper()
+        self.scraper = get_http_clients().cached_cloudscraper()
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
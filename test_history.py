@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+on_change geçmiş testi - değişmeyen fiyat/sıra zaman penceresinden düşmemeli
+
+Geçici bir veritabanında bir ürün yazılır, geçmişi 8 gün geriye alınır ve
+aynı veri tekrar yazılır: geçmişte tek satır kalır (sadece last_seen_at
+ilerler). Son 7 günü okuyan sorgular bu ürünü yine görmelidir.
+
+Kullanım:
+    python test_history.py   (ya da python -m pytest test_history.py)
+"""
+
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+from sqlalchemy import func
+from sqlalchemy.orm import sessionmaker
+
+from base_scraper import ProductNormalizer
+from database import Base, PriceHistory, Product, RankingHistory, create_sqlite_engine
+from history import (daily_values, price_series, seen_between, seen_since, segments_by_product,
+                     time_weighted_average)
+from persistence import BulkProductWriter
+
+
+def make_product(rank: int = 1, price: float = 199.9):
+    return ProductNormalizer.normalize_product({
+        'id': '1001',
+        'title': "Samsung Test Ürünü",
+        'category': 'elektronik',
+        'url': "https://www.trendyol.com/samsung/test-urunu-p-1001",
+        'price': price,
+        'rating': 4.5,
+        'review_count': 120,
+        'rank': rank,
+        'seller': 'Satıcı'
+    }, 'trendyol')
+
+
+def backdate(session, days: int):
+    """Tüm geçmişi days gün geriye al (bir hafta önce yazılmış gibi)"""
+    delta = timedelta(days=days)
+    for model in (PriceHistory, RankingHistory):
+        for row in session.query(model):
+            row.timestamp -= delta
+            row.last_seen_at -= delta
+    session.commit()
+
+
+def stable_product_session(directory: str):
+    """8 gün önce ve şimdi aynı verinin yazıldığı veritabanı"""
+    engine = create_sqlite_engine(os.path.join(directory, 'history.db'))
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+
+    writer = BulkProductWriter(session, history={'mode': 'on_change'})
+    writer.write([make_product()])
+    backdate(session, 8)
+    writer.write([make_product()])
+    return engine, session
+
+
+def test_stable_product_stays_in_window():
+    """Bir hafta boyunca 1. sırada kalan ürün son 7 günde görünmeli"""
+    with tempfile.TemporaryDirectory() as directory:
+        engine, session = stable_product_session(directory)
+        try:
+            since = datetime.utcnow() - timedelta(days=7)
+            product_id = session.query(Product.id).scalar()
+
+            # Değişim yok: tek satır, timestamp pencere dışında
+            assert session.query(RankingHistory).count() == 1
+            assert session.query(PriceHistory).count() == 1
+            assert session.query(RankingHistory).filter(RankingHistory.timestamp >= since).count() == 0
+
+            # En çok satanlar sorgusu (analytics_page / trendyol_review_scraper biçimi)
+            best = session.query(
+                Product.id, func.min(RankingHistory.rank_position)
+            ).join(RankingHistory).filter(seen_since(RankingHistory, since)).group_by(Product.id).all()
+            assert best == [(product_id, 1)]
+
+            # Fiyat serisi aralığın başındaki değerle başlar, bugüne kadar uzanır
+            points = price_series(session, product_id, since=since)
+            assert [point['price'] for point in points] == [199.9, 199.9]
+            assert points[0]['timestamp'] == since
+
+            # Günlük gruplama: 7 gün önceden bugüne her gün bir değer
+            segments = segments_by_product(session, PriceHistory, [product_id], ['price'], since=since)
+            days = {point['date'] for point in daily_values(segments[product_id], 'price')}
+            assert len(days) == 8
+
+            # Gün bazlı filtre de eski satırı görür
+            today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+            assert session.query(PriceHistory).filter(
+                seen_between(PriceHistory, today, today + timedelta(days=1))
+            ).count() == 1
+        finally:
+            session.close()
+            engine.dispose()
+
+
+def test_average_rank_is_time_weighted():
+    """Ortalama sıra, sıranın geçerli kaldığı süreyle ağırlıklı olmalı"""
+    now = datetime(2024, 1, 8)
+    segments = [
+        {'start': now - timedelta(days=7), 'end': now - timedelta(days=1), 'rank_position': 1},
+        {'start': now - timedelta(days=1), 'end': now, 'rank_position': 8},
+    ]
+    assert time_weighted_average(segments, 'rank_position') == 2.0
+
+    # Süresiz tek gözlemlerde düz ortalama
+    single = [{'start': now, 'end': now, 'rank_position': 3}, {'start': now, 'end': now, 'rank_position': 5}]
+    assert time_weighted_average(single, 'rank_position') == 4.0
+
+
+if __name__ == "__main__":
+    for test in (test_stable_product_stays_in_window, test_average_rank_is_time_weighted):
+        test()
+        print(f"✅ {test.__name__}")
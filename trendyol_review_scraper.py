@@ -6,20 +6,22 @@ Trendyol Review Scraper - Ürün yorumlarını çeker
 import re
 import json
 import time
-import cloudscraper
 from bs4 import BeautifulSoup
 from datetime import datetime, timedelta
 from typing import List, Dict
-from database import SessionLocal, ProductReview, Product
+from database import SessionLocal, Product
 from turkish_review_ai import TurkishReviewAI
+from persistence import ReviewUpserter
+from http_client import get_http_clients
 
 class TrendyolReviewScraper:
     """Trendyol yorum scraper"""
 
     def __init__(self):
-        self.scraper = cloudscraper.create_scraper()
+        self.scraper = get_http_clients().cloudscraper()
         self.ai = TurkishReviewAI()
         self.session = SessionLocal()
+        self.review_upserter = ReviewUpserter(self.session, analyzer=self.ai)
 
     def get_product_reviews(self, product_url: str, max_pages: int = 5) -> List[Dict]:
         """Ürün yorumlarını çek"""
@@ -182,34 +184,10 @@ class TrendyolReviewScraper:
 
         print(f"📝 {len(reviews)} yorum analiz ediliyor...")
 
-        # Her yorumu analiz et ve kaydet
-        for review_data in reviews:
-            # AI analizi
-            analysis = self.ai.analyze_review(review_data['review_text'])
-
-            # Veritabanına kaydet
-            review = ProductReview(
-                product_id=product_id,
-                reviewer_name=review_data['reviewer_name'],
-                reviewer_verified=review_data['reviewer_verified'],
-                rating=review_data['rating'],
-                review_title=review_data['review_title'],
-                review_text=review_data['review_text'],
-                review_date=review_data['review_date'],
-                helpful_count=review_data['helpful_count'],
-
-                # AI analiz sonuçları
-                sentiment_score=analysis['sentiment_score'],
-                key_phrases=analysis['key_phrases'],
-                purchase_reasons=analysis['purchase_reasons'],
-                pros=analysis['pros'],
-                cons=analysis['cons']
-            )
-
-            self.session.add(review)
-
-        self.session.commit()
-        print(f"✅ {len(reviews)} yorum kaydedildi ve analiz edildi")
+        # Sadece yeni yorumları analiz et ve kaydet
+        stats = self.review_upserter.upsert(product_id, reviews)
+        print(f"✅ {stats['inserted']} yeni yorum kaydedildi ve analiz edildi "
+              f"({stats['updated']} güncellendi)")
 
         # Toplu analiz
         reviews_for_bulk = [{'text': r['review_text'], 'rating': r['rating'],
@@ -221,6 +199,7 @@ class TrendyolReviewScraper:
         # Analiz sonuçlarını göster
         self._display_analysis_results(product.name, bulk_analysis)
 
+        bulk_analysis['upsert_stats'] = stats
         return bulk_analysis
 
     def _display_analysis_results(self, product_name: str, analysis: Dict):
@@ -291,11 +270,12 @@ class TrendyolReviewScraper:
 
         print("\n" + "="*60)
 
-    def scrape_all_best_sellers(self):
-        """En çok satanların hepsinin yorumlarını çek"""
+    def scrape_all_best_sellers(self, top_k: int = None):
+        """En çok satanlardan yenilenme önceliği en yüksek olanların yorumlarını çek"""
         # Son 7 günün en çok satanlarını bul
         from sqlalchemy import func
         from database import RankingHistory
+        from history import seen_since
 
         seven_days_ago = datetime.now() - timedelta(days=7)
 
@@ -304,30 +284,23 @@ class TrendyolReviewScraper:
         ).join(
             RankingHistory
         ).filter(
-            RankingHistory.timestamp >= seven_days_ago,
+            seen_since(RankingHistory, seven_days_ago),
             RankingHistory.rank_position <= 10  # Top 10
         ).distinct().all()
 
         print(f"📦 {len(best_sellers)} en çok satan ürün bulundu")
 
-        for product in best_sellers:
-            print(f"\n{'='*60}")
-            print(f"İşleniyor: {product.name[:50]}...")
-
-            # Daha önce yorum çekilmiş mi kontrol et
-            existing_reviews = self.session.query(ProductReview).filter_by(
-                product_id=product.id
-            ).count()
+        # Yorumları en çok değişmesi beklenen ürünlerden başla
+        from review_scheduler import ReviewRefreshScheduler
+        scheduler = ReviewRefreshScheduler(self.session)
 
-            if existing_reviews > 0:
-                print(f"  ℹ️ {existing_reviews} yorum zaten mevcut, atlanıyor...")
-                continue
+        for product_id in scheduler.next_batch(top_k, [p.id for p in best_sellers]):
+            print(f"\n{'='*60}")
 
             # Yorumları çek ve analiz et
-            self.scrape_and_analyze_product_reviews(product.id)
-
-            # Rate limiting
-            time.sleep(2)
+            analysis = self.scrape_and_analyze_product_reviews(product_id)
+            new_reviews = analysis['upsert_stats']['inserted'] if analysis else 0
+            scheduler.mark_fetched(product_id, new_reviews=new_reviews)
 
         print("\n✅ Tüm en çok satanların yorumları analiz edildi")
 
@@ -5,19 +5,20 @@ Trendyol.com Scraper
 
 import requests
 from bs4 import BeautifulSoup
-import cloudscraper
 import json
-import time
 import re
 from typing import List, Dict
 from urllib.parse import urljoin
+from http_client import get_http_clients
+from rate_limiter import get_rate_limiter
 
 
 class TrendyolScraper:
     """Trendyol için özelleştirilmiş scraper"""
 
     def __init__(self):
-        self.scraper = cloudscraper.create_scraper()
+        self.scraper = get_http_clients().cloudscraper()
+        self.rate_limiter = get_rate_limiter()
         self.base_url = "https://www.trendyol.com"
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
@@ -40,7 +41,8 @@ class TrendyolScraper:
 
             try:
                 # Sayfayı çek
-                response = self.scraper.get(page_url, headers=self.headers, timeout=15)
+                # Host limiti dahilinde çek (429/503 gelirse limiter yavaşlar)
+                response = self.rate_limiter.get(self.scraper, page_url, headers=self.headers, timeout=15)
 
                 # JSON data var mı kontrol et (Trendyol genelde JSON döner)
                 if 'application/json' in response.headers.get('content-type', ''):
@@ -64,8 +66,6 @@ class TrendyolScraper:
                 if len(products) == 0:
                     break  # Daha fazla ürün yok
 
-                time.sleep(1)  # Rate limiting
-
             except Exception as e:
                 print(f"    ⚠️ Sayfa {page} çekilemedi: {str(e)[:50]}")
                 break
@@ -4,25 +4,25 @@ Trendyol Özel Kategori Örümceği
 Trendyol'un yapısına özel derin kategori bulucu
 """
 
-import cloudscraper
 from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlparse
+from urllib.parse import urlparse
 import re
-import time
 import json
 from typing import List, Dict
+from http_client import get_http_clients
+from url_dedup import SeenUrlSet, canonicalize_url
 
 class TrendyolSpider:
     """Trendyol için özelleştirilmiş kategori örümceği"""
 
     def __init__(self):
-        self.scraper = cloudscraper.create_scraper()
+        self.scraper = get_http_clients().cached_cloudscraper()
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
             'Accept-Language': 'tr-TR,tr;q=0.9,en;q=0.8',
         }
         self.base_url = "https://www.trendyol.com"
-        self.visited_urls = set()
+        self.visited_urls = SeenUrlSet()  # Kanonik URL'ler (Bloom filtresi)
         self.all_categories = []
 
     def discover_all_categories(self) -> Dict:
@@ -50,8 +50,6 @@ class TrendyolSpider:
             # Alt kategorileri bul
             self._discover_subcategories(main_cat['url'], main_cat['id'], main_cat['name'], level=1)
 
-            time.sleep(1)  # Rate limiting
-
         print(f"\n✅ Toplam {len(self.all_categories)} kategori bulundu!")
 
         return {
@@ -78,11 +76,9 @@ class TrendyolSpider:
     def _discover_subcategories(self, parent_url: str, parent_id: str, parent_name: str, level: int):
         """Alt kategorileri recursive olarak bul"""
 
-        if level > 2 or parent_url in self.visited_urls:  # Max 2 seviye derinlik
+        if level > 2 or not self.visited_urls.add(parent_url):  # Max 2 seviye derinlik
             return
 
-        self.visited_urls.add(parent_url)
-
         try:
             # Trendyol için özel kategori URL'leri
             if 'butik/liste' in parent_url:
@@ -116,8 +112,6 @@ class TrendyolSpider:
                             level + 1
                         )
 
-                    time.sleep(0.2)
-
         except Exception as e:
             print(f"  {'  ' * level}⚠️ Hata: {str(e)[:50]}")
 
@@ -146,7 +140,7 @@ class TrendyolSpider:
 
                     if href and text and len(text) > 2:
                         # URL'yi temizle ve kontrol et
-                        full_url = urljoin(self.base_url, href)
+                        full_url = canonicalize_url(href, self.base_url)
                         if self._is_valid_category_url(full_url, text):
                             categories.append({
                                 'id': self._generate_id(full_url),
@@ -200,7 +194,7 @@ class TrendyolSpider:
                         text = link.get_text(strip=True)
 
                         if href and text:
-                            full_url = urljoin(self.base_url, href)
+                            full_url = canonicalize_url(href, self.base_url)
                             subcategories.append({
                                 'id': self._generate_id(full_url),
                                 'name': text[:100],
@@ -6,10 +6,19 @@ NO FALLBACK - Tamamen özel geliştirilen Türkçe doğal dil işleme motoru
 
 import re
 import math
-from typing import List, Dict, Tuple
+from bisect import bisect_right
+from multiprocessing import Pool
+from typing import List, Dict, Tuple, Optional, Sequence
 from collections import Counter, defaultdict
 import statistics
 
+import numpy as np
+
+from lexicon_matcher import AhoCorasick, LexiconHits, scan_text
+
+# Bu sayının altındaki batch'ler için process açmaya değmez
+PARALLEL_BATCH_THRESHOLD = 20000
+
 class TurkishReviewAI:
     """Türkçe yorum analizi için özel geliştirilmiş yapay zeka"""
 
@@ -93,6 +102,20 @@ class TurkishReviewAI:
         # Türkçe dil özellikleri için yardımcı fonksiyonlar
         self.turkish_lower = str.maketrans('İIĞÜŞÖÇ', 'iığüşöç')
 
+        # Tüm sözlükleri tek otomatta derle (tek geçişte tüm eşleşmeler)
+        self._positive_rank = {word: i for i, word in enumerate(self.positive_words)}
+        self._negative_rank = {word: i for i, word in enumerate(self.negative_words)}
+        self.matcher = AhoCorasick(
+            list(self.positive_words) +
+            list(self.negative_words) +
+            [k for keywords in self.purchase_patterns.values() for k in keywords] +
+            [k for keywords in self.behavior_patterns.values() for k in keywords]
+        )
+
+    def _scan(self, text: str) -> LexiconHits:
+        """Normalize metinde tüm sözlük eşleşmelerini tek geçişte bul"""
+        return scan_text(self.matcher, text)
+
     def analyze_review(self, review_text: str) -> Dict:
         """Tek bir yorumu analiz et"""
         if not review_text:
@@ -101,12 +124,13 @@ class TurkishReviewAI:
         # Metni normalize et
         normalized_text = self._normalize_text(review_text)
 
-        # Analizler
-        sentiment = self._calculate_sentiment(normalized_text)
+        # Analizler (sözlük eşleşmeleri tek geçişte)
+        hits = self._scan(normalized_text)
+        sentiment = self._calculate_sentiment(normalized_text, hits)
         key_phrases = self._extract_key_phrases(normalized_text)
-        purchase_reasons = self._detect_purchase_reasons(normalized_text)
-        pros_cons = self._extract_pros_cons(normalized_text)
-        behavior_type = self._detect_behavior_type(normalized_text)
+        purchase_reasons = self._detect_purchase_reasons(normalized_text, hits)
+        pros_cons = self._extract_pros_cons(normalized_text, hits)
+        behavior_type = self._detect_behavior_type(normalized_text, hits)
 
         return {
             'sentiment_score': sentiment['score'],
@@ -177,6 +201,107 @@ class TurkishReviewAI:
             'recommendation_score': self._calculate_recommendation_score(all_analyses)
         }
 
+    def analyze_batch(self, texts: Sequence[str], ratings: Optional[Sequence[float]] = None,
+                      verified: Optional[Sequence[bool]] = None,
+                      processes: Optional[int] = None) -> Dict:
+        """
+        Çok sayıda yorumu tek seferde skorla (NumPy).
+
+        Sentiment skorları analyze_review ile birebir aynıdır. `processes` > 1
+        verilirse ve batch yeterince büyükse işi process'lere dağıtır.
+
+        Returns:
+            sentiment_scores / confidences / labels / word_counts dizileri,
+            sentiment_distribution, average_sentiment ve (ratings verilirse)
+            recommendation_score
+        """
+        texts = list(texts)
+        if processes and processes > 1 and len(texts) >= PARALLEL_BATCH_THRESHOLD:
+            chunk_size = math.ceil(len(texts) / processes)
+            chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+            with Pool(processes, initializer=_init_batch_worker) as pool:
+                parts = pool.map(_score_batch_worker, chunks)
+            scores, confidences, word_counts, empty = (np.concatenate(arrays) for arrays in zip(*parts))
+        else:
+            scores, confidences, word_counts, empty = self._score_batch(texts)
+
+        labels = np.where(scores >= 0.3, 'pozitif', np.where(scores <= -0.3, 'negatif', 'nötr'))
+        labels = np.where(empty, 'belirsiz', labels)
+
+        result = {
+            'total_reviews': len(texts),
+            'sentiment_scores': scores,
+            'confidences': confidences,
+            'labels': labels,
+            'word_counts': word_counts,
+            'average_sentiment': float(scores.mean()) if len(scores) else 0,
+            'sentiment_distribution': self._calculate_sentiment_distribution(scores)
+        }
+
+        if ratings is not None:
+            result['recommendation_score'] = self._recommendation_score(
+                scores,
+                np.asarray(ratings, dtype=float),
+                np.asarray(verified if verified is not None else np.zeros(len(texts)), dtype=bool)
+            )
+
+        return result
+
+    def _score_batch(self, texts: List[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Yorumları birleştirip tek geçişte tara, review x sözlük seyrek hit
+        matrisinden (COO) skorları hesapla.
+        """
+        count = len(texts)
+        empty = np.array([not text for text in texts], dtype=bool)
+        normalized = [self._normalize_text(text) if text else '' for text in texts]
+
+        # Normalize metinde satır sonu yok: yorumları '\n' ile birleştirmek güvenli
+        joined = '\n'.join(normalized)
+        review_starts = []
+        position = 0
+        for text in normalized:
+            review_starts.append(position)
+            position += len(text) + 1
+
+        word_starts = [match.start() for match in re.finditer(r'\S+', joined)]
+        word_review = np.array([bisect_right(review_starts, start) - 1 for start in word_starts], dtype=np.int64)
+        word_counts = np.bincount(word_review, minlength=count) if len(word_review) else np.zeros(count, dtype=np.int64)
+
+        # Sütunlar: önce pozitif, sonra negatif sözlük (sözlük sırasıyla)
+        positive_count = len(self._positive_rank)
+        cells = set()
+        for start, pattern in self.matcher.iter_matches(joined):
+            if ' ' in pattern:
+                continue
+            word_index = bisect_right(word_starts, start) - 1
+            if pattern in self._positive_rank:
+                cells.add((word_index, self._positive_rank[pattern]))
+            if pattern in self._negative_rank:
+                cells.add((word_index, positive_count + self._negative_rank[pattern]))
+
+        # Kelime, sonra sözlük sırası: toplama sırası analyze_review ile aynı
+        ordered = np.array(sorted(cells), dtype=np.int64).reshape(-1, 2)
+        rows = word_review[ordered[:, 0]] if len(ordered) else np.zeros(0, dtype=np.int64)
+        cols = ordered[:, 1]
+
+        weights = np.array(list(self.positive_words.values()) +
+                           [abs(w) for w in self.negative_words.values()], dtype=float)
+        is_positive = cols < positive_count
+
+        positive_score = np.bincount(rows[is_positive], weights=weights[cols[is_positive]], minlength=count)
+        negative_score = np.bincount(rows[~is_positive], weights=weights[cols[~is_positive]], minlength=count)
+        word_matches = np.bincount(rows, minlength=count)
+
+        total = positive_score + negative_score
+        with np.errstate(invalid='ignore', divide='ignore'):
+            scores = np.where(total == 0, 0.0, (positive_score - negative_score) / total)
+        confidences = np.minimum(word_matches / np.maximum(word_counts / 10, 1), 1.0)
+
+        scores[empty] = 0
+        confidences[empty] = 0
+        return scores, confidences, word_counts, empty
+
     def _normalize_text(self, text: str) -> str:
         """Türkçe metni normalize et"""
         # Küçük harfe çevir (Türkçe karakterler dahil)
@@ -187,25 +312,33 @@ class TurkishReviewAI:
 
         return text.strip()
 
-    def _calculate_sentiment(self, text: str) -> Dict:
+    def _calculate_sentiment(self, text: str, hits: LexiconHits = None) -> Dict:
         """Sentiment analizi yap"""
-        words = text.split()
+        hits = hits or self._scan(text)
+        words = hits.words
         positive_score = 0
         negative_score = 0
         word_matches = 0
 
-        for word in words:
-            # Pozitif kelimeler
-            for pos_word, weight in self.positive_words.items():
-                if pos_word in word:
-                    positive_score += weight
-                    word_matches += 1
+        # Kelime sırası, sonra sözlük sırası: toplama sırası eski tarayıcıyla aynı
+        positive_hits = sorted(
+            (word_index, self._positive_rank[word])
+            for word_index, word in hits.word_hits if word in self._positive_rank
+        )
+        negative_hits = sorted(
+            (word_index, self._negative_rank[word])
+            for word_index, word in hits.word_hits if word in self._negative_rank
+        )
+        positive_weights = list(self.positive_words.values())
+        negative_weights = list(self.negative_words.values())
+
+        for _, rank in positive_hits:
+            positive_score += positive_weights[rank]
+            word_matches += 1
 
-            # Negatif kelimeler
-            for neg_word, weight in self.negative_words.items():
-                if neg_word in word:
-                    negative_score += abs(weight)
-                    word_matches += 1
+        for _, rank in negative_hits:
+            negative_score += abs(negative_weights[rank])
+            word_matches += 1
 
         # Net skor hesapla
         if positive_score + negative_score == 0:
@@ -251,31 +384,31 @@ class TurkishReviewAI:
 
         return phrases[:8]  # En fazla 8 anahtar kelime
 
-    def _detect_purchase_reasons(self, text: str) -> List[str]:
+    def _detect_purchase_reasons(self, text: str, hits: LexiconHits = None) -> List[str]:
         """Satın alma nedenlerini tespit et"""
+        found = (hits or self._scan(text)).found
         reasons = []
 
         for reason_type, keywords in self.purchase_patterns.items():
-            for keyword in keywords:
-                if keyword in text:
-                    reasons.append(reason_type)
-                    break
+            if any(keyword in found for keyword in keywords):
+                reasons.append(reason_type)
 
         return list(set(reasons))  # Tekrarları kaldır
 
-    def _extract_pros_cons(self, text: str) -> Dict:
+    def _extract_pros_cons(self, text: str, hits: LexiconHits = None) -> Dict:
         """Artı ve eksileri çıkar"""
+        found = (hits or self._scan(text)).found
         pros = []
         cons = []
 
         # Pozitif özellikler
         for word, weight in self.positive_words.items():
-            if word in text and weight >= 0.7:
+            if word in found and weight >= 0.7:
                 pros.append(word)
 
         # Negatif özellikler
         for word, weight in self.negative_words.items():
-            if word in text and abs(weight) >= 0.7:
+            if word in found and abs(weight) >= 0.7:
                 cons.append(word)
 
         return {
@@ -283,12 +416,13 @@ class TurkishReviewAI:
             'cons': cons[:5]   # En fazla 5 eksi
         }
 
-    def _detect_behavior_type(self, text: str) -> str:
+    def _detect_behavior_type(self, text: str, hits: LexiconHits = None) -> str:
         """Müşteri davranış tipini tespit et"""
+        found = (hits or self._scan(text)).found
         behavior_scores = {}
 
         for behavior_type, keywords in self.behavior_patterns.items():
-            score = sum(1 for keyword in keywords if keyword in text)
+            score = sum(1 for keyword in keywords if keyword in found)
             if score > 0:
                 behavior_scores[behavior_type] = score
 
@@ -385,16 +519,20 @@ class TurkishReviewAI:
 
         return insights
 
-    def _calculate_sentiment_distribution(self, scores: List[float]) -> Dict:
+    def _calculate_sentiment_distribution(self, scores: Sequence[float]) -> Dict:
         """Sentiment dağılımını hesapla"""
-        positive = sum(1 for s in scores if s > 0.3)
-        negative = sum(1 for s in scores if s < -0.3)
+        scores = np.asarray(scores, dtype=float)
+        if not len(scores):
+            return {'pozitif': 0, 'negatif': 0, 'nötr': 0}
+
+        positive = int(np.count_nonzero(scores > 0.3))
+        negative = int(np.count_nonzero(scores < -0.3))
         neutral = len(scores) - positive - negative
 
         return {
-            'pozitif': (positive / len(scores)) * 100 if scores else 0,
-            'negatif': (negative / len(scores)) * 100 if scores else 0,
-            'nötr': (neutral / len(scores)) * 100 if scores else 0
+            'pozitif': (positive / len(scores)) * 100,
+            'negatif': (negative / len(scores)) * 100,
+            'nötr': (neutral / len(scores)) * 100
         }
 
     def _calculate_recommendation_score(self, analyses: List[Dict]) -> float:
@@ -402,10 +540,23 @@ class TurkishReviewAI:
         if not analyses:
             return 0
 
+        return self._recommendation_score(
+            np.array([a['sentiment_score'] for a in analyses], dtype=float),
+            np.array([a['rating'] or 0 for a in analyses], dtype=float),
+            np.array([bool(a['verified']) for a in analyses], dtype=bool)
+        )
+
+    @staticmethod
+    def _recommendation_score(sentiments: np.ndarray, ratings: np.ndarray, verified: np.ndarray) -> float:
+        """Dizilerden tavsiye skorunu hesapla (0-100)"""
+        if not len(sentiments):
+            return 0
+
         # Faktörler ve ağırlıkları
-        avg_sentiment = statistics.mean([a['sentiment_score'] for a in analyses])
-        avg_rating = statistics.mean([a['rating'] for a in analyses if a['rating']])
-        verified_ratio = sum(1 for a in analyses if a['verified']) / len(analyses)
+        avg_sentiment = sentiments.mean()
+        rated = ratings[np.nan_to_num(ratings) != 0]
+        avg_rating = rated.mean() if len(rated) else 0
+        verified_ratio = np.count_nonzero(verified) / len(sentiments)
 
         # Ağırlıklı skor
         score = (
@@ -414,7 +565,7 @@ class TurkishReviewAI:
             verified_ratio * 10          # 0 to 1 -> 0 to 10
         )
 
-        return min(max(score, 0), 100)
+        return float(min(max(score, 0), 100))
 
     def _empty_analysis(self) -> Dict:
         """Boş analiz sonucu"""
@@ -442,4 +593,17 @@ class TurkishReviewAI:
             'human_insights': {},
             'verified_percentage': 0,
             'recommendation_score': 0
-        }
\ No newline at end of file
+        }
+
+
+# Multiprocessing worker'ları (her process kendi otomatını bir kez derler)
+_batch_ai: Optional[TurkishReviewAI] = None
+
+
+def _init_batch_worker():
+    global _batch_ai
+    _batch_ai = TurkishReviewAI()
+
+
+def _score_batch_worker(texts: List[str]):
+    return _batch_ai._score_batch(texts)
@@ -7,11 +7,12 @@ TÜM yorumları çeker - Çoklu strateji kullanır
 import requests
 import json
 import re
-import time
 from datetime import datetime
-from database import SessionLocal, Product, ProductReview
+from database import SessionLocal, Product
+from persistence import ReviewUpserter
 from turkish_review_ai import TurkishReviewAI
-import cloudscraper
+from review_fetcher import ConcurrentReviewFetcher
+from http_client import get_http_clients
 
 class UltimateReviewScraper:
     """Ultimate scraper - TÜM yorumları çeker"""
@@ -19,7 +20,9 @@ class UltimateReviewScraper:
     def __init__(self):
         self.session = SessionLocal()
         self.ai = TurkishReviewAI()
-        self.scraper = cloudscraper.create_scraper()
+        self.review_upserter = ReviewUpserter(self.session, analyzer=self.ai)
+        self.scraper = get_http_clients().cloudscraper()
+        self.review_fetcher = ConcurrentReviewFetcher(page_size=50, max_pages=50)
 
     def extract_product_id(self, url):
         """URL'den product ID çıkar"""
@@ -50,10 +53,6 @@ class UltimateReviewScraper:
         print(f"📦 Ürün: {product.name[:50]}...")
         print(f"🔗 URL: {product.product_url or product.url}")
 
-        # Mevcut yorumları temizle
-        self.session.query(ProductReview).filter_by(product_id=product_id).delete()
-        self.session.commit()
-
         all_reviews = []
         product_trendyol_id = self.extract_product_id(product.product_url or product.url)
 
@@ -97,28 +96,17 @@ class UltimateReviewScraper:
         if unique_reviews:
             print(f"\n💾 {len(unique_reviews)} benzersiz yorum kaydediliyor...")
 
-            for review_data in unique_reviews:
-                # AI analizi
-                analysis = self.ai.analyze_review(review_data['review_text'])
-
-                review = ProductReview(
-                    product_id=product_id,
-                    reviewer_name=review_data.get('reviewer_name', 'Trendyol Müşterisi'),
-                    reviewer_verified=review_data.get('reviewer_verified', False),
-                    rating=review_data.get('rating', 5),
-                    review_title='',
-                    review_text=review_data['review_text'],
-                    review_date=review_data.get('review_date', datetime.now()),
-                    helpful_count=review_data.get('helpful_count', 0),
-                    sentiment_score=analysis['sentiment_score'],
-                    key_phrases=analysis['key_phrases'],
-                    purchase_reasons=analysis['purchase_reasons'],
-                    pros=analysis['pros'],
-                    cons=analysis['cons']
-                )
-                self.session.add(review)
-
-            self.session.commit()
+            # Silip yeniden eklemek yerine (product_id, review_hash) ile upsert:
+            # mevcut yorumlar korunur, sadece yeniler AI analizinden geçer
+            stats = self.review_upserter.upsert(product_id, [{
+                'reviewer_name': 'Trendyol Müşterisi',
+                'rating': 5,
+                'review_date': datetime.now(),
+                **review_data,
+                'review_title': ''
+            } for review_data in unique_reviews])
+            print(f"  ✓ {stats['inserted']} yeni yorum, {stats['updated']} güncellenen, "
+                  f"{stats['unchanged']} değişmeyen")
 
             # Analiz göster
             self._show_analysis(product.name, unique_reviews)
@@ -206,84 +194,10 @@ class UltimateReviewScraper:
         return reviews
 
     def get_all_reviews_from_api(self, product_id):
-        """API'den TÜM yorumları çek (tüm sayfalar)"""
-        all_reviews = []
-
-        # Farklı API endpoint'leri
-        api_endpoints = [
-            f"https://public.trendyol.com/discovery-web-webproductgw-santral/api/review/{product_id}",
-            f"https://public.trendyol.com/discovery-web-webproductgw-santral/review/{product_id}",
-            f"https://public.trendyol.com/discovery-web-productgw-service/api/review/{product_id}",
-            f"https://public-mdc.trendyol.com/discovery-web-productgw-service/reviews/{product_id}",
-            f"https://api.trendyol.com/webproductgw/api/review/{product_id}",
-            f"https://public.trendyol.com/reviews-service/api/product/{product_id}/reviews",
-            f"https://public.trendyol.com/discovery-web-recogw-service/api/rnr/products/{product_id}/reviews"
-        ]
-
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-            'Accept': 'application/json',
-            'Accept-Language': 'tr-TR,tr;q=0.9',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'Origin': 'https://www.trendyol.com',
-            'Referer': 'https://www.trendyol.com/'
-        }
-
-        for endpoint in api_endpoints:
-            print(f"  📡 Deneniyor: {endpoint[:50]}...")
-
-            page = 0
-            page_reviews = []
-
-            while page < 50:  # Max 50 sayfa
-                params = {
-                    'page': page,
-                    'size': 50,
-                    'sortBy': 'helpfulCount',
-                    'culture': 'tr-TR',
-                    'storefrontId': '1',
-                    'culturetype': '0'
-                }
-
-                try:
-                    response = self.scraper.get(
-                        endpoint,
-                        headers=headers,
-                        params=params,
-                        timeout=10
-                    )
-
-                    if response.status_code == 200:
-                        data = response.json()
-
-                        # Yorumları çıkar
-                        review_list = self._extract_reviews_from_json(data)
-
-                        if review_list:
-                            page_reviews.extend(review_list)
-                            print(f"    ✓ Sayfa {page+1}: {len(review_list)} yorum")
-
-                            if len(review_list) < 50:  # Son sayfa
-                                break
-
-                            page += 1
-                            time.sleep(0.5)  # Rate limiting
-                        else:
-                            break
-
-                    elif response.status_code == 404:
-                        break
-                    else:
-                        break
-
-                except Exception as e:
-                    break
-
-            if page_reviews:
-                all_reviews.extend(page_reviews)
-                print(f"  ✅ Bu API'den toplam {len(page_reviews)} yorum alındı")
-                break  # Başarılı olduysa diğer API'leri deneme
-
+        """API'den TÜM yorumları çek (sayfalar eşzamanlı)"""
+        all_reviews = self.review_fetcher.fetch_all(product_id)
+        if all_reviews:
+            print(f"  ✅ API'den toplam {len(all_reviews)} yorum alındı")
         return all_reviews
 
     def get_reviews_from_widget(self, product_id):
@@ -13,7 +13,7 @@ import re
 from datetime import datetime
 from database import SessionLocal, Product, ProductReview
 from turkish_review_ai import TurkishReviewAI
-import cloudscraper
+from http_client import get_http_clients
 
 class UltraAutoScraper:
     """Ultra otomatik scraper - Chrome gerekmez, API odaklı"""
@@ -21,7 +21,7 @@ class UltraAutoScraper:
     def __init__(self):
         self.session = SessionLocal()
         self.ai = TurkishReviewAI()
-        self.scraper = cloudscraper.create_scraper()
+        self.scraper = get_http_clients().cloudscraper()
 
     def extract_product_id(self, url):
         """URL'den product ID çıkar"""
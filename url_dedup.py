@@ -0,0 +1,260 @@
+"""
+URL Dedup - URL kanonikleştirme ve Bloom filtreli "görüldü" kümesi
+
+Keşif spider'ları aynı kategoriyi farklı yazılmış URL'lerle (takip
+parametreleri, query sırası, sondaki '/', büyük/küçük harf) tekrar tekrar
+çekiyordu. canonicalize_url bu farkları siler; site bazlı query allow-list
+config.URL_DEDUP içindedir.
+
+SeenUrlSet kanonik URL'leri ölçeklenen bir Bloom filtresinde tutar: bellek
+milyonlarca URL'de sabit kalır (~1.2 MB / milyon URL, %1 hata), dosyaya
+kaydedilip sonraki çalışmada yüklenebilir. Bloom filtresinde yanlış negatif
+yoktur; küçük bir olasılıkla yeni bir URL "görüldü" sayılabilir.
+"""
+
+import hashlib
+import math
+import os
+import re
+import struct
+import threading
+from typing import Iterable, List, Optional, Tuple
+from urllib.parse import parse_qsl, quote, unquote, urlencode, urljoin, urlsplit, urlunsplit
+
+from config import URL_DEDUP
+
+_DEFAULT_PORTS = {'http': '80', 'https': '443'}
+_SAFE_PATH_CHARS = "/-_.~!$&'()*+,;=:@"
+
+
+def _site_rules(host: str) -> dict:
+    for domain, rules in URL_DEDUP.get('sites', {}).items():
+        if host == domain or host.endswith('.' + domain):
+            return rules
+    return {}
+
+
+def canonicalize_url(url: str, base: Optional[str] = None) -> str:
+    """
+    URL'in kanonik halini döndür.
+
+    - base verilirse göreli URL çözülür
+    - şema ve host küçük harf, varsayılan port ve fragment atılır
+    - path'teki tekrar eden '/' ve sondaki '/' atılır, percent-encoding
+      normalize edilir (siteye göre path küçük harfe çevrilir)
+    - query: site allow-list'i varsa sadece izinli parametreler, yoksa takip
+      parametreleri hariç hepsi; parametreler sıralanır
+    """
+    if base:
+        url = urljoin(base, url)
+
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower().rstrip('.')
+    port = parts.port
+    netloc = host if port is None or str(port) == _DEFAULT_PORTS.get(scheme) else f"{host}:{port}"
+
+    rules = _site_rules(host)
+
+    path = re.sub(r'/{2,}', '/', parts.path or '/')
+    path = quote(unquote(path), safe=_SAFE_PATH_CHARS)
+    if rules.get('lowercase_path'):
+        path = path.lower()
+    if len(path) > 1:
+        path = path.rstrip('/')
+
+    allowed = rules.get('allow')
+    tracking = URL_DEDUP.get('tracking_params', [])
+    params = []
+    for key, value in parse_qsl(parts.query, keep_blank_values=True):
+        name = key.lower()
+        if allowed is not None:
+            if name not in allowed:
+                continue
+        elif name in tracking or any(name.startswith(prefix) for prefix in URL_DEDUP.get('tracking_prefixes', [])):
+            continue
+        params.append((name, value))
+
+    return urlunsplit((scheme, netloc, path, urlencode(sorted(params)), ''))
+
+
+def _hash_pair(item: str) -> Tuple[int, int]:
+    """Double hashing için tek blake2b özetinden iki 64-bit değer"""
+    return struct.unpack('<QQ', hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest())
+
+
+class BloomFilter:
+    """Sabit kapasiteli Bloom filtresi (bytearray tabanlı)"""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, hashes: Tuple[int, int]) -> List[int]:
+        h1, h2 = hashes
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def contains_hashes(self, hashes: Tuple[int, int]) -> bool:
+        bits = self.bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(hashes))
+
+    def add_hashes(self, hashes: Tuple[int, int]) -> bool:
+        added = False
+        bits = self.bits
+        for pos in self._positions(hashes):
+            mask = 1 << (pos & 7)
+            if not bits[pos >> 3] & mask:
+                bits[pos >> 3] |= mask
+                added = True
+        if added:
+            self.count += 1
+        return added
+
+    def __contains__(self, item: str) -> bool:
+        return self.contains_hashes(_hash_pair(item))
+
+    def add(self, item: str) -> bool:
+        """Ekle; öğe daha önce yoksa True döndür"""
+        return self.add_hashes(_hash_pair(item))
+
+    @property
+    def is_full(self) -> bool:
+        return self.count >= self.capacity
+
+
+class ScalableBloomFilter:
+    """
+    Dolunca büyüyen Bloom filtresi (Almeida vd., 2007).
+
+    Her yeni katman öncekinin `growth` katı kapasitededir ve hata oranı
+    `tightening` ile çarpılır; toplam hata oranı başlangıç değerinin
+    altında kalır.
+    """
+
+    MAGIC = b'MSBF1'
+
+    def __init__(self, initial_capacity: int = 100000, error_rate: float = 0.001,
+                 growth: int = 2, tightening: float = 0.8):
+        self.initial_capacity = initial_capacity
+        self.error_rate = error_rate
+        self.growth = growth
+        self.tightening = tightening
+        self.filters: List[BloomFilter] = []
+
+    def _new_filter(self) -> BloomFilter:
+        n = len(self.filters)
+        return BloomFilter(
+            self.initial_capacity * self.growth ** n,
+            self.error_rate * (1 - self.tightening) * self.tightening ** n
+        )
+
+    def __contains__(self, item: str) -> bool:
+        hashes = _hash_pair(item)
+        return any(bloom.contains_hashes(hashes) for bloom in reversed(self.filters))
+
+    def __len__(self) -> int:
+        return sum(bloom.count for bloom in self.filters)
+
+    def add(self, item: str) -> bool:
+        """Ekle; öğe daha önce yoksa True döndür"""
+        hashes = _hash_pair(item)
+        if any(bloom.contains_hashes(hashes) for bloom in self.filters):
+            return False
+        if not self.filters or self.filters[-1].is_full:
+            self.filters.append(self._new_filter())
+        return self.filters[-1].add_hashes(hashes)
+
+    @property
+    def size_bytes(self) -> int:
+        return sum(len(bloom.bits) for bloom in self.filters)
+
+    def save(self, path: str):
+        """Dosyaya atomik olarak yaz"""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(self.MAGIC)
+            f.write(struct.pack('<QdIdI', self.initial_capacity, self.error_rate,
+                                self.growth, self.tightening, len(self.filters)))
+            for bloom in self.filters:
+                f.write(struct.pack('<QdQIQ', bloom.capacity, bloom.error_rate,
+                                    bloom.num_bits, bloom.num_hashes, bloom.count))
+                f.write(bloom.bits)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'ScalableBloomFilter':
+        with open(path, 'rb') as f:
+            if f.read(len(cls.MAGIC)) != cls.MAGIC:
+                raise ValueError(f"Geçersiz Bloom filtresi dosyası: {path}")
+            initial_capacity, error_rate, growth, tightening, layers = struct.unpack(
+                '<QdIdI', f.read(struct.calcsize('<QdIdI'))
+            )
+            scalable = cls(initial_capacity, error_rate, growth, tightening)
+            for _ in range(layers):
+                capacity, layer_error, num_bits, num_hashes, count = struct.unpack(
+                    '<QdQIQ', f.read(struct.calcsize('<QdQIQ'))
+                )
+                bloom = BloomFilter.__new__(BloomFilter)
+                bloom.capacity, bloom.error_rate = capacity, layer_error
+                bloom.num_bits, bloom.num_hashes, bloom.count = num_bits, num_hashes, count
+                bloom.bits = bytearray(f.read((num_bits + 7) // 8))
+                scalable.filters.append(bloom)
+        return scalable
+
+
+class SeenUrlSet:
+    """
+    Kanonik URL'lerin Bloom filtreli kümesi (thread-safe).
+
+        seen = SeenUrlSet.open('trendyol')   # diskte varsa yükle
+        if seen.add(url): ...                 # ilk kez görüldüyse True
+        seen.save()
+    """
+
+    def __init__(self, path: Optional[str] = None, bloom: Optional[ScalableBloomFilter] = None):
+        self.path = path
+        self.bloom = bloom or ScalableBloomFilter(
+            URL_DEDUP.get('initial_capacity', 100000),
+            URL_DEDUP.get('error_rate', 0.001)
+        )
+        self._lock = threading.Lock()
+
+    @classmethod
+    def open(cls, name: str, directory: Optional[str] = None) -> 'SeenUrlSet':
+        """Adıyla kalıcı küme aç (dosya yoksa boş başlar)"""
+        directory = directory or URL_DEDUP.get('directory', 'crawl_state')
+        safe_name = re.sub(r'[^a-zA-Z0-9._-]', '_', name)
+        path = os.path.join(directory, f"{safe_name}.bloom")
+        bloom = ScalableBloomFilter.load(path) if os.path.exists(path) else None
+        return cls(path, bloom)
+
+    def __contains__(self, url: str) -> bool:
+        return canonicalize_url(url) in self.bloom
+
+    def __len__(self) -> int:
+        return len(self.bloom)
+
+    def add(self, url: str) -> bool:
+        """URL'i ekle; daha önce görülmediyse True"""
+        key = canonicalize_url(url)
+        with self._lock:
+            return self.bloom.add(key)
+
+    def update(self, urls: Iterable[str]) -> int:
+        return sum(1 for url in urls if self.add(url))
+
+    def save(self):
+        if self.path:
+            with self._lock:
+                self.bloom.save(self.path)
+
+    def clear(self):
+        with self._lock:
+            self.bloom = ScalableBloomFilter(self.bloom.initial_capacity, self.bloom.error_rate)
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
@@ -8,7 +8,7 @@ import json
 from datetime import datetime
 from database import SessionLocal, Product, ProductReview
 from turkish_review_ai import TurkishReviewAI
-import cloudscraper
+from http_client import get_http_clients
 
 class WorkingReviewScraper:
     """Çalışan Trendyol yorum scraper"""
@@ -16,7 +16,7 @@ class WorkingReviewScraper:
     def __init__(self):
         self.session = SessionLocal()
         self.ai = TurkishReviewAI()
-        self.scraper = cloudscraper.create_scraper()
+        self.scraper = get_http_clients().cloudscraper()
 
     def get_reviews_from_html(self, product_url: str):
         """HTML sayfasından yorumları çek"""